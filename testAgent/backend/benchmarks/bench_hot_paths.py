@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the parser, template and workflow hot paths on synthetic corpora
+File: benchmarks/bench_hot_paths.py
+
+Times InstructionParserService.analyze_instruction_only over thousands of
+instructions, TemplateManagerService.customize_template and _extract_test_cases
+on large templates, and WorkflowManagerService.resolve_workflow_chain on deep
+and wide dependency graphs. Each case runs several rounds and reports the
+median; --save stores the medians as a baseline, and later runs fail when a
+case is slower than its baseline by more than the threshold.
+
+Usage: python benchmarks/bench_hot_paths.py [--rounds 5] [--threshold 0.25] [--save] [--baseline path] [-k filter]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+os.environ.setdefault("TRACING_EXPORTER", "none")
+
+from services.instruction_parser import InstructionParserService
+from services.template_manager import TemplateManagerService, TDDTemplate, WorkflowMetadata, WorkflowType
+from services.workflow_manager import WorkflowManagerService
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "hot_paths.json")
+
+# Benchmark name -> setup coroutine returning the coroutine function timed in each round
+BENCHMARKS: Dict[str, Callable[[], Awaitable[Callable[[], Awaitable[Any]]]]] = {}
+
+def benchmark(name: str):
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+ACTIONS = ["Login to", "Create", "Import", "Provision", "Verify", "Open", "Get", "Configure"]
+OBJECTS = [
+    "the cluster at https://10.{a}.{b}.1", "area 'Area {a}' and building 'Building {b}'",
+    "{a} devices from devices_{b}.csv", "fabric 'Fabric {a}' with {b} l3vn", "fabric settings for site {a}",
+    "the network hierarchy", "device group Spine {a}", "bgp asn {a}{b}"
+]
+EXTRAS = [
+    "with username admin and password secret{a}", "and wait 30 seconds", "then check the home page",
+    "using timeout {b}000", "and click on 'Save'", ""
+]
+
+def build_instruction_corpus(count: int, seed: int = 42) -> List[str]:
+    """Instructions combining one to three action clauses with parameters"""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        clauses = []
+        for _ in range(rng.randint(1, 3)):
+            values = {"a": rng.randint(1, 250), "b": rng.randint(1, 250)}
+            clauses.append(" ".join(filter(None, [
+                rng.choice(ACTIONS), rng.choice(OBJECTS).format(**values), rng.choice(EXTRAS).format(**values)
+            ])))
+        corpus.append(", then ".join(clauses))
+    return corpus
+
+def build_large_template(test_cases: int, steps_per_case: int = 12) -> str:
+    """A TDD template with many test cases, each step using a placeholder"""
+    parameters = ["cluster_url", "username", "password", "fabric_name", "area_name", "building_name", "file_name"]
+    lines = ["# Synthetic Workflow", "", "## Test Cases", ""]
+    for case in range(test_cases):
+        lines.append(f"test_case_{case:05d}")
+        for step in range(steps_per_case):
+            keyword = ("Given", "When", "Then")[min(step * 3 // steps_per_case, 2)]
+            lines.append(f"{keyword}: The user works with {{{{{parameters[step % len(parameters)]}}}}} in step {step}")
+        lines.append("")
+    return "\n".join(lines)
+
+def build_deep_graph(depth: int) -> Dict[str, List[str]]:
+    """A single chain where every workflow depends on the previous one"""
+    names = [f"chain_{i:05d}" for i in range(depth)]
+    return {name: names[i - 1:i] for i, name in enumerate(names)}
+
+def build_wide_graph(width: int, layers: int = 3, seed: int = 42) -> Dict[str, List[str]]:
+    """Layers of workflows where each depends on a few workflows of the layer below"""
+    rng = random.Random(seed)
+    graph: Dict[str, List[str]] = {"root": []}
+    below = ["root"]
+    for layer in range(layers):
+        current = [f"layer{layer}_{i:05d}" for i in range(width)]
+        for name in current:
+            graph[name] = rng.sample(below, min(len(below), rng.randint(1, 4)))
+        below = current
+    return graph
+
+async def build_workflow_manager(graph: Dict[str, List[str]]) -> WorkflowManagerService:
+    """Workflow manager over synthetic templates with the given dependencies"""
+    template_manager = TemplateManagerService()
+    for name, dependencies in graph.items():
+        template_manager.templates[name] = TDDTemplate(
+            name=name,
+            workflow_type=WorkflowType.CREATION,
+            metadata=WorkflowMetadata(
+                workflow_type=WorkflowType.CREATION,
+                dependencies=dependencies,
+                required_parameters=["cluster_url"],
+                optional_parameters=["username", "password"]
+            ),
+            content="",
+            test_cases=[],
+            parameters=[],
+            file_path=f"{name}.tdd.md",
+            last_modified=0.0
+        )
+    await template_manager._build_dependency_graph()
+
+    workflow_manager = WorkflowManagerService()
+    workflow_manager.cluster_inventory = None
+    await workflow_manager.set_template_manager(template_manager)
+    return workflow_manager
+
+def resolve_all(workflow_manager: WorkflowManagerService, primaries: List[List[str]], cold: bool):
+    parameters = {"cluster_url": "https://10.0.0.1", "username": "admin", "password": "secret"}
+
+    async def run():
+        for index, workflows in enumerate(primaries):
+            if cold:
+                workflow_manager.clear_plan_cache()
+            await workflow_manager.resolve_workflow_chain(workflows, parameters, f"bench-{index}")
+    return run
+
+@benchmark("parser.analyze_instruction_only[5000]")
+async def setup_analyze():
+    parser = InstructionParserService()
+    corpus = build_instruction_corpus(5000)
+
+    async def run():
+        for instruction in corpus:
+            await parser.analyze_instruction_only(instruction)
+    return run
+
+@benchmark("template.customize_template[2000 cases]")
+async def setup_customize():
+    template_manager = TemplateManagerService()
+    content = build_large_template(2000)
+    parameters = {"cluster_url": "https://10.0.0.1", "username": "admin", "password": "secret",
+                  "fabric_name": "Fabric 1", "area_name": "Area 1"}
+
+    async def run():
+        await template_manager.customize_template(content, parameters)
+    return run
+
+@benchmark("template._extract_test_cases[2000 cases]")
+async def setup_extract():
+    template_manager = TemplateManagerService()
+    content = build_large_template(2000)
+
+    async def run():
+        template_manager._extract_test_cases(content)
+    return run
+
+@benchmark("template._build_dependency_graph[deep 5000]")
+async def setup_build_deep():
+    workflow_manager = await build_workflow_manager(build_deep_graph(5000))
+    template_manager = workflow_manager.template_manager
+
+    async def run():
+        await template_manager._build_dependency_graph()
+    return run
+
+@benchmark("workflow.resolve_workflow_chain[deep 2000, cold]")
+async def setup_resolve_deep():
+    graph = build_deep_graph(2000)
+    workflow_manager = await build_workflow_manager(graph)
+    names = list(graph)
+    return resolve_all(workflow_manager, [[names[-1]], [names[len(names) // 2]], [names[-1], names[10]]], cold=True)
+
+@benchmark("workflow.resolve_workflow_chain[wide 3x2000, cold]")
+async def setup_resolve_wide():
+    graph = build_wide_graph(2000)
+    workflow_manager = await build_workflow_manager(graph)
+    rng = random.Random(7)
+    top = [name for name in graph if name.startswith("layer2_")]
+    return resolve_all(workflow_manager, [rng.sample(top, 20) for _ in range(20)], cold=True)
+
+@benchmark("workflow.resolve_workflow_chain[wide 3x2000, cached]")
+async def setup_resolve_wide_cached():
+    graph = build_wide_graph(2000)
+    workflow_manager = await build_workflow_manager(graph)
+    rng = random.Random(7)
+    top = [name for name in graph if name.startswith("layer2_")]
+    return resolve_all(workflow_manager, [rng.sample(top, 20) for _ in range(20)] * 50, cold=False)
+
+async def measure(setup, rounds: int) -> Dict[str, float]:
+    """Run one warm-up and several timed rounds; returns seconds"""
+    run = await setup()
+    await run()
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        await run()
+        timings.append(time.perf_counter() - started)
+    return {"median": statistics.median(timings), "min": min(timings), "rounds": rounds}
+
+def load_baseline(path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_baseline(path: str, results: Dict[str, Dict[str, float]]):
+    """Store medians with the machine they were taken on; comparisons across machines are meaningless"""
+    baseline = load_baseline(path) or {"benchmarks": {}}
+    baseline["benchmarks"].update({name: {"median": result["median"]} for name, result in results.items()})
+    baseline.update({
+        "saved_at": datetime.now().isoformat(timespec="seconds"),
+        "machine": platform.node(),
+        "python": platform.python_version()
+    })
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+
+async def run_benchmarks(names: List[str], rounds: int, baseline: Optional[Dict[str, Any]],
+                         threshold: float) -> Dict[str, Dict[str, Any]]:
+    """Run the named benchmarks and compare each against its baseline median"""
+    print(f"Hot path microbenchmarks (median of {rounds} rounds, milliseconds)")
+    print("=" * 88)
+    print(f"{'benchmark':<52} {'median':>10} {'min':>10} {'baseline':>10} {'change':>8}")
+
+    baseline_medians = (baseline or {}).get("benchmarks", {})
+    results = {}
+    for name in names:
+        result = await measure(BENCHMARKS[name], rounds)
+        reference = baseline_medians.get(name, {}).get("median")
+        result["baseline"] = reference
+        result["change"] = result["median"] / reference - 1 if reference else None
+        result["regressed"] = result["change"] is not None and result["change"] > threshold
+        results[name] = result
+
+        baseline_text = f"{reference * 1000:>10.2f}" if reference else f"{'-':>10}"
+        change_text = f"{result['change']:>+8.0%}" if reference else f"{'-':>8}"
+        marker = "  ❌" if result["regressed"] else ""
+        print(f"{name:<52} {result['median'] * 1000:>10.2f} {result['min'] * 1000:>10.2f} {baseline_text} {change_text}{marker}")
+
+    print("-" * 88)
+    return results
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark parser, template and workflow hot paths")
+    parser.add_argument("--rounds", type=int, default=5, help="Timed rounds per benchmark")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown against the baseline, 0.25 = 25%%")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline file to compare against or save to")
+    parser.add_argument("--save", action="store_true", help="Store this run's medians as the baseline")
+    parser.add_argument("-k", dest="filter", default="", help="Only run benchmarks whose name contains this text")
+    parser.add_argument("--list", action="store_true", help="List benchmark names and exit")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    names = [name for name in BENCHMARKS if args.filter in name]
+    if args.list:
+        print("\n".join(names))
+        sys.exit(0)
+
+    baseline = load_baseline(args.baseline)
+    results = asyncio.run(run_benchmarks(names, args.rounds, baseline, args.threshold))
+    regressions = [name for name, result in results.items() if result["regressed"]]
+
+    if args.save:
+        save_baseline(args.baseline, results)
+        print(f"✓ Saved baseline for {len(results)} benchmarks to {args.baseline}")
+    elif baseline is None:
+        print(f"No baseline at {args.baseline}; run with --save to create one")
+    elif regressions:
+        print(f"❌ {len(regressions)} regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+    else:
+        print(f"✓ No benchmark regressed by more than {args.threshold:.0%}")
+    sys.exit(1 if regressions and not args.save else 0)
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+End-to-end throughput benchmark of the FastAPI app against local stand-ins
+File: benchmarks/bench_throughput.py
+
+Drives concurrent sessions through /parse_test_instructions, /execute_test_plan
+and /get_session_status. The LLM is the fake OpenAI server, reached through the
+real AzureOpenAIService client, and Playwright is the fake npx from fakes/bin,
+so no Cisco endpoint or cluster is needed. Reports p50/p95/p99 of each pipeline
+stage and of whole sessions, and sessions per minute.
+
+Usage: python benchmarks/bench_throughput.py [--sessions 20] [--concurrency 5] [--llm-latency 0.5] [--json report.json]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List, Any
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from fakes.openai_server import FakeOpenAIServer
+
+FINAL_STATUSES = {"completed", "failed", "cancelled", "timed_out"}
+CLUSTER_CONFIG = {"url": "https://10.0.0.1", "username": "admin", "password": "secret"}
+
+def percentile(samples: List[float], q: float) -> float:
+    """Nearest-rank percentile of a sample list"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(math.ceil(q / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(samples),
+        "p50": percentile(samples, 50),
+        "p95": percentile(samples, 95),
+        "p99": percentile(samples, 99),
+        "max": max(samples) if samples else 0.0
+    }
+
+def configure_environment(args: argparse.Namespace, llm_url: str, work_dir: str):
+    """Point the backend at the stand-ins; settings are read when main is imported"""
+    os.environ["PATH"] = os.path.join(BACKEND_DIR, "fakes", "bin") + os.pathsep + os.environ["PATH"]
+    os.environ.update({
+        "CISCO_IDP": f"{llm_url}/oauth2/token",
+        "AZURE_OPENAI_ENDPOINT": llm_url,
+        "FAKE_PLAYWRIGHT_DURATION": str(args.run_duration),
+        "GENERATION_MODE": args.generation_mode,
+        "JOB_QUEUE_WORKERS": str(args.workers),
+        "JOB_QUEUE_MAX_DEPTH": str(max(args.sessions, 50)),
+        "TEST_OUTPUT_DIR": os.path.join(work_dir, "outputs"),
+        "STEP_CACHE_FILE": "",
+        "TRACING_EXPORTER": "none",
+        "LOG_FILE": os.path.join(work_dir, "benchmark.log"),
+        "CLUSTER_INVENTORY_ENABLED": "false",
+        "SESSION_TOKEN_BUDGET": "0"
+    })
+
+async def run_session(client, index: int, args: argparse.Namespace) -> Dict[str, Any]:
+    """Parse, queue and wait for one session; returns its outcome and latencies"""
+    started = time.perf_counter()
+    response = await client.post("/parse_test_instructions", json=dict(
+        prompt=args.prompt, url=CLUSTER_CONFIG["url"],
+        username=CLUSTER_CONFIG["username"], password=CLUSTER_CONFIG["password"]
+    ))
+    parsed = response.json()
+    if response.status_code != 200 or parsed.get("status") != "parsed":
+        return {"status": "not_parsed", "latency": time.perf_counter() - started}
+    session_id = parsed["session_id"]
+
+    # The queue rejects submissions beyond its depth; wait as told and resubmit
+    while True:
+        response = await client.post("/execute_test_plan", json={"session_id": session_id})
+        if response.status_code != 429:
+            break
+        await asyncio.sleep(float(response.headers.get("Retry-After", "1")))
+    if response.status_code != 200:
+        return {"status": "rejected", "latency": time.perf_counter() - started}
+    queued = time.perf_counter()
+
+    deadline = queued + args.session_timeout
+    status = "queued"
+    while time.perf_counter() < deadline:
+        status = (await client.post("/get_session_status", json={"session_id": session_id})).json()["status"]
+        if status in FINAL_STATUSES:
+            break
+        await asyncio.sleep(args.poll_interval)
+    else:
+        status = "unfinished"
+
+    finished = time.perf_counter()
+    return {"status": status, "latency": finished - started, "execution": finished - queued}
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run the benchmark and return its report"""
+    llm = FakeOpenAIServer(args.llm_latency, args.llm_jitter, args.llm_error_rate, args.llm_rate_limit_rate, args.seed)
+    # The service authenticates with blocking requests, so the server can't share this loop
+    llm_url = llm.start_in_thread()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        configure_environment(args, llm_url, work_dir)
+
+        import httpx
+        import main
+        from core.metrics import STAGE_DURATION
+
+        # Per-request INFO logs would dominate the run; keep warnings and errors
+        logging.getLogger().setLevel(logging.WARNING)
+
+        stage_samples: Dict[str, List[float]] = defaultdict(list)
+
+        def record_stage(value: float, labels: Dict[str, str]):
+            stage_samples[labels["stage"]].append(value)
+
+        STAGE_DURATION.add_listener(record_stage)
+        await main.startup_event()
+        try:
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=60) as client:
+                clients = asyncio.Semaphore(args.concurrency)
+
+                async def limited(index: int) -> Dict[str, Any]:
+                    async with clients:
+                        return await run_session(client, index, args)
+
+                started = time.perf_counter()
+                outcomes = await asyncio.gather(*[limited(i) for i in range(args.sessions)])
+                elapsed = time.perf_counter() - started
+        finally:
+            STAGE_DURATION.remove_listener(record_stage)
+            await main.shutdown_event()
+            llm.stop_thread()
+
+    statuses: Dict[str, int] = defaultdict(int)
+    for outcome in outcomes:
+        statuses[outcome["status"]] += 1
+
+    return {
+        "config": {
+            "sessions": args.sessions,
+            "concurrency": args.concurrency,
+            "workers": args.workers,
+            "generation_mode": args.generation_mode,
+            "llm_latency": args.llm_latency,
+            "llm_jitter": args.llm_jitter,
+            "llm_error_rate": args.llm_error_rate,
+            "llm_rate_limit_rate": args.llm_rate_limit_rate,
+            "run_duration": args.run_duration,
+            "prompt": args.prompt
+        },
+        "elapsed_seconds": elapsed,
+        "sessions_per_minute": statuses["completed"] / elapsed * 60 if elapsed else 0.0,
+        "statuses": dict(statuses),
+        "session_latency": summarize([outcome["latency"] for outcome in outcomes]),
+        "stages": {stage: summarize(samples) for stage, samples in sorted(stage_samples.items())},
+        "llm_requests": llm.get_statistics()
+    }
+
+def print_report(report: Dict[str, Any]):
+    config = report["config"]
+    print("End-to-end throughput benchmark (milliseconds)")
+    print("=" * 72)
+    print(f"{config['sessions']} sessions, {config['concurrency']} concurrent clients, {config['workers']} queue workers, "
+          f"{config['generation_mode']} generation")
+    print(f"LLM latency {config['llm_latency']}s ±{config['llm_jitter']}s, error rate {config['llm_error_rate']:.0%}, "
+          f"429 rate {config['llm_rate_limit_rate']:.0%}; Playwright runs {config['run_duration']}s")
+    print("-" * 72)
+    print(f"{'stage':<16} {'count':>7} {'p50':>10} {'p95':>10} {'p99':>10} {'max':>10}")
+    rows = list(report["stages"].items()) + [("session", report["session_latency"])]
+    for stage, summary in rows:
+        print(f"{stage:<16} {summary['count']:>7} {summary['p50'] * 1000:>10.1f} {summary['p95'] * 1000:>10.1f} "
+              f"{summary['p99'] * 1000:>10.1f} {summary['max'] * 1000:>10.1f}")
+    print("-" * 72)
+    print(f"Sessions: {', '.join(f'{count} {status}' for status, count in sorted(report['statuses'].items()))}")
+    print(f"LLM requests: {', '.join(f'{count} {kind}' for kind, count in sorted(report['llm_requests'].items()))}")
+    print(f"Throughput: {report['sessions_per_minute']:.1f} sessions/minute over {report['elapsed_seconds']:.1f}s")
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark session throughput against a fake LLM and fake Playwright")
+    parser.add_argument("--sessions", type=int, default=20, help="Sessions to run in total")
+    parser.add_argument("--concurrency", type=int, default=5, help="Clients submitting sessions at the same time")
+    parser.add_argument("--workers", type=int, default=5, help="Job queue workers executing sessions")
+    parser.add_argument("--prompt", default="test login to the cluster",
+                        help="Instruction of every session")
+    parser.add_argument("--generation-mode", default="template", choices=["template", "steps", "rules", "hybrid"])
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds per LLM completion")
+    parser.add_argument("--llm-jitter", type=float, default=0.1)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="Share of completions failing with 500")
+    parser.add_argument("--llm-rate-limit-rate", type=float, default=0.0, help="Share of completions failing with 429")
+    parser.add_argument("--run-duration", type=float, default=0.5, help="Seconds each fake Playwright run takes")
+    parser.add_argument("--session-timeout", type=float, default=600)
+    parser.add_argument("--poll-interval", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Also write the report to this file")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = asyncio.run(run_benchmark(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    sys.exit(0 if set(report["statuses"]) <= {"completed", "failed"} else 1)
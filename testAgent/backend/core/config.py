@@ -20,18 +20,70 @@ class Settings(BaseSettings):
     PLAYWRIGHT_TIMEOUT: int = 30000
     PLAYWRIGHT_HEADLESS: bool = True
     PLAYWRIGHT_PROMPT_PATH: str = os.path.join(os.getcwd(), "prompt.md")
+    STORAGE_STATE_TTL: int = 1800  # Seconds an authenticated browser state is reused
     
     # Session Configuration
     SESSION_TIMEOUT: int = 3600  # 1 hour in seconds
     
+    # Workflow Resolution Configuration
+    PLAN_CACHE_SIZE: int = 256  # Resolved execution plans kept in memory
+    
+    # Cluster Inventory Configuration
+    CLUSTER_INVENTORY_ENABLED: bool = True
+    CLUSTER_INVENTORY_CACHE_TTL: int = 300  # Seconds to reuse fetched cluster resources
+    CLUSTER_INVENTORY_ERROR_TTL: int = 30  # Seconds to remember failed lookups
+    CLUSTER_INVENTORY_TIMEOUT: int = 10
+    CLUSTER_INVENTORY_MAX_CONNECTIONS: int = 20
+    CLUSTER_INVENTORY_VERIFY_SSL: bool = False  # Clusters commonly use self-signed certificates
+    
     # Logging Configuration
     LOG_LEVEL: str = "INFO"
     LOG_FORMAT: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    LOG_FILE: str = "app.log"
+    LOG_JSON: bool = False  # Write the log file as JSON lines
+    LOG_MAX_BYTES: int = 10 * 1024 * 1024  # Rotate the log file at this size
+    LOG_BACKUP_COUNT: int = 5
+    
+    # Tracing Configuration
+    TRACING_EXPORTER: str = "json"  # json, otlp or none
+    TRACING_FILE: str = os.path.join("logs", "traces.jsonl")
+    TRACING_MAX_BYTES: int = 10 * 1024 * 1024  # Rotate the span file at this size
+    TRACING_BACKUP_COUNT: int = 5
+    TRACING_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
     
     # Test Execution Configuration
     TEST_OUTPUT_DIR: str = "test_outputs"
     MAX_CONCURRENT_TESTS: int = 5
     
+    # Spec Compile Check Configuration
+    SPEC_COMPILE_CHECK: bool = True  # Type-check a session's generated specs before any browser run
+    SPEC_COMPILER_COMMAND: str = "npx --offline --no -- tsc"  # Specs run unchecked if this isn't installed
+    SPEC_COMPILE_TIMEOUT: float = 120
+    SPEC_COMPILER_RETRY_AFTER: float = 300  # Seconds before a compiler that failed to run is tried again
+    SPEC_REPAIR_ATTEMPTS: int = 1  # LLM repairs of a spec with compile errors before basic generation is used
+    
+    # Job Queue Configuration
+    JOB_QUEUE_WORKERS: Optional[int] = None  # Sessions executed at the same time, MAX_CONCURRENT_TESTS if unset
+    JOB_QUEUE_MAX_DEPTH: int = 50  # Further submissions are rejected with 429
+    
+    # Execution Worker Configuration
+    EXECUTION_MODE: str = "inline"  # inline (API process) or worker (separate worker.py processes)
+    EXECUTION_BROKER_URL: str = "sqlite:///test_outputs/.broker/jobs.db"
+    WORKER_CONCURRENCY: int = 2  # Sessions run at the same time by each worker process
+    WORKER_POLL_INTERVAL: float = 0.5  # Seconds between broker polls when idle
+    WORKER_LEASE_SECONDS: float = 120  # Running jobs without a heartbeat for this long are requeued
+    
+    # Execution Budget Configuration
+    EXECUTION_BUDGET_SECONDS: float = 1800  # Wall-clock limit for a session's generation and test runs
+    EXECUTION_BUDGET_MAX_SECONDS: float = 7200  # Largest budget a request may ask for
+    
+    # Artifact Retention Configuration
+    ARTIFACT_RETENTION_HOURS: float = 72  # Session outputs older than this are removed
+    ARTIFACT_SESSION_BUDGET_MB: float = 200  # Oldest artifacts of a session are evicted beyond this
+    ARTIFACT_TOTAL_BUDGET_MB: float = 2048  # Oldest sessions are removed beyond this
+    ARTIFACT_SWEEP_INTERVAL: int = 600  # Seconds between background sweeps
+    ARTIFACT_KEEP_PASSED: bool = False  # Keep screenshots, videos and reports of passed runs
+    
     # Azure OpenAI Configuration
     AZURE_OPENAI_ENDPOINT: str = "https://chat-ai.cisco.com"
     AZURE_OPENAI_API_KEY: Optional[str] = None
@@ -49,7 +101,35 @@ class Settings(BaseSettings):
     # Test Generation Configuration
     MAX_RETRIES: int = 3
     REQUEST_TIMEOUT: int = 60
+    LLM_RETRY_BACKOFF_BASE: float = 1.0  # Seconds; retries wait a random time up to base * 2 ** attempt
+    LLM_RETRY_BACKOFF_MAX: float = 20.0
+    LLM_BREAKER_FAILURE_THRESHOLD: int = 5  # Consecutive failures that open the circuit
+    LLM_BREAKER_RESET_SECONDS: float = 30.0  # Seconds the circuit stays open before a probe request
+    LLM_MAX_CONCURRENCY: int = 8  # Upper limit of the adaptive concurrent request limit
+    LLM_MIN_CONCURRENCY: int = 1
+    LLM_LATENCY_TARGET_SECONDS: float = 45.0  # Slower responses reduce the concurrent request limit
     GENERATION_TEMPERATURE: float = 0.1
+    GENERATION_MODE: str = "template"  # template (whole TDD per request), steps (cached per-step snippets), rules (TDD compiler only) or hybrid
+    RULE_COVERAGE_THRESHOLD: float = 0.9  # Hybrid mode skips the LLM for templates whose steps the rulebook covers this well, all When/Then steps included
+    SHARED_FIXTURES: bool = True  # Write login and navigation helpers once per session to common/fixtures.ts; specs import them
+    MODEL_ROUTING: bool = True  # Pick deployment, output limit and timeout per template from its size
+    MODEL_ROUTE_SMALL_DEPLOYMENT: str = ""  # Empty for AZURE_OPENAI_MODEL, e.g. gpt-4.1-mini for cheaper small workflows
+    MODEL_ROUTE_SMALL_MAX_STEPS: int = 12  # Up to 3 test cases and 60s estimated duration as well
+    MODEL_ROUTE_SMALL_MAX_TOKENS: int = 2000
+    MODEL_ROUTE_SMALL_TIMEOUT: float = 45.0  # Seconds per completion attempt
+    MODEL_ROUTE_MEDIUM_DEPLOYMENT: str = ""
+    MODEL_ROUTE_MEDIUM_MAX_STEPS: int = 30  # Up to 180s estimated duration as well
+    MODEL_ROUTE_MEDIUM_MAX_TOKENS: int = 3500
+    MODEL_ROUTE_MEDIUM_TIMEOUT: float = 90.0
+    MODEL_ROUTE_LARGE_DEPLOYMENT: str = ""  # Everything else, up to GENERATION_MAX_OUTPUT_TOKENS
+    MODEL_ROUTE_LARGE_TIMEOUT: float = 180.0
+    STEP_CACHE_SIZE: int = 4096  # Step snippets kept in memory
+    STEP_CACHE_FILE: str = os.path.join("test_outputs", ".cache", "step_snippets.json")  # Empty to keep in memory only
+    TOKENIZER_ENABLED: bool = True  # Count prompt tokens with tiktoken; off estimates from text length and never downloads
+    TIKTOKEN_CACHE_DIR: str = ""  # Directory with pre-downloaded tiktoken encodings, for hosts without internet access
+    PROMPT_MAX_INPUT_TOKENS: int = 6000  # Optional prompt guidance is dropped beyond this
+    GENERATION_MAX_OUTPUT_TOKENS: int = 4000  # Upper limit of a generated spec; smaller workflows get less
+    SESSION_TOKEN_BUDGET: int = 200000  # LLM tokens a session may use before falling back to basic generation, 0 for no limit
     
     class Config:
         env_file = ".env"
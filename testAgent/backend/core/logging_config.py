@@ -3,14 +3,87 @@ Logging configuration for the E2E Testing Agent Backend
 File: backend/core/logging_config.py
 """
 
+import atexit
+import json
 import logging
 import logging.config
-from typing import Dict, Any
+import logging.handlers
+import queue
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional
 import os
+from core.config import settings
+
+# Background listener that writes queued records to the real handlers
+_listener: Optional[logging.handlers.QueueListener] = None
+
+class JsonLinesFormatter(logging.Formatter):
+    """Format records as one JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno,
+            "message": record.getMessage(),
+            "thread": record.threadName
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+class ExcludeLoggersFilter(logging.Filter):
+    """Drop records from the given logger namespaces"""
+
+    def __init__(self, *prefixes: str):
+        super().__init__()
+        self.prefixes = tuple(prefixes)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return not record.name.startswith(self.prefixes)
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that keeps exception info for the listener's formatters"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting happens on the listener thread; only resolve the message here
+        # so args holding mutable objects are captured at log time
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def setup_logging(log_level: str = "INFO", log_file: str = None, json_lines: bool = None,
+                  max_bytes: int = None, backup_count: int = None) -> None:
+    """
+    Setup logging configuration
+
+    Records are put on an in-memory queue and written to the console and a rotating
+    log file by a background thread, so logging never blocks the event loop on I/O.
+    """
+    global _listener
+
+    log_file = log_file or settings.LOG_FILE
+    json_lines = settings.LOG_JSON if json_lines is None else json_lines
+    max_bytes = settings.LOG_MAX_BYTES if max_bytes is None else max_bytes
+    backup_count = settings.LOG_BACKUP_COUNT if backup_count is None else backup_count
+
+    # Setting up again (e.g. on reload) replaces the previous listener
+    shutdown_logging()
+
+    log_dir = os.path.dirname(log_file)
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
 
-def setup_logging(log_level: str = "INFO") -> None:
-    """Setup logging configuration"""
-    
     logging_config = {
         "version": 1,
         "disable_existing_loggers": False,
@@ -24,46 +97,66 @@ def setup_logging(log_level: str = "INFO") -> None:
                 "datefmt": "%Y-%m-%d %H:%M:%S",
             },
         },
-        "handlers": {
-            "console": {
-                "class": "logging.StreamHandler",
-                "level": log_level,
-                "formatter": "default",
-                "stream": "ext://sys.stdout",
-            },
-            "file": {
-                "class": "logging.FileHandler",
-                "level": log_level,
-                "formatter": "detailed",
-                "filename": "app.log",
-                "mode": "a",
-            },
-        },
         "loggers": {
             "": {  # root logger
-                "handlers": ["console", "file"],
+                "handlers": [],
                 "level": log_level,
                 "propagate": False,
             },
             "uvicorn": {
-                "handlers": ["console"],
+                "handlers": [],
                 "level": "INFO",
-                "propagate": False,
+                "propagate": True,
             },
             "uvicorn.error": {
-                "handlers": ["console"],
+                "handlers": [],
                 "level": "INFO",
-                "propagate": False,
+                "propagate": True,
             },
             "uvicorn.access": {
-                "handlers": ["console"],
+                "handlers": [],
                 "level": "INFO",
-                "propagate": False,
+                "propagate": True,
             },
         },
     }
-    
+
     logging.config.dictConfig(logging_config)
-    
-    # Create logs directory if it doesn't exist
-    os.makedirs("logs", exist_ok=True)
+    formatters = logging_config["formatters"]
+
+    # Handlers run on the listener thread only
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setLevel(log_level)
+    console_handler.setFormatter(logging.Formatter(formatters["default"]["format"], formatters["default"]["datefmt"]))
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_file, mode="a", maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+    )
+    file_handler.setLevel(log_level)
+    if json_lines:
+        file_handler.setFormatter(JsonLinesFormatter())
+    else:
+        file_handler.setFormatter(logging.Formatter(formatters["detailed"]["format"], formatters["detailed"]["datefmt"]))
+    # uvicorn logs go to the console only
+    file_handler.addFilter(ExcludeLoggersFilter("uvicorn"))
+
+    # Loggers only enqueue; a background thread does the writing
+    root = logging.getLogger()
+    handlers = [console_handler, file_handler]
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root.addHandler(NonBlockingQueueHandler(log_queue))
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the writer thread"""
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,211 @@
+"""
+In-process metrics for the E2E Testing Agent Backend, exposed in Prometheus text format
+File: backend/core/metrics.py
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Tuple, Optional, Sequence
+
+# Latency buckets in seconds, from template loads to full Playwright runs
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+LabelValues = Tuple[str, ...]
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = [(k, str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')) for k, v in pairs]
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class Counter:
+    """Monotonically increasing counter with labels"""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = tuple(str(labels[name]) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels: str) -> float:
+        return self._values.get(tuple(str(labels[name]) for name in self.label_names), 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}")
+        return lines
+
+class Histogram:
+    """Cumulative histogram with labels"""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts (+Inf last), sum, count]
+        self._values: Dict[LabelValues, list] = {}
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[float, Dict[str, str]], None]] = []
+
+    def observe(self, value: float, **labels: str):
+        key = tuple(str(labels[name]) for name in self.label_names)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+        for listener in self._listeners:
+            listener(value, labels)
+
+    def add_listener(self, listener: Callable[[float, Dict[str, str]], None]):
+        """Also pass every observation to a callback, e.g. to keep raw samples for exact percentiles"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[float, Dict[str, str]], None]):
+        self._listeners.remove(listener)
+
+    @contextmanager
+    def time(self, **labels: str):
+        """Observe the duration of the enclosed block, including when it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def get_count(self, **labels: str) -> int:
+        series = self._values.get(tuple(str(labels[name]) for name in self.label_names))
+        return series[2] if series else 0
+
+    def get_sum(self, **labels: str) -> float:
+        series = self._values.get(tuple(str(labels[name]) for name in self.label_names))
+        return series[1] if series else 0.0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total, count) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.label_names, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class MetricsRegistry:
+    """Collection of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, label_names))
+
+    def histogram(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, label_names, buckets))
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Render all metrics in Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+# Global registry and the metrics recorded by the session pipeline
+metrics = MetricsRegistry()
+
+STAGE_DURATION = metrics.histogram(
+    "e2e_stage_duration_seconds",
+    "Duration of each session pipeline stage",
+    ["stage"]
+)
+SESSION_DURATION = metrics.histogram(
+    "e2e_session_duration_seconds",
+    "Duration of a complete test session",
+    ["status"]
+)
+LLM_REQUESTS = metrics.counter(
+    "e2e_llm_requests_total",
+    "LLM completion requests by outcome",
+    ["status"]
+)
+LLM_TOKENS = metrics.counter(
+    "e2e_llm_tokens_total",
+    "LLM tokens used by completion requests",
+    ["type"]
+)
+LLM_PROMPT_TOKENS = metrics.histogram(
+    "e2e_llm_prompt_tokens",
+    "Locally counted input tokens of LLM completion requests",
+    buckets=(250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+)
+LLM_ROUTE_REQUESTS = metrics.counter(
+    "e2e_llm_route_requests_total",
+    "LLM completion attempts by model route and outcome",
+    ["route", "status"]
+)
+LLM_ROUTE_LATENCY = metrics.histogram(
+    "e2e_llm_route_latency_seconds",
+    "Latency of successful LLM completions by model route",
+    ["route"]
+)
+LLM_CIRCUIT_TRANSITIONS = metrics.counter(
+    "e2e_llm_circuit_transitions_total",
+    "LLM circuit breaker state changes by new state",
+    ["state"]
+)
+TEST_RUNS = metrics.counter(
+    "e2e_test_runs_total",
+    "Workflow test runs by result",
+    ["status"]
+)
+SPEC_COMPILE_CHECKS = metrics.counter(
+    "e2e_spec_compile_checks_total",
+    "Generated specs type-checked before execution by result",
+    ["result"]
+)
+STEP_CACHE_LOOKUPS = metrics.counter(
+    "e2e_step_cache_lookups_total",
+    "Step snippet cache lookups in step generation mode",
+    ["result"]
+)
+TDD_RULE_STEPS = metrics.counter(
+    "e2e_tdd_rule_steps_total",
+    "TDD steps compiled to Playwright code by the rulebook by result",
+    ["result"]
+)
+
+def track_stage(stage: str):
+    """Time a pipeline stage into the stage histogram"""
+    return STAGE_DURATION.time(stage=stage)
@@ -0,0 +1,334 @@
+"""
+Span tracing for the E2E Testing Agent Backend, correlated by session id
+File: backend/core/tracing.py
+"""
+
+import atexit
+import functools
+import inspect
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import secrets
+import threading
+import time
+import urllib.request
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Any, Optional, Sequence
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "e2e-testing-agent"
+
+# Trace ids are derived from the session id so separate requests of a session share one trace
+_SESSION_NAMESPACE = uuid.UUID("6f1c1b8e-4f5e-4d5a-9a63-2f0c6c8d7e10")
+
+_current_session: ContextVar[Optional[str]] = ContextVar("trace_session_id", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("trace_current_span", default=None)
+
+@dataclass
+class Span:
+    """A timed operation within a trace"""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    session_id: Optional[str]
+    start_time_ns: int
+    end_time_ns: Optional[int] = None
+    status: str = "ok"  # ok, error
+    error: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        """Duration in seconds"""
+        return ((self.end_time_ns or time.time_ns()) - self.start_time_ns) / 1e9
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+class SpanExporter(ABC):
+    """Base class for span sinks, called from the export thread"""
+
+    @abstractmethod
+    def export(self, spans: List[Span]):
+        """Export a batch of finished spans"""
+
+    def shutdown(self):
+        pass
+
+class JsonFileSpanExporter(SpanExporter):
+    """Append spans to a file as JSON lines, rotated like the log file"""
+
+    def __init__(self, path: str, max_bytes: int = None, backup_count: int = None):
+        self.path = path
+        self.max_bytes = max_bytes if max_bytes is not None else settings.TRACING_MAX_BYTES
+        self.backup_count = backup_count if backup_count is not None else settings.TRACING_BACKUP_COUNT
+        self._handler: Optional[logging.handlers.RotatingFileHandler] = None
+
+    def _get_handler(self) -> logging.handlers.RotatingFileHandler:
+        """Open the file on the first export, so importing the tracer creates nothing"""
+        if self._handler is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._handler = logging.handlers.RotatingFileHandler(
+                self.path, mode="a", maxBytes=self.max_bytes, backupCount=self.backup_count,
+                encoding="utf-8", delay=True
+            )
+            self._handler.setFormatter(logging.Formatter("%(message)s"))
+        return self._handler
+
+    def export(self, spans: List[Span]):
+        handler = self._get_handler()
+        for span in spans:
+            entry = asdict(span)
+            entry["duration"] = span.duration
+            handler.handle(logging.makeLogRecord({"msg": json.dumps(entry, default=str)}))
+
+    def shutdown(self):
+        if self._handler:
+            self._handler.close()
+
+class OTLPHttpSpanExporter(SpanExporter):
+    """Send spans to an OTLP/HTTP collector using the JSON encoding"""
+
+    def __init__(self, endpoint: str, timeout: float = 5.0):
+        self.endpoint = endpoint
+        self.timeout = timeout
+
+    def export(self, spans: List[Span]):
+        body = json.dumps(self.to_otlp(spans)).encode("utf-8")
+        request = urllib.request.Request(
+            self.endpoint, data=body, method="POST",
+            headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+    @staticmethod
+    def to_otlp(spans: List[Span]) -> Dict[str, Any]:
+        """Convert spans to an OTLP ExportTraceServiceRequest"""
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": SERVICE_NAME})},
+                "scopeSpans": [{
+                    "scope": {"name": SERVICE_NAME},
+                    "spans": [{
+                        "traceId": span.trace_id,
+                        "spanId": span.span_id,
+                        "parentSpanId": span.parent_id or "",
+                        "name": span.name,
+                        "kind": 1,  # SPAN_KIND_INTERNAL
+                        "startTimeUnixNano": str(span.start_time_ns),
+                        "endTimeUnixNano": str(span.end_time_ns),
+                        "attributes": _otlp_attributes(dict(span.attributes, **{"session.id": span.session_id})),
+                        "status": {"code": 2, "message": span.error or ""} if span.status == "error" else {"code": 1}
+                    } for span in spans]
+                }]
+            }]
+        }
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    converted = []
+    for key, value in attributes.items():
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            converted.append({"key": key, "value": {"boolValue": value}})
+        elif isinstance(value, int):
+            converted.append({"key": key, "value": {"intValue": str(value)}})
+        elif isinstance(value, float):
+            converted.append({"key": key, "value": {"doubleValue": value}})
+        else:
+            converted.append({"key": key, "value": {"stringValue": str(value)}})
+    return converted
+
+class Tracer:
+    """Creates spans and exports finished ones in batches from a background thread"""
+
+    def __init__(self, exporter: Optional[SpanExporter] = None, batch_size: int = 100,
+                 flush_interval: float = 1.0):
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        self.stats = {"finished": 0, "exported": 0, "export_errors": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    @contextmanager
+    def session(self, session_id: str):
+        """Correlate spans started in the enclosed block with a session"""
+        token = _current_session.set(session_id)
+        try:
+            yield
+        finally:
+            _current_session.reset(token)
+
+    def bind_session(self, session_id: str):
+        """Correlate the rest of the current task, and tasks it starts, with a session"""
+        _current_session.set(session_id)
+
+        # A root span started before the session id was known joins the session's trace
+        span = _current_span.get()
+        if span and span.parent_id is None and span.session_id is None:
+            span.session_id = session_id
+            span.trace_id = uuid.uuid5(_SESSION_NAMESPACE, session_id).hex
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any):
+        """Time the enclosed block as a child of the current span"""
+        if not self.enabled:
+            yield None
+            return
+
+        parent = _current_span.get()
+        session_id = _current_session.get()
+        if parent and parent.session_id == session_id:
+            trace_id = parent.trace_id
+        elif session_id:
+            trace_id = uuid.uuid5(_SESSION_NAMESPACE, session_id).hex
+        else:
+            trace_id = secrets.token_hex(16)
+
+        span = Span(
+            name=name,
+            trace_id=trace_id,
+            span_id=secrets.token_hex(8),
+            parent_id=parent.span_id if parent and parent.trace_id == trace_id else None,
+            session_id=session_id,
+            start_time_ns=time.time_ns(),
+            attributes={k: v for k, v in attributes.items() if v is not None}
+        )
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_time_ns = time.time_ns()
+            self._finish(span)
+
+    def _finish(self, span: Span):
+        self.stats["finished"] += 1
+        self._ensure_worker()
+        self._queue.put(span)
+
+    def _ensure_worker(self):
+        if self._worker and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if not (self._worker and self._worker.is_alive()):
+                self._worker = threading.Thread(target=self._export_loop, name="span-exporter", daemon=True)
+                self._worker.start()
+
+    def _export_loop(self):
+        batch: List[Span] = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0.01))
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, Span):
+                batch.append(item)
+            if not isinstance(item, Span) or len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._export(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+
+            # Flush and shutdown requests carry an event to signal completion
+            if isinstance(item, tuple):
+                command, done = item
+                done.set()
+                if command == "shutdown":
+                    return
+
+    def _export(self, batch: List[Span]):
+        if not batch or not self.exporter:
+            return
+        try:
+            self.exporter.export(batch)
+            self.stats["exported"] += len(batch)
+        except Exception as e:
+            self.stats["export_errors"] += 1
+            logger.warning(f"Failed to export {len(batch)} span(s): {e}")
+
+    def force_flush(self, timeout: float = 5.0) -> bool:
+        """Export all finished spans now"""
+        return self._send_command("flush", timeout)
+
+    def shutdown(self, timeout: float = 5.0):
+        """Export remaining spans and stop the export thread"""
+        self._send_command("shutdown", timeout)
+        if self.exporter:
+            self.exporter.shutdown()
+
+    def _send_command(self, command: str, timeout: float) -> bool:
+        if not (self._worker and self._worker.is_alive()):
+            return True
+        done = threading.Event()
+        self._queue.put((command, done))
+        return done.wait(timeout)
+
+def current_span() -> Optional[Span]:
+    """Get the active span of the current task"""
+    return _current_span.get()
+
+def current_session_id() -> Optional[str]:
+    """Get the session the current task is correlated with"""
+    return _current_session.get()
+
+def traced(name: Optional[str] = None, record_args: Sequence[str] = ()):
+    """
+    Decorator that runs an async function inside a span
+
+    Args:
+        name: Span name, defaults to the function's qualified name
+        record_args: Argument names whose values are recorded as span attributes
+    """
+    def decorator(func):
+        span_name = name or func.__qualname__
+        signature = inspect.signature(func) if record_args else None
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            attributes = {}
+            if signature and tracer.enabled:
+                arguments = signature.bind_partial(*args, **kwargs).arguments
+                attributes = {arg: arguments.get(arg) for arg in record_args}
+            with tracer.span(span_name, **attributes):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def create_exporter(kind: str = None) -> Optional[SpanExporter]:
+    """Create the span exporter selected in settings"""
+    kind = (kind or settings.TRACING_EXPORTER).lower()
+    if kind == "json":
+        return JsonFileSpanExporter(settings.TRACING_FILE)
+    if kind == "otlp":
+        return OTLPHttpSpanExporter(settings.TRACING_OTLP_ENDPOINT)
+    return None
+
+# Global tracer instance
+tracer = Tracer(create_exporter())
+
+atexit.register(tracer.shutdown)
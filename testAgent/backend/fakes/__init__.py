@@ -0,0 +1 @@
+# Local stand-ins for external systems used by test and benchmark scripts
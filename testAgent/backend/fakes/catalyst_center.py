@@ -0,0 +1,92 @@
+"""
+Fake Catalyst Center server - Serves the inventory endpoints used by ClusterInventoryService
+File: backend/fakes/catalyst_center.py
+"""
+
+import asyncio
+import base64
+import uuid
+from collections import Counter
+from typing import Dict, List, Any, Optional
+from aiohttp import web
+
+class FakeCatalystCenter:
+    """Local HTTP server that mimics the Catalyst Center auth and inventory APIs"""
+
+    def __init__(self, resources: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+                 latency: float = 0.0, username: str = "admin", password: str = "admin123"):
+        self.resources = resources or {
+            "fabrics": [],
+            "devices": [],
+            "areas": [],
+            "buildings": []
+        }
+        self.latency = latency
+        self.username = username
+        self.password = password
+        self.fail_requests = False
+        self.request_counts: Counter = Counter()
+        self._tokens = set()
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url: Optional[str] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start the server and return its base URL"""
+        app = web.Application()
+        app.router.add_post("/dna/system/api/v1/auth/token", self._handle_auth)
+        app.router.add_get("/dna/intent/api/v1/sda/fabricSites", self._handle_fabrics)
+        app.router.add_get("/dna/intent/api/v1/network-device", self._handle_devices)
+        app.router.add_get("/dna/intent/api/v1/site", self._handle_sites)
+
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+
+        bound_port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{bound_port}"
+        return self.base_url
+
+    async def stop(self):
+        """Stop the server"""
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle_auth(self, request: web.Request) -> web.Response:
+        self.request_counts["auth"] += 1
+        auth = request.headers.get("Authorization", "")
+        try:
+            username, password = base64.b64decode(auth.replace("Basic ", "")).decode().split(":", 1)
+        except Exception:
+            return web.json_response({"error": "missing credentials"}, status=401)
+
+        if (username, password) != (self.username, self.password):
+            return web.json_response({"error": "invalid credentials"}, status=401)
+
+        token = uuid.uuid4().hex
+        self._tokens.add(token)
+        return web.json_response({"Token": token})
+
+    async def _serve(self, request: web.Request, resource_type: str) -> web.Response:
+        self.request_counts[resource_type] += 1
+        if request.headers.get("X-Auth-Token") not in self._tokens:
+            return web.json_response({"error": "unauthorized"}, status=401)
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if self.fail_requests:
+            return web.json_response({"error": "internal error"}, status=500)
+
+        return web.json_response({"response": self.resources.get(resource_type, [])})
+
+    async def _handle_fabrics(self, request: web.Request) -> web.Response:
+        return await self._serve(request, "fabrics")
+
+    async def _handle_devices(self, request: web.Request) -> web.Response:
+        return await self._serve(request, "devices")
+
+    async def _handle_sites(self, request: web.Request) -> web.Response:
+        site_type = request.query.get("type", "area")
+        return await self._serve(request, "buildings" if site_type == "building" else "areas")
@@ -0,0 +1,174 @@
+"""
+Fake OpenAI server - Serves the Cisco IDP token and Azure OpenAI chat completion endpoints used by AzureOpenAIService
+File: backend/fakes/openai_server.py
+
+Point the backend at it with CISCO_IDP=<base_url>/oauth2/token and AZURE_OPENAI_ENDPOINT=<base_url>.
+Plain OpenAI clients can use <base_url>/v1/chat/completions.
+
+Usage: python -m fakes.openai_server [--port 8089] [--latency 2.0] [--error-rate 0.05]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Dict, List, Any, Optional
+from aiohttp import web
+
+# Returned for generation and repair prompts; passes the generator's validation and the type check
+SPEC_RESPONSE = """import { test, expect, Page } from '@playwright/test';
+
+test.describe('Generated Tests', () => {
+  test('opens the cluster', async ({ page }) => {
+    await page.goto(process.env.CLUSTER_URL || '/');
+    await page.waitForLoadState('networkidle');
+    await expect(page).toHaveTitle(/Catalyst Center/);
+  });
+});
+"""
+
+class FakeOpenAIServer:
+    """Local HTTP server with configurable latency and failure rates standing in for the LLM endpoint"""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.request_counts: Counter = Counter()
+        self.latencies: List[float] = []
+        self._random = random.Random(seed)
+        self._runner: Optional[web.AppRunner] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self.base_url: Optional[str] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start the server and return its base URL"""
+        app = web.Application()
+        app.router.add_post("/oauth2/token", self._handle_token)
+        app.router.add_post("/openai/deployments/{deployment}/chat/completions", self._handle_completion)
+        app.router.add_post("/v1/chat/completions", self._handle_completion)
+
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+
+        bound_port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{bound_port}"
+        return self.base_url
+
+    async def stop(self):
+        """Stop the server"""
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def start_in_thread(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start the server on its own event loop; needed when the client blocks the caller's loop"""
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="fake-openai", daemon=True)
+        self._thread.start()
+        return asyncio.run_coroutine_threadsafe(self.start(host, port), self._loop).result()
+
+    def stop_thread(self):
+        """Stop a server started with start_in_thread"""
+        if self._loop:
+            asyncio.run_coroutine_threadsafe(self.stop(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+            self._loop = None
+
+    async def _handle_token(self, request: web.Request) -> web.Response:
+        self.request_counts["token"] += 1
+        if not request.headers.get("Authorization", "").startswith("Basic "):
+            return web.json_response({"error": "invalid_client"}, status=401)
+        return web.json_response({"access_token": uuid.uuid4().hex, "token_type": "Bearer", "expires_in": 3600})
+
+    async def _handle_completion(self, request: web.Request) -> web.Response:
+        started = time.monotonic()
+        body = await request.json()
+        delay = max(self.latency + self._random.uniform(-self.jitter, self.jitter), 0)
+        if delay:
+            await asyncio.sleep(delay)
+
+        roll = self._random.random()
+        if roll < self.rate_limit_rate:
+            self.request_counts["rate_limited"] += 1
+            return web.json_response(
+                {"error": {"code": "429", "message": "Too Many Requests"}}, status=429, headers={"Retry-After": "1"}
+            )
+        if roll < self.rate_limit_rate + self.error_rate:
+            self.request_counts["error"] += 1
+            return web.json_response({"error": {"code": "500", "message": "Internal server error"}}, status=500)
+
+        self.request_counts["completion"] += 1
+        self.latencies.append(time.monotonic() - started)
+        return web.json_response(self._completion(body))
+
+    def _completion(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        prompt = "\n".join(str(message.get("content", "")) for message in body.get("messages", []))
+        content = self._answer(prompt)
+        prompt_tokens = len(prompt) // 4 + 1
+        completion_tokens = len(content) // 4 + 1
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake-model"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }
+
+    @staticmethod
+    def _answer(prompt: str) -> str:
+        """Answer connection checks, step snippet requests and spec generation like the real model"""
+        if "Respond with 'OK'" in prompt:
+            return "OK"
+        if "JSON object mapping each step number" in prompt:
+            steps = re.findall(r"^(\d+)\. ", prompt, re.MULTILINE)
+            return json.dumps({number: "await page.waitForLoadState('networkidle');" for number in steps})
+        return f"```typescript\n{SPEC_RESPONSE}```"
+
+    def get_statistics(self) -> Dict[str, Any]:
+        return dict(self.request_counts)
+
+async def serve(args: argparse.Namespace):
+    server = FakeOpenAIServer(args.latency, args.jitter, args.error_rate, args.rate_limit_rate, args.seed)
+    base_url = await server.start(args.host, args.port)
+    print(f"Fake OpenAI server on {base_url}")
+    print(f"  CISCO_IDP={base_url}/oauth2/token AZURE_OPENAI_ENDPOINT={base_url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the Azure OpenAI endpoint")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds per completion")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Uniform +/- seconds around the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of completions answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of completions answered with 429")
+    parser.add_argument("--seed", type=int, default=None)
+    try:
+        asyncio.run(serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
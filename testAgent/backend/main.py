@@ -4,10 +4,12 @@ File: backend/main.py
 """
 
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Dict, List, Optional, Any
 import asyncio
+import time
 import uuid
 import logging
 from datetime import datetime
@@ -19,8 +21,16 @@ from services.template_manager import TemplateManagerService
 from services.playwright_generator import PlaywrightGeneratorService
 from services.test_executor import TestExecutorService
 from services.session_manager import SessionManagerService
+from services.execution_pipeline import (
+    run_session_with_budget, build_interrupted_results, session_outcome, CANCEL_REASON
+)
+from services.job_queue import job_queue, QueueFullError, DEFAULT_JOB_PRIORITY
+from services.broker import create_broker
+from services.execution_workers import BrokerResultConsumer
 from core.config import settings
 from core.logging_config import setup_logging
+from core.metrics import metrics, track_stage, SESSION_DURATION
+from core.tracing import tracer, traced
 
 # Import API routes
 from api.routes import clarification
@@ -55,6 +65,10 @@ playwright_generator = PlaywrightGeneratorService()
 test_executor = TestExecutorService()
 session_manager = SessionManagerService()
 
+# In worker mode sessions are executed by worker.py processes fed through the broker
+execution_broker = create_broker() if settings.EXECUTION_MODE == "worker" else None
+broker_consumer = BrokerResultConsumer(execution_broker, session_manager) if execution_broker else None
+
 # Pydantic models for API
 class ParseInstructionRequest(BaseModel):
     prompt: str
@@ -64,6 +78,8 @@ class ParseInstructionRequest(BaseModel):
 
 class ExecuteTestRequest(BaseModel):
     session_id: str
+    priority: str = DEFAULT_JOB_PRIORITY  # high, normal or low
+    budget_seconds: Optional[float] = Field(None, gt=0)  # Wall-clock limit, defaults to EXECUTION_BUDGET_SECONDS
 
 class SessionStatusRequest(BaseModel):
     session_id: str
@@ -74,6 +90,7 @@ class AnalyzeInstructionRequest(BaseModel):
 # API Endpoints
 
 @app.post("/parse_test_instructions")
+@traced("POST /parse_test_instructions")
 async def parse_test_instructions(request: ParseInstructionRequest):
     """
     Parse natural language instruction and prepare test session (with clarification support)
@@ -83,6 +100,7 @@ async def parse_test_instructions(request: ParseInstructionRequest):
         
         # Generate unique session ID
         session_id = str(uuid.uuid4())
+        tracer.bind_session(session_id)
         
         # Parse the instruction to identify workflows
         parsed_result = await instruction_parser.parse_instruction(
@@ -163,10 +181,13 @@ async def parse_test_instructions(request: ParseInstructionRequest):
         raise HTTPException(status_code=400, detail=f"Failed to parse instructions: {str(e)}")
 
 @app.post("/execute_test_plan")
+@traced("POST /execute_test_plan")
 async def execute_test_plan(request: ExecuteTestRequest):
     """
     Execute the test plan for a session (supports post-clarification execution)
     """
+    tracer.bind_session(request.session_id)
+    
     try:
         logger.info(f"Executing test plan for session: {request.session_id}")
         
@@ -195,25 +216,106 @@ async def execute_test_plan(request: ExecuteTestRequest):
                 detail="Session has no workflows to execute. Session may need clarification or re-parsing."
             )
         
-        # Update session status
-        await session_manager.update_session_status(request.session_id, "generating")
-        
-        # Start async execution (don't wait for completion)
-        asyncio.create_task(execute_test_workflow(request.session_id))
+        # Queue the execution; workers bound how many sessions run at once
+        budget = min(request.budget_seconds or settings.EXECUTION_BUDGET_SECONDS, settings.EXECUTION_BUDGET_MAX_SECONDS)
+        previous_status = session.status
+        await session_manager.update_session_status(request.session_id, "queued")
+        try:
+            if execution_broker:
+                queue_position = await execution_broker.enqueue(
+                    request.session_id,
+                    {
+                        "session_id": request.session_id,
+                        "workflows": session.workflows,
+                        "parameters": session.parameters,
+                        "cluster_config": session.cluster_config,
+                        "budget": budget
+                    },
+                    priority=request.priority
+                )
+                estimated_wait = await execution_broker.estimate_wait(queue_position)
+            else:
+                queue_position = await job_queue.submit(
+                    request.session_id,
+                    lambda: execute_test_workflow(request.session_id, budget),
+                    priority=request.priority
+                )
+                estimated_wait = job_queue.estimate_wait(queue_position)
+        except QueueFullError as e:
+            await session_manager.update_session_status(request.session_id, previous_status)
+            raise HTTPException(
+                status_code=429,
+                detail=f"Too many queued test executions, retry in {e.retry_after}s",
+                headers={"Retry-After": str(e.retry_after)}
+            )
+        except ValueError as e:
+            await session_manager.update_session_status(request.session_id, previous_status)
+            raise HTTPException(status_code=400, detail=str(e))
         
         return {
             "session_id": request.session_id,
-            "status": "started",
+            "status": "queued",
+            "queue_position": queue_position,
+            "estimated_wait": estimated_wait,
+            "budget_seconds": budget,
             "workflows_count": len(session.workflows),
             "estimated_duration": await workflow_manager.estimate_remaining_time([], session.workflows),
-            "message": f"Test execution started for {len(session.workflows)} workflows"
+            "message": f"Test execution queued for {len(session.workflows)} workflows"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error executing test plan: {str(e)}")
         await session_manager.update_session_status(request.session_id, "failed", str(e))
         raise HTTPException(status_code=500, detail=f"Failed to execute test plan: {str(e)}")
 
+@app.post("/cancel_session")
+@traced("POST /cancel_session")
+async def cancel_session(request: SessionStatusRequest):
+    """
+    Cancel a queued or running test execution, skipping its unfinished workflows
+    """
+    tracer.bind_session(request.session_id)
+    
+    try:
+        session = await session_manager.get_session(request.session_id)
+        if not session:
+            raise HTTPException(status_code=404, detail="Session not found")
+        
+        if execution_broker:
+            cancelled = await execution_broker.cancel(request.session_id)
+        else:
+            cancelled = await job_queue.cancel(request.session_id)
+        
+        if not cancelled:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Session has no queued or running execution. Current status: {session.status}"
+            )
+        
+        if cancelled == "queued":
+            await session_manager.update_session_status(request.session_id, "cancelled", CANCEL_REASON)
+            await session_manager.store_execution_results(request.session_id, build_interrupted_results(
+                request.session_id, session.workflows, None, CANCEL_REASON
+            ))
+        
+        # A worker process stops a running session on its next heartbeat
+        status = "cancelling" if execution_broker and cancelled == "running" else session.status
+        
+        return {
+            "session_id": request.session_id,
+            "status": status,
+            "cancelled_while": cancelled,
+            "message": f"Test execution {'cancelled' if status == 'cancelled' else 'is being cancelled'}"
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error cancelling session: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to cancel session: {str(e)}")
+
 @app.post("/get_session_status")
 async def get_session_status(request: SessionStatusRequest):
     """
@@ -227,6 +329,8 @@ async def get_session_status(request: SessionStatusRequest):
         return {
             "session_id": request.session_id,
             "status": session.status,
+            "queue_position": (await execution_broker.get_position(request.session_id) if execution_broker
+                               else job_queue.get_position(request.session_id)),
             "workflows": session.workflows,
             "current_workflow": session.current_workflow,
             "progress": session.progress,
@@ -391,10 +495,19 @@ async def test_browser_automation():
         raise HTTPException(status_code=500, detail=f"Browser automation test failed: {str(e)}")
 
 # Background task for test execution
-async def execute_test_workflow(session_id: str):
+@traced(record_args=("session_id",))
+async def execute_test_workflow(session_id: str, budget: Optional[float] = None):
     """
     Background task to execute the complete test workflow
+    
+    Args:
+        session_id: Session identifier
+        budget: Wall-clock limit in seconds, defaults to EXECUTION_BUDGET_SECONDS
     """
+    start_time = time.perf_counter()
+    status = "failed"
+    session = None
+    
     try:
         logger.info(f"Starting workflow execution for session: {session_id}")
         
@@ -403,61 +516,54 @@ async def execute_test_workflow(session_id: str):
             logger.error(f"Session {session_id} not found")
             return
         
-        # Step 1: Load TDD templates for each workflow
-        await session_manager.update_session_status(session_id, "loading_templates")
-        templates = {}
-        
-        for workflow_name in session.workflows:
-            logger.info(f"Loading template for workflow: {workflow_name}")
-            template_content = await template_manager.load_tdd_template(workflow_name)
-            templates[workflow_name] = template_content
-        
-        # Step 2: Generate Playwright tests
-        await session_manager.update_session_status(session_id, "generating")
-        playwright_tests = {}
-        
-        for workflow_name, template_content in templates.items():
-            logger.info(f"Generating Playwright test for workflow: {workflow_name}")
-            
-            # Customize template with parameters
-            customized_template = await template_manager.customize_template(
-                template_content, session.parameters
-            )
-            
-            # Generate Playwright code using Azure OpenAI
-            playwright_code = await playwright_generator.generate_playwright_test(
-                workflow_name=workflow_name,
-                tdd_template=customized_template,
-                cluster_config=session.cluster_config
-            )
-            
-            playwright_tests[workflow_name] = playwright_code
-        
-        # Step 3: Execute Playwright tests
-        await session_manager.update_session_status(session_id, "executing")
+        async def report_status(status: str, error_message: Optional[str] = None):
+            await session_manager.update_session_status(session_id, status, error_message)
         
-        execution_results = await test_executor.execute_tests(
-            session_id=session_id,
-            playwright_tests=playwright_tests,
-            cluster_config=session.cluster_config
+        # Steps 1-3: Load templates, generate and execute Playwright tests within the budget
+        execution_results = await run_session_with_budget(
+            session_id, session.workflows, session.parameters, session.cluster_config,
+            template_manager, playwright_generator, test_executor, report_status,
+            timeout=budget or settings.EXECUTION_BUDGET_SECONDS
         )
         
         # Step 4: Process results and update session
-        if execution_results.get("success", False):
-            await session_manager.update_session_status(session_id, "completed")
-        else:
-            await session_manager.update_session_status(
-                session_id, "failed", execution_results.get("error_message", "Test execution failed")
-            )
-        
-        # Store execution results
-        await session_manager.store_execution_results(session_id, execution_results)
+        with track_stage("result_storage"):
+            status = session_outcome(execution_results)
+            if status == "completed":
+                await session_manager.update_session_status(session_id, "completed")
+            else:
+                await session_manager.update_session_status(
+                    session_id, status, execution_results.get("error_message", "Test execution failed")
+                )
+            
+            # Store execution results
+            await session_manager.store_execution_results(session_id, execution_results)
         
         logger.info(f"Workflow execution completed for session: {session_id}")
         
+    except asyncio.CancelledError:
+        # Cancelled through /cancel_session; the running Playwright process group has been stopped
+        status = "cancelled"
+        if session:
+            await session_manager.update_session_status(session_id, "cancelled", CANCEL_REASON)
+            await session_manager.store_execution_results(session_id, build_interrupted_results(
+                session_id, session.workflows, test_executor.take_interrupted_results(session_id), CANCEL_REASON
+            ))
+        raise
+        
     except Exception as e:
         logger.error(f"Error in workflow execution for session {session_id}: {str(e)}")
         await session_manager.update_session_status(session_id, "failed", str(e))
+    
+    finally:
+        SESSION_DURATION.observe(time.perf_counter() - start_time, status=status)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Pipeline stage latencies, LLM usage and test outcomes in Prometheus text format
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 # Health check endpoint
 @app.get("/health")
@@ -775,6 +881,12 @@ async def startup_event():
     await template_manager.initialize()
     await playwright_generator.initialize()  # Now includes Azure OpenAI
     await test_executor.initialize()
+    await job_queue.start()
+    if broker_consumer:
+        await broker_consumer.start()
+    
+    # Periodically remove old test outputs, never those of live sessions
+    test_executor.artifact_manager.start(lambda: list(session_manager.sessions.keys()))
     
     # Test Azure OpenAI connection on startup
     try:
@@ -801,6 +913,27 @@ async def shutdown_event():
     # Cleanup resources
     await session_manager.cleanup_expired_sessions()
     
+    # Stop artifact sweeps and finish pending report compression
+    try:
+        await test_executor.artifact_manager.cleanup()
+    except Exception as e:
+        logger.warning(f"Error cleaning up artifact manager: {e}")
+    
+    # Stop queued and running test executions
+    await job_queue.stop()
+    if broker_consumer:
+        await broker_consumer.stop()
+    
+    # Export remaining trace spans
+    tracer.shutdown()
+    
+    # Cleanup cluster inventory connections
+    try:
+        from services.cluster_inventory import cluster_inventory_service
+        await cluster_inventory_service.cleanup()
+    except Exception as e:
+        logger.warning(f"Error cleaning up cluster inventory service: {e}")
+    
     # Cleanup Azure OpenAI service
     try:
         from services.azure_openai_service import azure_openai_service
@@ -817,5 +950,6 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=True,
+        reload_excludes=[f"{settings.TEST_OUTPUT_DIR}/*"],
         log_level="info"
     )
\ No newline at end of file
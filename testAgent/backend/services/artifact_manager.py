@@ -0,0 +1,262 @@
+"""
+Artifact Manager Service - Keeps test output disk usage bounded
+File: backend/services/artifact_manager.py
+"""
+
+import logging
+import asyncio
+import os
+import shutil
+import subprocess
+import time
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Callable, Iterable
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+# Marks session directories the executor created; sweeps never touch anything else
+SESSION_MARKER = ".artifact-session"
+
+# Files that make up a run summary and are never evicted by size budgets
+SUMMARY_FILES = {"results.json", SESSION_MARKER}
+SUMMARY_SUFFIXES = {".ts"}
+
+# Heavy per-run outputs written by the Playwright config
+RESULTS_DIR = "test-results"
+HTML_REPORT_DIR = "html-report"
+
+class ArtifactManagerService:
+    """Service for pruning, compressing and evicting test output artifacts"""
+
+    def __init__(self, output_dir: Path, retention_hours: float = None,
+                 session_budget_mb: float = None, total_budget_mb: float = None,
+                 keep_passed_artifacts: bool = None):
+        self.output_dir = Path(output_dir)
+        self.retention_seconds = (retention_hours if retention_hours is not None else settings.ARTIFACT_RETENTION_HOURS) * 3600
+        self.session_budget = (session_budget_mb if session_budget_mb is not None else settings.ARTIFACT_SESSION_BUDGET_MB) * MB
+        self.total_budget = (total_budget_mb if total_budget_mb is not None else settings.ARTIFACT_TOTAL_BUDGET_MB) * MB
+        self.keep_passed_artifacts = settings.ARTIFACT_KEEP_PASSED if keep_passed_artifacts is None else keep_passed_artifacts
+
+        # Background compressions still running, with the report directory each one archives
+        self._pending: Dict[asyncio.Task, Path] = {}
+        self._sweeper: Optional[asyncio.Task] = None
+
+        self.stats = {"pruned_runs": 0, "compressed_reports": 0, "evicted_files": 0,
+                      "evicted_sessions": 0, "freed_bytes": 0}
+
+    def mark_session(self, session_dir: Path):
+        """Mark a session directory as created by the executor, so sweeps may remove it"""
+        (Path(session_dir) / SESSION_MARKER).touch()
+
+    async def finalize_run(self, run_output_dir: Path, passed: bool) -> bool:
+        """
+        Reduce a finished run to what is worth keeping
+
+        Args:
+            run_output_dir: Output directory of the run
+            passed: Whether the run passed
+
+        Returns:
+            True if the run's artifacts were removed and only its summary kept
+        """
+        if passed and not self.keep_passed_artifacts:
+            freed = await asyncio.to_thread(self._remove_paths, [
+                run_output_dir / RESULTS_DIR, run_output_dir / HTML_REPORT_DIR
+            ])
+            self.stats["pruned_runs"] += 1
+            self.stats["freed_bytes"] += freed
+            return True
+
+        # Failed runs keep their artifacts, the html report is archived off the request path
+        report_dir = run_output_dir / HTML_REPORT_DIR
+        if report_dir.is_dir():
+            task = asyncio.create_task(self._compress_report(report_dir))
+            self._pending[task] = report_dir
+            task.add_done_callback(lambda done: self._pending.pop(done, None))
+        return False
+
+    async def _compress_report(self, report_dir: Path):
+        """Replace an html report directory with a zip archive"""
+        try:
+            freed = await asyncio.to_thread(self._zip_directory, report_dir)
+            self.stats["compressed_reports"] += 1
+            self.stats["freed_bytes"] += freed
+        except Exception as e:
+            logger.warning(f"Failed to compress {report_dir}: {e}")
+
+    async def wait_for_pending(self):
+        """Wait for background compressions to finish"""
+        if self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+
+    async def enforce_session_budget(self, session_dir: Path) -> int:
+        """
+        Evict the oldest artifacts of a session until it fits its budget
+
+        Summaries and spec files are kept regardless of the budget.
+
+        Returns:
+            Number of bytes freed
+        """
+        # Let the session's reports finish zipping so eviction doesn't race the archiver
+        session_dir = Path(session_dir)
+        compressing = [task for task, report_dir in self._pending.items() if session_dir in report_dir.parents]
+        if compressing:
+            await asyncio.gather(*compressing, return_exceptions=True)
+        freed = await asyncio.to_thread(self._evict_oldest_files, session_dir, self.session_budget)
+        self.stats["freed_bytes"] += freed
+        return freed
+
+    async def sweep(self, active_sessions: Iterable[str] = ()) -> Dict[str, Any]:
+        """
+        Remove expired sessions, then the oldest sessions while over the global budget
+
+        Only marked session directories are removed, and none with files tracked by git,
+        such as the sample sessions in the repository.
+
+        Args:
+            active_sessions: Session ids whose outputs must not be removed
+
+        Returns:
+            Summary of what was removed
+        """
+        removed = await asyncio.to_thread(self._sweep, set(active_sessions))
+        self.stats["evicted_sessions"] += len(removed["sessions"])
+        self.stats["freed_bytes"] += removed["freed_bytes"]
+        if removed["sessions"]:
+            logger.info(f"Removed {len(removed['sessions'])} session output dir(s), freed {removed['freed_bytes'] / MB:.1f} MB")
+        return removed
+
+    def start(self, active_sessions: Callable[[], Iterable[str]], interval: float = None):
+        """Start periodic sweeps in the background"""
+        if self._sweeper and not self._sweeper.done():
+            return
+        interval = interval or settings.ARTIFACT_SWEEP_INTERVAL
+        self._sweeper = asyncio.create_task(self._sweep_periodically(active_sessions, interval))
+
+    async def _sweep_periodically(self, active_sessions: Callable[[], Iterable[str]], interval: float):
+        while True:
+            try:
+                await self.sweep(active_sessions())
+            except Exception as e:
+                logger.warning(f"Artifact sweep failed: {e}")
+            await asyncio.sleep(interval)
+
+    async def cleanup(self):
+        """Stop the sweeper and wait for pending compressions"""
+        if self._sweeper:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+        await self.wait_for_pending()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get artifact lifecycle statistics"""
+        return {
+            **self.stats,
+            "pending_compressions": len(self._pending),
+            "session_budget_mb": self.session_budget / MB,
+            "total_budget_mb": self.total_budget / MB,
+            "retention_hours": self.retention_seconds / 3600
+        }
+
+    # Blocking filesystem helpers, run in a worker thread
+
+    def _sweep(self, active_sessions: set) -> Dict[str, Any]:
+        now = time.time()
+        tracked = self._tracked_entries()
+        sessions = []
+        for entry in os.scandir(self.output_dir):
+            # Dot directories hold shared state such as configs and auth
+            if (entry.is_dir() and not entry.name.startswith(".") and entry.name not in active_sessions
+                    and entry.name not in tracked and os.path.exists(os.path.join(entry.path, SESSION_MARKER))):
+                size, newest = self._usage(Path(entry.path))
+                sessions.append((newest, size, Path(entry.path)))
+
+        removed = {"sessions": [], "freed_bytes": 0}
+        total = sum(size for _, size, _ in sessions)
+        for newest, size, path in sorted(sessions, key=lambda s: s[0]):
+            if now - newest <= self.retention_seconds and total <= self.total_budget:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            removed["sessions"].append(path.name)
+            removed["freed_bytes"] += size
+            total -= size
+        return removed
+
+    def _tracked_entries(self) -> set:
+        """Names of the output directory's entries holding files tracked by git"""
+        try:
+            result = subprocess.run(["git", "ls-files", "-z", "."], cwd=self.output_dir,
+                                    capture_output=True, timeout=30)
+        except (OSError, subprocess.SubprocessError):
+            return set()
+        if result.returncode != 0:
+            # Not a git checkout
+            return set()
+        paths = result.stdout.decode("utf-8", errors="replace").split("\0")
+        return {path.split("/", 1)[0] for path in paths if path}
+
+    def _evict_oldest_files(self, root: Path, budget: float) -> int:
+        files = []
+        total = 0
+        for path in root.rglob("*"):
+            if path.is_file():
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    # Removed since the walk listed it
+                    continue
+                total += stat.st_size
+                if path.name not in SUMMARY_FILES and path.suffix not in SUMMARY_SUFFIXES:
+                    files.append((stat.st_mtime, stat.st_size, path))
+
+        freed = 0
+        for _, size, path in sorted(files, key=lambda f: f[0]):
+            if total - freed <= budget:
+                break
+            path.unlink(missing_ok=True)
+            freed += size
+            self.stats["evicted_files"] += 1
+        return freed
+
+    def _zip_directory(self, directory: Path) -> int:
+        size_before, _ = self._usage(directory)
+        archive = directory.with_suffix(".zip")
+        tmp_archive = directory.with_name(f"{directory.name}.zip.tmp")
+        with zipfile.ZipFile(tmp_archive, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for path in directory.rglob("*"):
+                if path.is_file():
+                    zf.write(path, path.relative_to(directory))
+        os.replace(tmp_archive, archive)
+        shutil.rmtree(directory, ignore_errors=True)
+        return max(size_before - archive.stat().st_size, 0)
+
+    def _remove_paths(self, paths: List[Path]) -> int:
+        freed = 0
+        for path in paths:
+            if path.exists():
+                freed += self._usage(path)[0]
+                shutil.rmtree(path, ignore_errors=True)
+        return freed
+
+    def _usage(self, root: Path):
+        """Get total size and newest modification time under a directory"""
+        size = 0
+        newest = root.stat().st_mtime
+        for path in root.rglob("*"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            newest = max(newest, stat.st_mtime)
+            if path.is_file():
+                size += stat.st_size
+        return size, newest
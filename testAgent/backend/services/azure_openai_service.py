@@ -7,13 +7,24 @@ import logging
 import asyncio
 import json
 import base64
+import hashlib
+import time
 import requests
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
 import aiohttp
 from langchain_openai import AzureChatOpenAI
 from langchain.schema import HumanMessage, SystemMessage
 from core.config import settings
+from core.metrics import track_stage, LLM_REQUESTS, LLM_TOKENS, LLM_PROMPT_TOKENS
+from core.tracing import traced, current_span
+from services.prompt_builder import PlaywrightPromptBuilder, count_tokens, current_token_ledger, load_tokenizer
+from services.tdd_compiler import fixtures_api
+from services.model_router import ModelRouter, ModelRoute
+from services.llm_resilience import (
+    CircuitBreaker, CircuitOpenError, AdaptiveConcurrencyLimiter, is_rate_limited, is_timeout, retry_after,
+    backoff_delay
+)
 
 logger = logging.getLogger(__name__)
 
@@ -41,14 +52,39 @@ class AzureOpenAIService:
         self.access_token: Optional[str] = None
         self.token_expires_at: Optional[datetime] = None
         self.llm: Optional[AzureChatOpenAI] = None
+        # Clients for model routes by deployment and timeout, created on first use with the current token
+        self._llms: Dict[Tuple[str, float], AzureChatOpenAI] = {}
+        self.model_router = ModelRouter()
+        self.model_routing = settings.MODEL_ROUTING
         
         # Session for async HTTP requests
         self._session: Optional[aiohttp.ClientSession] = None
+        
+        # In-flight completions keyed by prompt hash, shared by identical concurrent requests
+        self._inflight: Dict[str, asyncio.Task] = {}
+        
+        # Fail fast while the endpoint is down and back off concurrency when it is overloaded
+        self.backoff_base = settings.LLM_RETRY_BACKOFF_BASE
+        self.backoff_max = settings.LLM_RETRY_BACKOFF_MAX
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=settings.LLM_BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=settings.LLM_BREAKER_RESET_SECONDS,
+            name="Azure OpenAI"
+        )
+        self.concurrency_limiter = AdaptiveConcurrencyLimiter(
+            initial_limit=settings.LLM_MAX_CONCURRENCY,
+            min_limit=settings.LLM_MIN_CONCURRENCY,
+            max_limit=settings.LLM_MAX_CONCURRENCY,
+            latency_target=settings.LLM_LATENCY_TARGET_SECONDS
+        )
     
     async def initialize(self):
         """Initialize the Azure OpenAI service with Cisco IDP authentication"""
         logger.info("Initializing Azure OpenAI service with Cisco IDP authentication...")
         
+        # Off the event loop: tiktoken may download its encoding on first use
+        await load_tokenizer()
+        
         # Create HTTP session
         if not self._session:
             timeout = aiohttp.ClientTimeout(total=self.request_timeout)
@@ -63,6 +99,8 @@ class AzureOpenAIService:
     
     async def cleanup(self):
         """Cleanup resources"""
+        for task in list(self._inflight.values()):
+            task.cancel()
         if self._session and not self._session.closed:
             await self._session.close()
     
@@ -115,23 +153,44 @@ class AzureOpenAIService:
     def _initialize_llm(self):
         """Initialize the Azure OpenAI LLM with current access token"""
         try:
-            self.llm = AzureChatOpenAI(
-                deployment_name=self.model,
-                azure_endpoint=self.azure_endpoint,
-                api_key=self.access_token,
-                api_version=self.api_version,
-                temperature=self.temperature,
-                model_kwargs={
-                    "user": json.dumps({"appkey": self.app_key})
-                }
-            )
-            
+            self.llm = self._create_llm(self.model)
+            self._llms = {}
             logger.info(f"Initialized Azure OpenAI LLM with model: {self.model}")
             
         except Exception as e:
             logger.error(f"Failed to initialize Azure OpenAI LLM: {str(e)}")
             raise
     
+    def _create_llm(self, deployment: str, timeout: Optional[float] = None) -> AzureChatOpenAI:
+        """
+        Create a client for a deployment with the current access token
+
+        With a timeout, the HTTP request itself is abandoned once it expires and the
+        client doesn't retry on its own, so one attempt here is one request.
+        """
+        options = {"timeout": timeout, "max_retries": 0} if timeout else {}
+        return AzureChatOpenAI(
+            deployment_name=deployment,
+            azure_endpoint=self.azure_endpoint,
+            api_key=self.access_token,
+            api_version=self.api_version,
+            temperature=self.temperature,
+            model_kwargs={
+                "user": json.dumps({"appkey": self.app_key})
+            },
+            **options
+        )
+    
+    def _llm_for(self, route: Optional[ModelRoute]):
+        """The client for a route's deployment and timeout; unrouted requests use self.llm"""
+        if route is None:
+            return self.llm
+        key = (route.deployment, route.timeout)
+        if key not in self._llms:
+            self._llms[key] = self._create_llm(route.deployment, route.timeout)
+            logger.info(f"Initialized Azure OpenAI LLM with model: {route.deployment}, timeout {route.timeout:g}s")
+        return self._llms[key]
+    
     async def _ensure_valid_token(self):
         """Ensure we have a valid access token, refresh if needed"""
         if not self.access_token or not self.token_expires_at:
@@ -176,8 +235,10 @@ class AzureOpenAIService:
                 "authentication": "cisco_idp"
             }
     
+    @traced()
     async def generate_completion(self, prompt: str, max_tokens: int = 8000, 
-                                system_prompt: Optional[str] = None) -> Dict[str, Any]:
+                                system_prompt: Optional[str] = None,
+                                route: Optional[ModelRoute] = None) -> Dict[str, Any]:
         """
         Generate completion using Azure OpenAI with Cisco IDP authentication
         
@@ -185,13 +246,72 @@ class AzureOpenAIService:
             prompt: User prompt
             max_tokens: Maximum tokens to generate
             system_prompt: System prompt (optional)
+            route: Model route giving the deployment and per-attempt timeout (optional, default model without timeout)
             
         Returns:
             Dictionary with response content and metadata
         """
-        await self._ensure_valid_token()
+        prompt_tokens = count_tokens(prompt) + count_tokens(system_prompt or "")
+        span = current_span()
+        if span:
+            span.set_attribute("prompt_tokens", prompt_tokens)
+        
+        # Reject requests that could take the session over its token budget
+        ledger = current_token_ledger()
+        if ledger:
+            ledger.check(prompt_tokens + max_tokens)
+        
+        deployment = route.deployment if route else self.model
+        key = self._completion_key(deployment, prompt, max_tokens, system_prompt)
+        
+        # Concurrent identical requests share a single API call and its result or error
+        task = self._inflight.get(key)
+        joined = task is not None
+        if not joined:
+            LLM_PROMPT_TOKENS.observe(prompt_tokens)
+            task = asyncio.ensure_future(self._generate_completion(prompt, max_tokens, system_prompt, route))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            logger.info("Joining identical in-flight completion request")
+            LLM_REQUESTS.inc(status="coalesced")
+        
+        # Shield so a cancelled caller doesn't cancel the shared request
+        response = await asyncio.shield(task)
         
+        # Only the session that made the request is charged for it
+        if ledger and not joined:
+            ledger.record(response["usage"], prompt_tokens)
+        return dict(response)
+    
+    def _completion_key(self, deployment: str, prompt: str, max_tokens: int, system_prompt: Optional[str]) -> str:
+        """Hash everything that determines a completion into a coalescing key"""
+        request = json.dumps([deployment, self.temperature, max_tokens, system_prompt, prompt])
+        return hashlib.sha256(request.encode("utf-8")).hexdigest()
+    
+    async def _generate_completion(self, prompt: str, max_tokens: int, system_prompt: Optional[str],
+                                 route: Optional[ModelRoute] = None) -> Dict[str, Any]:
+        """Call the API with retries and token refresh, guarded by the circuit breaker"""
+        deployment = route.deployment if route else self.model
         for attempt in range(self.max_retries):
+            # Raises CircuitOpenError, so callers fall back at once while the endpoint is down
+            try:
+                self.circuit_breaker.before_request()
+            except CircuitOpenError:
+                LLM_REQUESTS.inc(status="rejected")
+                raise
+            
+            try:
+                await self._ensure_valid_token()
+            except Exception:
+                self.circuit_breaker.record_failure()
+                raise
+            
+            latency = None
+            rate_limited = overloaded = False
+            wait_hint = None
+            epoch = await self.concurrency_limiter.acquire()
+            started = time.monotonic()
             try:
                 # Prepare messages
                 messages = []
@@ -202,11 +322,16 @@ class AzureOpenAIService:
                 # Make the API call using LangChain
                 logger.info(f"Generating completion with Azure OpenAI (attempt {attempt + 1})")
                 
-                response = await asyncio.to_thread(
-                    self.llm.invoke,
-                    messages,
-                    max_tokens=max_tokens
-                )
+                with track_stage("llm_completion"):
+                    response = await asyncio.to_thread(
+                        self._llm_for(route).invoke,
+                        messages,
+                        max_tokens=max_tokens
+                    )
+                latency = time.monotonic() - started
+                self.circuit_breaker.record_success()
+                if route:
+                    self.model_router.record(route, latency, success=True)
                 
                 # Extract response content
                 content = response.content if hasattr(response, 'content') else str(response)
@@ -216,10 +341,16 @@ class AzureOpenAIService:
                 if hasattr(response, 'response_metadata'):
                     usage_info = response.response_metadata.get('token_usage', {})
                 
+                LLM_REQUESTS.inc(status="success")
+                for token_type in ("prompt_tokens", "completion_tokens"):
+                    if usage_info.get(token_type):
+                        LLM_TOKENS.inc(usage_info[token_type], type=token_type.replace("_tokens", ""))
+                
                 return {
                     "content": content,
                     "usage": usage_info,
-                    "model": self.model,
+                    "model": deployment,
+                    "route": route.name if route else None,
                     "timestamp": datetime.now().isoformat(),
                     "attempt": attempt + 1,
                     "authentication": "cisco_idp"
@@ -227,20 +358,43 @@ class AzureOpenAIService:
                 
             except Exception as e:
                 logger.warning(f"API call attempt {attempt + 1} failed: {str(e)}")
+                LLM_REQUESTS.inc(status="error")
+                self.circuit_breaker.record_failure()
+                if route:
+                    self.model_router.record(route, time.monotonic() - started, success=False)
+                rate_limited = is_rate_limited(e)
+                wait_hint = retry_after(e) if rate_limited else None
+                # A timeout is the slowest response of all, so it shrinks the concurrency limit too
+                overloaded = rate_limited or is_timeout(e)
                 
-                # If it's an authentication error, try to refresh token
+                # If it's an authentication error, drop the token so the next attempt refreshes it
                 if "unauthorized" in str(e).lower() or "invalid" in str(e).lower():
                     logger.info("Authentication error detected, refreshing token...")
-                    await self._authenticate_and_initialize_llm()
+                    self.access_token = None
                 
                 if attempt == self.max_retries - 1:
                     raise
-                
-                # Exponential backoff
-                await asyncio.sleep(2 ** attempt)
+            finally:
+                await self.concurrency_limiter.release(latency, overloaded=overloaded, epoch=epoch)
+            
+            # Jittered exponential backoff, at least as long as a rate limit asks for
+            delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+            if rate_limited:
+                delay = max(delay, min(wait_hint or 0, self.backoff_max))
+            await asyncio.sleep(delay)
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """Circuit breaker, concurrency limit and model route state"""
+        return {
+            "circuit_breaker": self.circuit_breaker.get_statistics(),
+            "concurrency": self.concurrency_limiter.get_statistics(),
+            "inflight_completions": len(self._inflight),
+            "routes": self.model_router.get_statistics()
+        }
     
     async def generate_playwright_test(self, tdd_template: str, cluster_config: Dict[str, Any],
-                                     workflow_name: str) -> str:
+                                     workflow_name: str, shared_fixtures: bool = False,
+                                     estimated_duration: Optional[int] = None) -> str:
         """
         Generate Playwright test using Azure OpenAI with Cisco IDP authentication
         
@@ -248,6 +402,8 @@ class AzureOpenAIService:
             tdd_template: TDD template content
             cluster_config: Cluster configuration
             workflow_name: Name of the workflow
+            shared_fixtures: Have the spec import login and navigation from the session's fixtures module
+            estimated_duration: Run time from the workflow metadata, for routing (optional)
             
         Returns:
             Generated Playwright TypeScript test code
@@ -258,38 +414,25 @@ class AzureOpenAIService:
             template_manager = TemplateManagerService()
             prompt_template = await template_manager.get_playwright_prompt_template()
             
-            # Format the prompt with actual values
-            formatted_prompt = prompt_template.format(
-                tdd_template=tdd_template,
-                cluster_url=cluster_config.get("url", ""),
-                username=cluster_config.get("username", ""),
-                password=cluster_config.get("password", "")
+            # Keep only the guidance this workflow needs, within the prompt token limit
+            built_prompt = PlaywrightPromptBuilder(prompt_template).build(
+                workflow_name, tdd_template, cluster_config, shared_fixtures=shared_fixtures
             )
             
-            system_prompt = f"""Create playwright test for the java-based enterprise microservices application built using Spring Framework with Maven for dependency management for the URL: https://172.27.248.237/
-Test specs should be created based on the *.tdd files in the folder: /Users/varsaraf/Downloads/Agent/TESTAGENT/backend/templates/*
-Read the creds.json for fetching the username and password for valid and invalid scenarios
-Use multiple selector strategies (aria-label, data-test-name, data-test-id, CSS selectors, text content) to robustly find elements
-Add appropriate timeout settings in the Playwright config:
-- Set global timeout to 600 seconds
-- Set action timeout to 300 seconds
-- Set navigation timeout to 300 seconds
-Implement retry logic for flaky actions like button clicks
-Add detailed logging throughout the test for better debugging
-Implement graceful error handling to make tests more resilient to timing issues
-Take screenshots at key points for debugging failures
-Configure Playwright to record videos and traces on test failures
-Generate the code and save it in /Users/varsaraf/Downloads/Agent/TESTAGENT/e2e folder.
-Put all the playwright configs in a separate folder/file in this Users/varsaraf/Downloads/Agent/TESTAGENT/e2e folder.
-Save the navigate, click, text input, and similar others in a separate utils file to reuse that as well in Users/varsaraf/Downloads/Agent/TESTAGENT/e2e folder.
-Save the login related code in a separate common folder in the /Users/varsaraf/evpn/evpn-fabric/e2e folder, so that it can be reused."""
+            # Small workflows get a faster deployment, a lower output limit and a shorter timeout
+            route = None
+            max_tokens = built_prompt.max_output_tokens
+            if self.model_routing:
+                route = self.model_router.select(tdd_template, workflow_name, estimated_duration)
+                max_tokens = min(max_tokens, route.max_tokens)
             
             logger.info(f"Generating Playwright test for {workflow_name} using Azure OpenAI with Cisco IDP...")
             
             response = await self.generate_completion(
-                prompt=formatted_prompt,
-                max_tokens=4000,
-                system_prompt=system_prompt
+                prompt=built_prompt.prompt,
+                max_tokens=max_tokens,
+                system_prompt=built_prompt.system_prompt,
+                route=route
             )
             
             playwright_code = response["content"]
@@ -305,6 +448,83 @@ Save the login related code in a separate common folder in the /Users/varsaraf/e
             logger.error(f"Failed to generate Playwright test for {workflow_name}: {str(e)}")
             raise
     
+    async def generate_step_snippets(self, steps: List[str], workflow_name: str) -> Dict[str, str]:
+        """
+        Generate Playwright statements for individual TDD steps in one request
+        
+        Args:
+            steps: Given/When/Then steps without cached snippets
+            workflow_name: Workflow the steps belong to, for context
+            
+        Returns:
+            Dictionary of {step: TypeScript statements}; steps the model skipped are absent
+        """
+        numbered_steps = "\n".join(f"{i}. {step}" for i, step in enumerate(steps, 1))
+        prompt = f"""Convert each numbered TDD step of the {workflow_name} workflow into Playwright TypeScript statements.
+
+The statements go inside an async Playwright test body where `page: Page` and `expect` are in scope.
+- Use process.env.CLUSTER_URL, process.env.CLUSTER_USERNAME and process.env.CLUSTER_PASSWORD instead of literal URLs or credentials
+- Prefer getByRole, getByText and aria-label locators, falling back to CSS selectors
+- Use expect assertions for Then steps and comments for Given steps that need no action
+- Do not declare tests, imports or helper functions; each step's statements must stand alone
+- These login and navigation helpers are available: {", ".join(fixtures_api().splitlines()[1:])}
+
+Respond with only a JSON object mapping each step number to a string of statements.
+
+Steps:
+{numbered_steps}"""
+        
+        response = await self.generate_completion(
+            prompt=prompt,
+            max_tokens=min(300 * len(steps) + 200, 4000),
+            system_prompt="You translate end-to-end test steps into Playwright TypeScript for Catalyst Center."
+        )
+        
+        # The object may be wrapped in a code fence or prose
+        content = response["content"]
+        snippets = json.loads(content[content.find("{"):content.rfind("}") + 1])
+        
+        return {
+            steps[int(number) - 1]: code.strip()
+            for number, code in snippets.items()
+            if str(number).isdigit() and 0 < int(number) <= len(steps) and isinstance(code, str) and code.strip()
+        }
+    
+    async def repair_playwright_test(self, workflow_name: str, playwright_code: str, errors: List[str]) -> str:
+        """
+        Fix the TypeScript compile errors of a generated Playwright spec
+        
+        Args:
+            workflow_name: Name of the workflow
+            playwright_code: Spec that failed the compile check
+            errors: Compiler diagnostics for the spec
+            
+        Returns:
+            Corrected Playwright TypeScript test code
+        """
+        numbered_code = "\n".join(f"{i:4d} | {line}" for i, line in enumerate(playwright_code.splitlines(), 1))
+        diagnostics = "\n".join(f"- {error}" for error in errors)
+        prompt = f"""The Playwright TypeScript spec for the {workflow_name} workflow fails to compile.
+
+Compiler errors:
+{diagnostics}
+
+Spec, with line numbers:
+{numbered_code}
+
+Fix only what the errors require and keep every test, step and locator otherwise unchanged.
+Respond with the complete corrected spec, without line numbers, in a typescript code block."""
+        
+        logger.info(f"Repairing {len(errors)} compile error(s) in the {workflow_name} spec")
+        
+        response = await self.generate_completion(
+            prompt=prompt,
+            max_tokens=min(count_tokens(playwright_code) + 500, settings.GENERATION_MAX_OUTPUT_TOKENS),
+            system_prompt="You fix TypeScript compile errors in Playwright tests for Catalyst Center."
+        )
+        
+        return self._clean_generated_code(response["content"])
+    
     def _clean_generated_code(self, code: str) -> str:
         """Clean up generated code"""
         # Remove markdown code block markers if present
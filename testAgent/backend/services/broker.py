@@ -0,0 +1,388 @@
+"""
+Job Broker - Hands session executions to worker processes and carries their results back
+File: backend/services/broker.py
+"""
+
+import logging
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Any, Optional
+from dataclasses import dataclass
+from urllib.parse import urlparse
+from core.config import settings
+from services.job_queue import JOB_PRIORITIES, DEFAULT_JOB_PRIORITY, QueueFullError
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class BrokerJob:
+    """A job claimed by a worker"""
+    job_id: int
+    session_id: str
+    payload: Dict[str, Any]
+    attempts: int
+
+@dataclass
+class BrokerEvent:
+    """A status or result update published by a worker"""
+    event_id: int
+    session_id: str
+    kind: str  # status, results
+    data: Dict[str, Any]
+
+class JobBroker(ABC):
+    """Interface for brokers between the API and execution workers"""
+
+    @abstractmethod
+    async def enqueue(self, session_id: str, payload: Dict[str, Any],
+                      priority: str = DEFAULT_JOB_PRIORITY) -> int:
+        """Queue a job, returning its position (1 being next)"""
+
+    @abstractmethod
+    async def claim(self, worker_id: str) -> Optional[BrokerJob]:
+        """Take the next queued job for a worker"""
+
+    @abstractmethod
+    async def heartbeat(self, job_id: int) -> bool:
+        """Extend a claimed job's lease, returning whether cancellation was requested"""
+
+    @abstractmethod
+    async def cancel(self, session_id: str) -> Optional[str]:
+        """
+        Cancel a session's job
+
+        A queued job is dropped; a running job is flagged for its worker to stop.
+
+        Returns:
+            "queued" or "running" for the state the job was cancelled in, None if there was no job
+        """
+
+    @abstractmethod
+    async def complete(self, job_id: int, status: str):
+        """Mark a claimed job as done, failed or cancelled"""
+
+    @abstractmethod
+    async def requeue_stale(self, lease_seconds: float) -> int:
+        """Return jobs whose worker stopped heartbeating to the queue"""
+
+    @abstractmethod
+    async def publish(self, session_id: str, kind: str, data: Dict[str, Any]):
+        """Publish a session update for the API"""
+
+    @abstractmethod
+    async def fetch_events(self, after_id: int, limit: int = 100) -> List[BrokerEvent]:
+        """Get updates published after the given event id"""
+
+    @abstractmethod
+    async def get_last_event_id(self) -> int:
+        """Get the id of the latest published update"""
+
+    @abstractmethod
+    async def get_position(self, session_id: str) -> Optional[int]:
+        """Get a session's queue position; 0 if running, None if unknown"""
+
+    @abstractmethod
+    async def estimate_wait(self, position: int) -> int:
+        """Estimate seconds until a job at the given position starts"""
+
+    @abstractmethod
+    async def get_statistics(self) -> Dict[str, Any]:
+        """Get job counts by status"""
+
+class SQLiteJobBroker(JobBroker):
+    """Broker backed by a local SQLite database shared by the API and workers on one host or volume"""
+
+    def __init__(self, path: str, max_depth: int = None, max_attempts: int = 3,
+                 event_retention: float = 3600):
+        self.path = path
+        self.max_depth = max_depth if max_depth is not None else settings.JOB_QUEUE_MAX_DEPTH
+        self.max_attempts = max_attempts
+        # Events and finished jobs are deleted after this many seconds
+        self.event_retention = event_retention
+
+        directory = os.path.dirname(os.path.abspath(path))
+        # Payloads include cluster credentials
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    priority INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    worker_id TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    enqueued_at REAL NOT NULL,
+                    claimed_at REAL,
+                    heartbeat_at REAL,
+                    finished_at REAL,
+                    cancel_requested INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, priority, id);
+                CREATE INDEX IF NOT EXISTS jobs_session ON jobs (session_id, status);
+                CREATE TABLE IF NOT EXISTS events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                );
+            """)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA busy_timeout=30000")
+        return conn
+
+    async def enqueue(self, session_id: str, payload: Dict[str, Any],
+                      priority: str = DEFAULT_JOB_PRIORITY) -> int:
+        if priority not in JOB_PRIORITIES:
+            raise ValueError(f"Unknown priority '{priority}', expected one of {list(JOB_PRIORITIES)}")
+        return await asyncio.to_thread(self._enqueue, session_id, json.dumps(payload, default=str),
+                                       JOB_PRIORITIES[priority])
+
+    def _enqueue(self, session_id: str, payload: str, priority: int) -> int:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            active = conn.execute(
+                "SELECT 1 FROM jobs WHERE session_id = ? AND status IN ('queued', 'running')", (session_id,)
+            ).fetchone()
+            if active:
+                conn.execute("ROLLBACK")
+                raise ValueError(f"Session {session_id} is already queued or running")
+
+            depth = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+            if depth >= self.max_depth:
+                conn.execute("ROLLBACK")
+                raise QueueFullError(depth, self._estimate_wait(conn, depth + 1))
+
+            cursor = conn.execute(
+                "INSERT INTO jobs (session_id, payload, priority, status, enqueued_at) VALUES (?, ?, ?, 'queued', ?)",
+                (session_id, payload, priority, time.time())
+            )
+            job_id = cursor.lastrowid
+            conn.execute("COMMIT")
+            return self._position(conn, job_id, priority)
+        finally:
+            conn.close()
+
+    def _position(self, conn: sqlite3.Connection, job_id: int, priority: int) -> int:
+        ahead = conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND (priority < ? OR (priority = ? AND id < ?))",
+            (priority, priority, job_id)
+        ).fetchone()[0]
+        return ahead + 1
+
+    def _estimate_wait(self, conn: sqlite3.Connection, position: int) -> int:
+        row = conn.execute("""
+            SELECT AVG(finished_at - claimed_at), COUNT(DISTINCT worker_id) FROM (
+                SELECT finished_at, claimed_at, worker_id FROM jobs
+                WHERE status IN ('done', 'failed') ORDER BY id DESC LIMIT 50
+            )
+        """).fetchone()
+        average = row[0] or 60.0
+        workers = max(row[1] or 1, 1)
+        return int(average * position / workers) + 1
+
+    async def claim(self, worker_id: str) -> Optional[BrokerJob]:
+        return await asyncio.to_thread(self._claim, worker_id)
+
+    def _claim(self, worker_id: str) -> Optional[BrokerJob]:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, session_id, payload, attempts FROM jobs WHERE status = 'queued' ORDER BY priority, id LIMIT 1"
+            ).fetchone()
+            if not row:
+                conn.execute("ROLLBACK")
+                return None
+            now = time.time()
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker_id = ?, attempts = attempts + 1, "
+                "claimed_at = ?, heartbeat_at = ? WHERE id = ?",
+                (worker_id, now, now, row[0])
+            )
+            conn.execute("COMMIT")
+            return BrokerJob(job_id=row[0], session_id=row[1], payload=json.loads(row[2]), attempts=row[3] + 1)
+        finally:
+            conn.close()
+
+    async def heartbeat(self, job_id: int) -> bool:
+        return await asyncio.to_thread(self._heartbeat, job_id)
+
+    def _heartbeat(self, job_id: int) -> bool:
+        conn = self._connect()
+        try:
+            conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = 'running'", (time.time(), job_id))
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            return bool(row and row[0])
+        finally:
+            conn.close()
+
+    async def cancel(self, session_id: str) -> Optional[str]:
+        return await asyncio.to_thread(self._cancel, session_id)
+
+    def _cancel(self, session_id: str) -> Optional[str]:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, status FROM jobs WHERE session_id = ? AND status IN ('queued', 'running')", (session_id,)
+            ).fetchone()
+            if not row:
+                conn.execute("ROLLBACK")
+                return None
+            if row[1] == "queued":
+                self._finish(conn, row[0], "cancelled")
+            else:
+                conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ?", (row[0],))
+            conn.execute("COMMIT")
+            return row[1]
+        finally:
+            conn.close()
+
+    async def complete(self, job_id: int, status: str):
+        await asyncio.to_thread(self._complete, job_id, status)
+
+    def _complete(self, job_id: int, status: str):
+        conn = self._connect()
+        try:
+            self._finish(conn, job_id, status)
+        finally:
+            conn.close()
+
+    def _finish(self, conn: sqlite3.Connection, job_id: int, status: str):
+        """Set a final status and drop the payload, which holds the cluster credentials"""
+        conn.execute("UPDATE jobs SET status = ?, finished_at = ?, payload = '{}' WHERE id = ?",
+                     (status, time.time(), job_id))
+
+    async def requeue_stale(self, lease_seconds: float) -> int:
+        return await asyncio.to_thread(self._requeue_stale, lease_seconds)
+
+    def _requeue_stale(self, lease_seconds: float) -> int:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            cutoff = time.time() - lease_seconds
+            stale = conn.execute(
+                "SELECT id, session_id, attempts, cancel_requested FROM jobs WHERE status = 'running' AND heartbeat_at < ?",
+                (cutoff,)
+            ).fetchall()
+            for job_id, session_id, attempts, cancel_requested in stale:
+                if cancel_requested:
+                    self._finish(conn, job_id, "cancelled")
+                    self._insert_event(conn, session_id, "status", {
+                        "status": "cancelled", "error_message": "Cancelled by user"
+                    })
+                elif attempts >= self.max_attempts:
+                    self._finish(conn, job_id, "failed")
+                    self._insert_event(conn, session_id, "status", {
+                        "status": "failed", "error_message": f"Execution worker lost {attempts} time(s)"
+                    })
+                else:
+                    conn.execute("UPDATE jobs SET status = 'queued', worker_id = NULL WHERE id = ?", (job_id,))
+
+            # Old events have been consumed by every API instance
+            conn.execute("DELETE FROM events WHERE created_at < ?", (time.time() - self.event_retention,))
+            conn.execute("DELETE FROM jobs WHERE finished_at < ? AND status NOT IN ('queued', 'running')",
+                          (time.time() - self.event_retention,))
+            conn.execute("COMMIT")
+            return len(stale)
+        finally:
+            conn.close()
+
+    async def publish(self, session_id: str, kind: str, data: Dict[str, Any]):
+        await asyncio.to_thread(self._publish, session_id, kind, data)
+
+    def _publish(self, session_id: str, kind: str, data: Dict[str, Any]):
+        conn = self._connect()
+        try:
+            self._insert_event(conn, session_id, kind, data)
+        finally:
+            conn.close()
+
+    def _insert_event(self, conn: sqlite3.Connection, session_id: str, kind: str, data: Dict[str, Any]):
+        conn.execute(
+            "INSERT INTO events (session_id, kind, data, created_at) VALUES (?, ?, ?, ?)",
+            (session_id, kind, json.dumps(data, default=str), time.time())
+        )
+
+    async def fetch_events(self, after_id: int, limit: int = 100) -> List[BrokerEvent]:
+        rows = await asyncio.to_thread(
+            self._query, "SELECT id, session_id, kind, data FROM events WHERE id > ? ORDER BY id LIMIT ?",
+            (after_id, limit)
+        )
+        return [BrokerEvent(event_id=r[0], session_id=r[1], kind=r[2], data=json.loads(r[3])) for r in rows]
+
+    async def get_last_event_id(self) -> int:
+        rows = await asyncio.to_thread(self._query, "SELECT COALESCE(MAX(id), 0) FROM events", ())
+        return rows[0][0]
+
+    async def get_position(self, session_id: str) -> Optional[int]:
+        return await asyncio.to_thread(self._get_position, session_id)
+
+    def _get_position(self, session_id: str) -> Optional[int]:
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT id, priority, status FROM jobs WHERE session_id = ? AND status IN ('queued', 'running') "
+                "ORDER BY id DESC LIMIT 1", (session_id,)
+            ).fetchone()
+            if not row:
+                return None
+            if row[2] == "running":
+                return 0
+            return self._position(conn, row[0], row[1])
+        finally:
+            conn.close()
+
+    async def estimate_wait(self, position: int) -> int:
+        return await asyncio.to_thread(self._estimate_wait_for, position)
+
+    def _estimate_wait_for(self, position: int) -> int:
+        conn = self._connect()
+        try:
+            return self._estimate_wait(conn, position)
+        finally:
+            conn.close()
+
+    async def get_statistics(self) -> Dict[str, Any]:
+        rows = await asyncio.to_thread(self._query, "SELECT status, COUNT(*) FROM jobs GROUP BY status", ())
+        return {"backend": "sqlite", "path": self.path, "max_depth": self.max_depth,
+                "jobs": {status: count for status, count in rows}}
+
+    def _query(self, sql: str, params: tuple) -> List[tuple]:
+        conn = self._connect()
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+def _create_sqlite_broker(url) -> JobBroker:
+    # sqlite:///relative/path.db or sqlite:////absolute/path.db
+    path = url.path[1:] if url.path.startswith("/") else url.path
+    return SQLiteJobBroker(path)
+
+# Broker implementations by URL scheme
+BROKER_BACKENDS = {
+    "sqlite": _create_sqlite_broker
+}
+
+def create_broker(broker_url: str = None) -> JobBroker:
+    """Create the broker for a URL such as sqlite:///test_outputs/.broker/jobs.db"""
+    url = urlparse(broker_url or settings.EXECUTION_BROKER_URL)
+    factory = BROKER_BACKENDS.get(url.scheme)
+    if not factory:
+        raise ValueError(f"Unsupported broker '{url.scheme}', expected one of {list(BROKER_BACKENDS)}")
+    return factory(url)
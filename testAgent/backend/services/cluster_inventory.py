@@ -0,0 +1,216 @@
+"""
+Cluster Inventory Service - Discovers existing resources on Catalyst Center clusters
+File: backend/services/cluster_inventory.py
+"""
+
+import logging
+import asyncio
+import hashlib
+import time
+from typing import Dict, List, Any, Optional, Tuple
+from dataclasses import dataclass
+import aiohttp
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Catalyst Center endpoints for each resource type
+RESOURCE_ENDPOINTS: Dict[str, Tuple[str, Dict[str, str]]] = {
+    "fabrics": ("/dna/intent/api/v1/sda/fabricSites", {}),
+    "devices": ("/dna/intent/api/v1/network-device", {}),
+    "areas": ("/dna/intent/api/v1/site", {"type": "area"}),
+    "buildings": ("/dna/intent/api/v1/site", {"type": "building"})
+}
+
+AUTH_ENDPOINT = "/dna/system/api/v1/auth/token"
+TOKEN_LIFETIME = 3000  # Catalyst Center tokens last one hour, refresh early
+
+ClusterKey = Tuple[str, str, str]
+CacheKey = Tuple[str, str, str, str]
+
+@dataclass
+class CachedResources:
+    """Resources fetched from a cluster with their expiry time"""
+    resources: List[Dict[str, Any]]
+    expires_at: float
+
+class ClusterInventoryService:
+    """Service for looking up fabrics, devices, areas and buildings on a cluster"""
+
+    def __init__(self, cache_ttl: int = None, error_ttl: int = None,
+                 request_timeout: int = None, max_connections: int = None,
+                 verify_ssl: bool = None):
+        self.cache_ttl = cache_ttl if cache_ttl is not None else settings.CLUSTER_INVENTORY_CACHE_TTL
+        self.error_ttl = error_ttl if error_ttl is not None else settings.CLUSTER_INVENTORY_ERROR_TTL
+        self.request_timeout = request_timeout or settings.CLUSTER_INVENTORY_TIMEOUT
+        self.max_connections = max_connections or settings.CLUSTER_INVENTORY_MAX_CONNECTIONS
+        self.verify_ssl = settings.CLUSTER_INVENTORY_VERIFY_SSL if verify_ssl is None else verify_ssl
+
+        # Per-cluster resource cache and in-flight lookups keyed by (cluster, user, password hash, resource type)
+        self._cache: Dict[CacheKey, CachedResources] = {}
+        self._inflight: Dict[CacheKey, asyncio.Task] = {}
+
+        # Auth tokens per (cluster, user, password hash) and locks so each cluster authenticates once
+        self._tokens: Dict[ClusterKey, Tuple[str, float]] = {}
+        self._token_locks: Dict[ClusterKey, asyncio.Lock] = {}
+
+        # Pooled HTTP session shared by all clusters
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        self.stats = {"cache_hits": 0, "coalesced": 0, "fetches": 0, "errors": 0}
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get the pooled HTTP session, creating it on first use"""
+        if not self._session or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                ssl=None if self.verify_ssl else False
+            )
+            timeout = aiohttp.ClientTimeout(total=self.request_timeout)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self._session
+
+    async def cleanup(self):
+        """Cleanup resources"""
+        for task in list(self._inflight.values()):
+            task.cancel()
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+    def _cluster_key(self, cluster_config: Dict[str, Any]) -> ClusterKey:
+        """Key a cluster by its credentials too, so a wrong password never gets another caller's token"""
+        cluster_url = (cluster_config.get("url") or "").rstrip("/")
+        password_hash = hashlib.sha256((cluster_config.get("password") or "").encode()).hexdigest()
+        return (cluster_url, cluster_config.get("username") or "", password_hash)
+
+    def _cache_key(self, cluster_config: Dict[str, Any], resource_type: str) -> CacheKey:
+        """Build the cache key for a cluster, credentials and resource type"""
+        return (*self._cluster_key(cluster_config), resource_type)
+
+    async def get_resources(self, cluster_config: Dict[str, Any], resource_type: str) -> List[Dict[str, Any]]:
+        """
+        Get existing resources of a type from a cluster
+
+        Args:
+            cluster_config: Cluster configuration (url, username, password)
+            resource_type: One of fabrics, devices, areas, buildings
+
+        Returns:
+            List of resources with id, name and status
+        """
+        if resource_type not in RESOURCE_ENDPOINTS:
+            raise ValueError(f"Unknown cluster resource type: {resource_type}")
+
+        key = self._cache_key(cluster_config, resource_type)
+
+        cached = self._cache.get(key)
+        if cached and cached.expires_at > time.monotonic():
+            self.stats["cache_hits"] += 1
+            return list(cached.resources)
+
+        # Concurrent lookups for the same key share a single request
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_and_cache(key, cluster_config, resource_type))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.stats["coalesced"] += 1
+
+        # Shield so a cancelled caller doesn't cancel the shared lookup
+        resources = await asyncio.shield(task)
+        return list(resources)
+
+    async def _fetch_and_cache(self, key: CacheKey, cluster_config: Dict[str, Any],
+                             resource_type: str) -> List[Dict[str, Any]]:
+        """Fetch resources from the cluster and store them in the cache"""
+        cluster_url = key[0]
+
+        try:
+            self.stats["fetches"] += 1
+            resources = await self._fetch_resources(cluster_url, cluster_config, resource_type)
+            ttl = self.cache_ttl
+            logger.info(f"Fetched {len(resources)} {resource_type} from cluster {cluster_url}")
+        except Exception as e:
+            # Remember the failure briefly so an unreachable cluster isn't retried per request
+            self.stats["errors"] += 1
+            logger.error(f"Failed to fetch {resource_type} from cluster {cluster_url}: {str(e)}")
+            resources = []
+            ttl = self.error_ttl
+
+        self._cache[key] = CachedResources(resources=resources, expires_at=time.monotonic() + ttl)
+        return resources
+
+    async def _fetch_resources(self, cluster_url: str, cluster_config: Dict[str, Any],
+                             resource_type: str) -> List[Dict[str, Any]]:
+        """Call the cluster API for a resource type"""
+        path, params = RESOURCE_ENDPOINTS[resource_type]
+        session = await self._get_session()
+        token = await self._get_token(cluster_url, cluster_config)
+
+        async with session.get(f"{cluster_url}{path}", params=params,
+                               headers={"X-Auth-Token": token}) as response:
+            if response.status == 401:
+                # Token revoked or expired early, drop it so the next lookup re-authenticates
+                self._tokens.pop(self._cluster_key(cluster_config), None)
+            response.raise_for_status()
+            payload = await response.json()
+
+        items = payload.get("response", []) if isinstance(payload, dict) else payload
+        return [self._normalize_resource(item) for item in items]
+
+    async def _get_token(self, cluster_url: str, cluster_config: Dict[str, Any]) -> str:
+        """Get a cached auth token for the cluster, authenticating if needed"""
+        username = cluster_config.get("username") or ""
+        token_key = self._cluster_key(cluster_config)
+        lock = self._token_locks.setdefault(token_key, asyncio.Lock())
+
+        async with lock:
+            token = self._tokens.get(token_key)
+            if token and token[1] > time.monotonic():
+                return token[0]
+
+            session = await self._get_session()
+            auth = aiohttp.BasicAuth(username, cluster_config.get("password") or "")
+            async with session.post(f"{cluster_url}{AUTH_ENDPOINT}", auth=auth) as response:
+                response.raise_for_status()
+                token_data = await response.json()
+
+            access_token = token_data.get("Token")
+            if not access_token:
+                raise Exception(f"No token returned from cluster {cluster_url}")
+
+            self._tokens[token_key] = (access_token, time.monotonic() + TOKEN_LIFETIME)
+            return access_token
+
+    def _normalize_resource(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Map a Catalyst Center API object to the id/name/status shape used for clarifications"""
+        resource_id = item.get("id") or item.get("siteId") or item.get("instanceUuid")
+        return {
+            "id": resource_id,
+            "name": item.get("name") or item.get("hostname") or item.get("siteNameHierarchy") or resource_id,
+            "status": item.get("status") or item.get("reachabilityStatus"),
+            "data": item
+        }
+
+    def invalidate(self, cluster_url: str = None):
+        """Drop cached resources for one cluster, or for all clusters"""
+        if cluster_url is None:
+            self._cache.clear()
+            return
+
+        cluster_url = cluster_url.rstrip("/")
+        for key in [k for k in self._cache if k[0] == cluster_url]:
+            del self._cache[key]
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get cache and request statistics"""
+        return {
+            **self.stats,
+            "cached_entries": len(self._cache),
+            "inflight": len(self._inflight),
+            "cache_ttl": self.cache_ttl
+        }
+
+# Global instance
+cluster_inventory_service = ClusterInventoryService()
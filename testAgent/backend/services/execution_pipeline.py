@@ -0,0 +1,188 @@
+"""
+Execution Pipeline - Template loading, generation and execution for one session
+File: backend/services/execution_pipeline.py
+"""
+
+import logging
+import asyncio
+from typing import Dict, List, Any, Optional, Callable, Awaitable
+from core.config import settings
+from core.metrics import track_stage, TEST_RUNS
+from core.tracing import traced
+from services.prompt_builder import token_ledger
+
+logger = logging.getLogger(__name__)
+
+# Called with (status, error_message) as the session moves through the pipeline
+StatusReporter = Callable[[str, Optional[str]], Awaitable[Any]]
+
+CANCEL_REASON = "Cancelled by user"
+
+@traced(record_args=("session_id",))
+async def run_session_pipeline(session_id: str, workflows: List[str], parameters: Dict[str, Any],
+                               cluster_config: Dict[str, Any], template_manager, playwright_generator,
+                               test_executor, report_status: StatusReporter) -> Dict[str, Any]:
+    """
+    Load templates, generate Playwright tests and execute them for a session
+
+    Shared by the API process and out-of-process execution workers.
+
+    Args:
+        session_id: Session identifier
+        workflows: Resolved execution chain
+        parameters: Session parameters used to customize templates
+        cluster_config: Cluster configuration
+        template_manager: TemplateManagerService
+        playwright_generator: PlaywrightGeneratorService
+        test_executor: TestExecutorService
+        report_status: Callback receiving status updates
+
+    Returns:
+        Execution results from the test executor, with the session's LLM token usage
+    """
+    # Step 1: Load TDD templates for each workflow
+    await report_status("loading_templates", None)
+    templates = {}
+    
+    for workflow_name in workflows:
+        logger.info(f"Loading template for workflow: {workflow_name}")
+        with track_stage("template_load"):
+            template_content = await template_manager.load_tdd_template(workflow_name)
+        templates[workflow_name] = template_content
+    
+    # Step 2: Generate Playwright tests, within the session's LLM token budget
+    await report_status("generating", None)
+    playwright_tests = {}
+    customized_templates = {}
+    
+    with token_ledger(session_id, settings.SESSION_TOKEN_BUDGET) as ledger:
+        for workflow_name, template_content in templates.items():
+            logger.info(f"Generating Playwright test for workflow: {workflow_name}")
+            
+            # Customize template with parameters
+            with track_stage("customization"):
+                customized_template = await template_manager.customize_template(
+                    template_content, parameters
+                )
+            customized_templates[workflow_name] = customized_template
+            metadata = await template_manager.get_workflow_metadata(workflow_name)
+            
+            # Generate Playwright code using Azure OpenAI
+            with track_stage("generation"):
+                playwright_code = await playwright_generator.generate_playwright_test(
+                    workflow_name=workflow_name,
+                    tdd_template=customized_template,
+                    cluster_config=cluster_config,
+                    estimated_duration=metadata.estimated_duration if metadata else None
+                )
+            
+            playwright_tests[workflow_name] = playwright_code
+        
+        # Step 3: Type-check all specs at once, regenerating the ones that don't compile
+        with track_stage("compile_check"):
+            playwright_tests, compile_errors = await playwright_generator.check_and_repair(
+                playwright_tests, customized_templates, cluster_config
+            )
+    
+    logger.info(f"Session {session_id} used {ledger.used} LLM tokens in {ledger.requests} requests")
+    
+    # Step 4: Execute Playwright tests, skipping the dependents of failed workflows
+    await report_status("executing", None)
+    dependencies = {
+        workflow_name: await template_manager.get_transitive_dependencies(workflow_name)
+        for workflow_name in playwright_tests
+    }
+    
+    execution_results = await test_executor.execute_tests(
+        session_id=session_id,
+        playwright_tests=playwright_tests,
+        cluster_config=cluster_config,
+        dependencies=dependencies,
+        compile_errors=compile_errors,
+        support_files=playwright_generator.support_files(cluster_config)
+    )
+    execution_results["token_usage"] = ledger.to_dict()
+    return execution_results
+
+async def run_session_with_budget(session_id: str, workflows: List[str], parameters: Dict[str, Any],
+                                  cluster_config: Dict[str, Any], template_manager, playwright_generator,
+                                  test_executor, report_status: StatusReporter,
+                                  timeout: Optional[float]) -> Dict[str, Any]:
+    """
+    Run the session pipeline within a wall-clock budget
+
+    When the budget runs out the pipeline is cancelled, which stops the running
+    Playwright process group, and workflows that didn't finish are reported as skipped.
+
+    Args:
+        timeout: Budget in seconds, None for no limit
+
+    Returns:
+        Execution results, with timed_out set if the budget ran out
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    try:
+        return await asyncio.wait_for(
+            run_session_pipeline(session_id, workflows, parameters, cluster_config, template_manager,
+                                 playwright_generator, test_executor, report_status),
+            timeout=timeout
+        )
+    except asyncio.TimeoutError:
+        # On Python 3.11+ this is the builtin TimeoutError, which the pipeline itself may raise
+        if timeout is None or loop.time() - started < timeout:
+            raise
+        logger.warning(f"Session {session_id} exceeded its time budget of {timeout:g}s")
+        return build_interrupted_results(
+            session_id, workflows, test_executor.take_interrupted_results(session_id),
+            f"Session exceeded its time budget of {timeout:g}s", timed_out=True
+        )
+
+def build_interrupted_results(session_id: str, workflows: List[str], partial_results: Optional[Dict[str, Any]],
+                              reason: str, timed_out: bool = False) -> Dict[str, Any]:
+    """
+    Complete the results of a cancelled or timed out session
+
+    Args:
+        session_id: Session identifier
+        workflows: Workflows the session was meant to run
+        partial_results: Results gathered before the interruption, if execution had started
+        reason: Why the session stopped
+        timed_out: Whether the time budget ran out, rather than a user cancelling
+
+    Returns:
+        Execution results in which every unfinished workflow is skipped
+    """
+    execution_results = partial_results or {
+        "session_id": session_id,
+        "passed_tests": 0,
+        "failed_tests": 0,
+        "test_results": {},
+        "execution_summary": []
+    }
+
+    skipped = [workflow for workflow in workflows if workflow not in execution_results["test_results"]]
+    for workflow_name in skipped:
+        execution_results["test_results"][workflow_name] = {"status": "skipped", "duration": 0, "message": reason}
+        execution_results["execution_summary"].append({"workflow": workflow_name, "status": "skipped"})
+        TEST_RUNS.inc(status="skipped")
+
+    execution_results.update({
+        "success": False,
+        "total_tests": len(workflows),
+        "skipped_tests": execution_results.get("skipped_tests", 0) + len(skipped),
+        "error_message": reason,
+        "cancelled": not timed_out,
+        "timed_out": timed_out
+    })
+    return execution_results
+
+def session_outcome(execution_results: Dict[str, Any]) -> str:
+    """Final session status for a session's execution results"""
+    if execution_results.get("success", False):
+        return "completed"
+    if execution_results.get("timed_out"):
+        return "timed_out"
+    if execution_results.get("cancelled"):
+        return "cancelled"
+    return "failed"
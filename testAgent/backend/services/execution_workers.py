@@ -0,0 +1,201 @@
+"""
+Execution Workers - Run queued sessions out of process and sync their results into the API
+File: backend/services/execution_workers.py
+"""
+
+import logging
+import asyncio
+import os
+import socket
+import uuid
+from typing import Optional, Set
+from core.config import settings
+from core.tracing import tracer
+from services.broker import JobBroker, BrokerJob, BrokerEvent
+from services.execution_pipeline import (
+    run_session_with_budget, build_interrupted_results, session_outcome, CANCEL_REASON
+)
+
+logger = logging.getLogger(__name__)
+
+class ExecutionWorker:
+    """Claims session jobs from a broker and runs the execution pipeline for them"""
+
+    def __init__(self, broker: JobBroker, template_manager, playwright_generator, test_executor,
+                 concurrency: int = None, poll_interval: float = None, lease_seconds: float = None,
+                 worker_id: str = None):
+        self.broker = broker
+        self.template_manager = template_manager
+        self.playwright_generator = playwright_generator
+        self.test_executor = test_executor
+        self.concurrency = concurrency or settings.WORKER_CONCURRENCY
+        self.poll_interval = poll_interval or settings.WORKER_POLL_INTERVAL
+        self.lease_seconds = lease_seconds or settings.WORKER_LEASE_SECONDS
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        # Heartbeats also pick up cancellation requests, so they can't wait for most of the lease
+        self.heartbeat_interval = min(self.lease_seconds / 3, 2.0)
+
+        self._active: Set[asyncio.Task] = set()
+        self.stats = {"claimed": 0, "completed": 0, "failed": 0, "cancelled": 0, "requeued": 0}
+
+    async def run(self, stop_event: asyncio.Event):
+        """Claim and run jobs until stop_event is set, then finish the running ones"""
+        logger.info(f"Execution worker {self.worker_id} started with concurrency {self.concurrency}")
+        maintenance = asyncio.create_task(self._maintain(stop_event))
+
+        try:
+            while not stop_event.is_set():
+                job = None
+                if len(self._active) < self.concurrency:
+                    job = await self.broker.claim(self.worker_id)
+
+                if job:
+                    self.stats["claimed"] += 1
+                    task = asyncio.create_task(self._run_job(job))
+                    self._active.add(task)
+                    task.add_done_callback(self._active.discard)
+                    continue
+
+                try:
+                    await asyncio.wait_for(stop_event.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            maintenance.cancel()
+            if self._active:
+                await asyncio.gather(*list(self._active), return_exceptions=True)
+            logger.info(f"Execution worker {self.worker_id} stopped: {self.stats}")
+
+    async def _maintain(self, stop_event: asyncio.Event):
+        """Return jobs of crashed workers to the queue"""
+        while not stop_event.is_set():
+            try:
+                self.stats["requeued"] += await self.broker.requeue_stale(self.lease_seconds)
+            except Exception as e:
+                logger.warning(f"Failed to requeue stale jobs: {e}")
+            await asyncio.sleep(self.lease_seconds / 2)
+
+    async def _heartbeat(self, job: BrokerJob, pipeline: asyncio.Task):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                cancel_requested = await self.broker.heartbeat(job.job_id)
+            except Exception as e:
+                # E.g. a locked database; the lease outlasts several missed heartbeats
+                logger.warning(f"Heartbeat for session {job.session_id} failed: {e}")
+                continue
+            if cancel_requested and not pipeline.done():
+                logger.info(f"Cancellation requested for session {job.session_id}")
+                pipeline.cancel()
+
+    async def _run_job(self, job: BrokerJob):
+        session_id = job.session_id
+        payload = job.payload
+        tracer.bind_session(session_id)
+        logger.info(f"Worker {self.worker_id} running session {session_id} (attempt {job.attempts})")
+
+        async def report_status(status: str, error_message: Optional[str] = None):
+            await self.broker.publish(session_id, "status", {"status": status, "error_message": error_message})
+
+        pipeline = asyncio.create_task(run_session_with_budget(
+            session_id, payload["workflows"], payload.get("parameters", {}),
+            payload.get("cluster_config", {}), self.template_manager,
+            self.playwright_generator, self.test_executor, report_status,
+            timeout=payload.get("budget", settings.EXECUTION_BUDGET_SECONDS)
+        ))
+        heartbeat = asyncio.create_task(self._heartbeat(job, pipeline))
+
+        try:
+            await asyncio.wait({pipeline, heartbeat}, return_when=asyncio.FIRST_COMPLETED)
+            if not pipeline.done():
+                # Without heartbeats the lease lapses and another worker would run the session again
+                pipeline.cancel()
+                await asyncio.wait({pipeline})
+                error = heartbeat.exception() if not heartbeat.cancelled() else None
+                raise RuntimeError(f"Lost the job lease after the heartbeat stopped: {error!r}")
+            if pipeline.cancelled():
+                execution_results = build_interrupted_results(
+                    session_id, payload["workflows"], self.test_executor.take_interrupted_results(session_id),
+                    CANCEL_REASON
+                )
+            else:
+                execution_results = pipeline.result()
+            execution_results["worker_id"] = self.worker_id
+
+            # Results first, so the session has them when it reaches a final status
+            await self.broker.publish(session_id, "results", execution_results)
+            status = session_outcome(execution_results)
+            if status == "completed":
+                await report_status("completed")
+            else:
+                await report_status(status, execution_results.get("error_message", "Test execution failed"))
+            if status == "cancelled":
+                await self.broker.complete(job.job_id, "cancelled")
+                self.stats["cancelled"] += 1
+            else:
+                await self.broker.complete(job.job_id, "done")
+                self.stats["completed"] += 1
+
+        except Exception as e:
+            logger.error(f"Error in workflow execution for session {session_id}: {str(e)}")
+            await report_status("failed", str(e))
+            await self.broker.complete(job.job_id, "failed")
+            self.stats["failed"] += 1
+
+        finally:
+            heartbeat.cancel()
+
+class BrokerResultConsumer:
+    """Applies status and result updates from workers to the API's session store"""
+
+    def __init__(self, broker: JobBroker, session_manager, poll_interval: float = None):
+        self.broker = broker
+        self.session_manager = session_manager
+        self.poll_interval = poll_interval or settings.WORKER_POLL_INTERVAL
+        self._last_event_id = 0
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"applied": 0, "ignored": 0}
+
+    async def start(self):
+        """Start consuming updates published from now on"""
+        if self._task:
+            return
+        self._last_event_id = await self.broker.get_last_event_id()
+        self._task = asyncio.create_task(self._consume())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _consume(self):
+        while True:
+            try:
+                events = await self.broker.fetch_events(self._last_event_id)
+                for event in events:
+                    await self.apply(event)
+                    self._last_event_id = event.event_id
+                if events:
+                    continue
+            except Exception as e:
+                logger.warning(f"Failed to consume worker updates: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def apply(self, event: BrokerEvent):
+        """Apply one worker update to the session it belongs to"""
+        # Other API instances own sessions this one doesn't know about
+        if not await self.session_manager.get_session(event.session_id):
+            self.stats["ignored"] += 1
+            return
+
+        if event.kind == "status":
+            await self.session_manager.update_session_status(
+                event.session_id, event.data["status"], event.data.get("error_message")
+            )
+        elif event.kind == "results":
+            await self.session_manager.store_execution_results(event.session_id, event.data)
+        self.stats["applied"] += 1
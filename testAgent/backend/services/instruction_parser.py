@@ -8,6 +8,7 @@ import logging
 from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
+from core.tracing import traced
 
 logger = logging.getLogger(__name__)
 
@@ -150,6 +151,7 @@ class InstructionParserService:
             "timeout": r"(?:timeout|wait)[\s:]*['\"]?(\d+)['\"]?"
         }
     
+    @traced()
     async def parse_instruction(self, instruction: str, cluster_url: str = None, 
                               username: str = None, password: str = None) -> ParsedInstructionResult:
         """
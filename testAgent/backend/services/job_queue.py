@@ -0,0 +1,220 @@
+"""
+Job Queue Service - Bounded, prioritised execution of test sessions
+File: backend/services/job_queue.py
+"""
+
+import logging
+import asyncio
+import contextvars
+import heapq
+import itertools
+import math
+import time
+from typing import Dict, List, Any, Optional, Callable, Awaitable
+from dataclasses import dataclass, field
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Named priorities accepted by the API, lower runs first
+JOB_PRIORITIES = {
+    "high": 0,
+    "normal": 1,
+    "low": 2
+}
+DEFAULT_JOB_PRIORITY = "normal"
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at its depth limit"""
+
+    def __init__(self, depth: int, retry_after: int):
+        super().__init__(f"Job queue is full ({depth} queued)")
+        self.depth = depth
+        self.retry_after = retry_after
+
+@dataclass
+class Job:
+    """A queued or running session execution"""
+    session_id: str
+    run: Callable[[], Awaitable[Any]]
+    priority: int
+    sequence: int
+    enqueued_at: float = field(default_factory=time.monotonic)
+    started_at: Optional[float] = None
+    task: Optional[asyncio.Task] = None
+    # Context of the submitting request, so tracing and session context carry over
+    context: contextvars.Context = field(default_factory=contextvars.copy_context)
+
+    @property
+    def sort_key(self):
+        return (self.priority, self.sequence)
+
+class JobQueueService:
+    """Service that runs session executions on a fixed pool of workers"""
+
+    def __init__(self, workers: int = None, max_depth: int = None):
+        self.workers = workers or settings.JOB_QUEUE_WORKERS or settings.MAX_CONCURRENT_TESTS
+        self.max_depth = max_depth if max_depth is not None else settings.JOB_QUEUE_MAX_DEPTH
+
+        # Heap of (priority, sequence, session_id); queued jobs by session
+        self._heap: List[tuple] = []
+        self._queued: Dict[str, Job] = {}
+        self._running: Dict[str, Job] = {}
+        self._sequence = itertools.count()
+        self._available: Optional[asyncio.Condition] = None
+        self._worker_tasks: List[asyncio.Task] = []
+
+        # Recent run durations for wait estimates
+        self._recent_durations: List[float] = []
+
+        self.stats = {"submitted": 0, "rejected": 0, "completed": 0, "failed": 0, "cancelled": 0}
+
+    async def start(self):
+        """Start the worker pool"""
+        if self._worker_tasks:
+            return
+        self._available = asyncio.Condition()
+        self._worker_tasks = [
+            asyncio.create_task(self._worker(i), name=f"job-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"JobQueueService started with {self.workers} worker(s), max depth {self.max_depth}")
+
+    async def stop(self):
+        """Stop the workers, cancelling running jobs"""
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+    async def submit(self, session_id: str, run: Callable[[], Awaitable[Any]],
+                     priority: str = DEFAULT_JOB_PRIORITY) -> int:
+        """
+        Queue a session execution
+
+        Args:
+            session_id: Session the job belongs to
+            run: Coroutine function executing the session
+            priority: One of JOB_PRIORITIES
+
+        Returns:
+            Position in the queue, 1 being next to run
+
+        Raises:
+            QueueFullError: If the queue is at its depth limit
+            ValueError: If the session is already queued or running, or the priority is unknown
+        """
+        if priority not in JOB_PRIORITIES:
+            raise ValueError(f"Unknown priority '{priority}', expected one of {list(JOB_PRIORITIES)}")
+        if session_id in self._queued or session_id in self._running:
+            raise ValueError(f"Session {session_id} is already queued or running")
+        if len(self._queued) >= self.max_depth:
+            self.stats["rejected"] += 1
+            raise QueueFullError(len(self._queued), self.estimate_wait(len(self._queued) + 1))
+
+        if not self._worker_tasks:
+            await self.start()
+
+        job = Job(session_id=session_id, run=run, priority=JOB_PRIORITIES[priority],
+                  sequence=next(self._sequence))
+        self._queued[session_id] = job
+        heapq.heappush(self._heap, (*job.sort_key, session_id))
+        self.stats["submitted"] += 1
+
+        async with self._available:
+            self._available.notify()
+
+        return self.get_position(session_id)
+
+    def get_position(self, session_id: str) -> Optional[int]:
+        """Get a queued session's position, 1 being next; 0 if running, None if unknown"""
+        if session_id in self._running:
+            return 0
+        job = self._queued.get(session_id)
+        if not job:
+            return None
+        return 1 + sum(1 for other in self._queued.values() if other.sort_key < job.sort_key)
+
+    async def cancel(self, session_id: str) -> Optional[str]:
+        """
+        Cancel a session's job
+
+        A queued job is dropped; a running job's task is cancelled and awaited.
+
+        Returns:
+            "queued" or "running" for the state the job was cancelled in, None if there was no job
+        """
+        if self._queued.pop(session_id, None):
+            self.stats["cancelled"] += 1
+            return "queued"
+        job = self._running.get(session_id)
+        if job and job.task:
+            job.task.cancel()
+            await asyncio.wait({job.task})
+            return "running"
+        return None
+
+    def is_running(self, session_id: str) -> bool:
+        return session_id in self._running
+
+    def estimate_wait(self, position: int) -> int:
+        """Estimate seconds until a job at the given position starts"""
+        average = (sum(self._recent_durations) / len(self._recent_durations)
+                   if self._recent_durations else 60.0)
+        # Jobs that have to finish before a worker frees up for this one
+        ahead = position - 1 + len(self._running) - self.workers + 1
+        return int(math.ceil(max(ahead, 0) / self.workers) * average) + 1
+
+    async def _next_job(self) -> Job:
+        async with self._available:
+            while True:
+                # Skip heap entries whose job was removed from the queue, or
+                # cancelled and resubmitted under a new sequence number
+                while self._heap:
+                    _, sequence, session_id = heapq.heappop(self._heap)
+                    job = self._queued.get(session_id)
+                    if job and job.sequence == sequence:
+                        del self._queued[session_id]
+                        return job
+                await self._available.wait()
+
+    async def _worker(self, index: int):
+        while True:
+            job = await self._next_job()
+            job.started_at = time.monotonic()
+            self._running[job.session_id] = job
+            logger.info(f"Worker {index} running session {job.session_id} "
+                        f"after {job.started_at - job.enqueued_at:.2f}s in queue")
+            try:
+                # Run in its own task so a job can be cancelled without losing the worker
+                job.task = job.context.run(asyncio.create_task, job.run())
+                await asyncio.wait({job.task})
+                if job.task.cancelled():
+                    self.stats["cancelled"] += 1
+                else:
+                    job.task.result()
+                    self.stats["completed"] += 1
+            except asyncio.CancelledError:
+                # The worker itself is being stopped
+                job.task.cancel()
+                raise
+            except Exception as e:
+                self.stats["failed"] += 1
+                logger.error(f"Job for session {job.session_id} failed: {e}")
+            finally:
+                self._running.pop(job.session_id, None)
+                self._recent_durations = (self._recent_durations + [time.monotonic() - job.started_at])[-50:]
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get queue statistics"""
+        return {
+            **self.stats,
+            "workers": self.workers,
+            "max_depth": self.max_depth,
+            "queued": len(self._queued),
+            "running": len(self._running),
+            "oldest_wait": max((time.monotonic() - job.enqueued_at for job in self._queued.values()), default=0.0)
+        }
+
+# Global job queue instance
+job_queue = JobQueueService()
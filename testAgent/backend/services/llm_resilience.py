@@ -0,0 +1,176 @@
+"""
+LLM Resilience - Circuit breaker, adaptive concurrency and retry backoff for LLM requests
+File: backend/services/llm_resilience.py
+"""
+
+import logging
+import asyncio
+import random
+import time
+from typing import Dict, Any, Optional
+from openai import APITimeoutError
+from core.metrics import LLM_CIRCUIT_TRANSITIONS
+
+logger = logging.getLogger(__name__)
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint that keeps failing"""
+
+class CircuitBreaker:
+    """
+    Stop calling an endpoint after repeated consecutive failures
+
+    Closed: requests pass and failures are counted. Open: requests are rejected
+    until the reset timeout passes. Half open: a single probe request decides
+    whether the circuit closes again or reopens.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float, name: str = "llm"):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.name = name
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+        self.rejected = 0
+
+    def before_request(self):
+        """Raise CircuitOpenError if the request must not be sent"""
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                self._reject()
+            self._transition(self.HALF_OPEN)
+        if self.state == self.HALF_OPEN:
+            # A probe that never reported back, e.g. because it was cancelled, is replaced
+            if self._probe_in_flight and time.monotonic() - self._probe_started < self.reset_timeout:
+                self._reject()
+            self._probe_in_flight = True
+            self._probe_started = time.monotonic()
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+        if self.state != self.CLOSED:
+            self._transition(self.CLOSED)
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            if self.state != self.OPEN:
+                self._transition(self.OPEN)
+
+    def _reject(self):
+        self.rejected += 1
+        retry_in = max(self.reset_timeout - (time.monotonic() - self.opened_at), 0)
+        raise CircuitOpenError(
+            f"{self.name} circuit is open after {self.consecutive_failures} consecutive failures, "
+            f"retrying in {retry_in:.0f}s"
+        )
+
+    def _transition(self, state: str):
+        logger.warning(f"{self.name} circuit {self.state} -> {state}")
+        self.state = state
+        LLM_CIRCUIT_TRANSITIONS.inc(state=state)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "rejected": self.rejected
+        }
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD limit on concurrent requests
+
+    The limit grows by one per limit's worth of fast successful requests and
+    halves when the endpoint rate-limits or responds slower than the latency target.
+    Requests started before the last decrease saw the same congestion, so their
+    overload signals don't halve the limit again.
+    """
+
+    def __init__(self, initial_limit: int, min_limit: int, max_limit: int, latency_target: float):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.limit = float(min(max(initial_limit, min_limit), max_limit))
+        self.in_flight = 0
+        self.decreases = 0
+        # Incremented by each decrease; requests remember the epoch they started in
+        self.epoch = 0
+        self._condition: Optional[asyncio.Condition] = None
+
+    def _get_condition(self) -> asyncio.Condition:
+        # Created on first use so the limiter can be built outside an event loop
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    async def acquire(self) -> int:
+        """Wait until a request fits within the current limit, returning the epoch it starts in"""
+        condition = self._get_condition()
+        async with condition:
+            await condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+            return self.epoch
+
+    async def release(self, latency: Optional[float] = None, overloaded: bool = False,
+                      epoch: Optional[int] = None):
+        """
+        Release a slot and adjust the limit
+
+        Args:
+            latency: Seconds the request took, None if it failed for another reason
+            overloaded: Whether the endpoint rate-limited the request or it timed out
+            epoch: What acquire returned; None treats the request as started after the last decrease
+        """
+        condition = self._get_condition()
+        async with condition:
+            self.in_flight -= 1
+            if overloaded or (latency is not None and latency > self.latency_target):
+                # One decrease per congestion event, however many requests ran into it
+                if epoch is None or epoch >= self.epoch:
+                    self.limit = max(self.min_limit, self.limit / 2)
+                    self.decreases += 1
+                    self.epoch += 1
+                    logger.info(f"LLM concurrency limit decreased to {int(self.limit)}")
+            elif latency is not None:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            condition.notify_all()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "decreases": self.decreases
+        }
+
+def is_rate_limited(error: Exception) -> bool:
+    """Whether an error is the endpoint throttling requests"""
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    message = str(error).lower()
+    return status == 429 or "429" in message or "rate limit" in message or "too many requests" in message
+
+def is_timeout(error: Exception) -> bool:
+    """Whether a request got no response within its timeout"""
+    return isinstance(error, (APITimeoutError, TimeoutError))
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds the endpoint asked to wait, from a Retry-After header"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with full jitter, so clients failing together don't retry together"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
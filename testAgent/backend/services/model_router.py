@@ -0,0 +1,161 @@
+"""
+Model Router - Pick the model deployment, output limit and timeout for a TDD template
+File: backend/services/model_router.py
+"""
+
+import logging
+import re
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional
+from core.config import settings
+from core.metrics import LLM_ROUTE_REQUESTS, LLM_ROUTE_LATENCY
+from services.tdd_compiler import extract_test_cases
+
+logger = logging.getLogger(__name__)
+
+LATENCY_WINDOW = 200  # Recent completions per route kept for latency percentiles
+
+@dataclass
+class TemplateStats:
+    """Size of a TDD template, as far as generating its spec is concerned"""
+    test_cases: int
+    steps: int
+    estimated_duration: int
+
+@dataclass
+class ModelRoute:
+    """A deployment and its limits for templates up to the given size; None means no limit"""
+    name: str
+    deployment: str
+    max_tokens: int
+    timeout: float
+    max_test_cases: Optional[int] = None
+    max_steps: Optional[int] = None
+    max_duration: Optional[int] = None
+
+    def accepts(self, stats: TemplateStats) -> bool:
+        return all(limit is None or value <= limit for value, limit in (
+            (stats.test_cases, self.max_test_cases),
+            (stats.steps, self.max_steps),
+            (stats.estimated_duration, self.max_duration)
+        ))
+
+def template_stats(tdd_template: str, estimated_duration: Optional[int] = None) -> TemplateStats:
+    """
+    Count test cases and steps of a template
+
+    The estimated duration comes from the workflow metadata when given, else from a
+    metadata section still in the template, else as the template manager infers it.
+    """
+    test_cases = extract_test_cases(tdd_template)
+    steps = sum(len(test_case["steps"]) for test_case in test_cases)
+
+    if estimated_duration is None:
+        match = re.search(r"^estimated_duration:\s*(\d+)", tdd_template, re.MULTILINE)
+        if match:
+            estimated_duration = int(match.group(1))
+        else:
+            lowered = tdd_template.lower()
+            estimated_duration = max(30, min(300, (lowered.count("when:") + lowered.count("then:")) * 20))
+
+    return TemplateStats(test_cases=len(test_cases), steps=steps, estimated_duration=estimated_duration)
+
+def default_routes() -> List[ModelRoute]:
+    """Small, medium and large routes from the settings; an empty deployment means AZURE_OPENAI_MODEL"""
+    return [
+        ModelRoute(
+            name="small",
+            deployment=settings.MODEL_ROUTE_SMALL_DEPLOYMENT or settings.AZURE_OPENAI_MODEL,
+            max_tokens=settings.MODEL_ROUTE_SMALL_MAX_TOKENS,
+            timeout=settings.MODEL_ROUTE_SMALL_TIMEOUT,
+            max_test_cases=3,
+            max_steps=settings.MODEL_ROUTE_SMALL_MAX_STEPS,
+            max_duration=60
+        ),
+        ModelRoute(
+            name="medium",
+            deployment=settings.MODEL_ROUTE_MEDIUM_DEPLOYMENT or settings.AZURE_OPENAI_MODEL,
+            max_tokens=settings.MODEL_ROUTE_MEDIUM_MAX_TOKENS,
+            timeout=settings.MODEL_ROUTE_MEDIUM_TIMEOUT,
+            max_steps=settings.MODEL_ROUTE_MEDIUM_MAX_STEPS,
+            max_duration=180
+        ),
+        ModelRoute(
+            name="large",
+            deployment=settings.MODEL_ROUTE_LARGE_DEPLOYMENT or settings.AZURE_OPENAI_MODEL,
+            max_tokens=settings.GENERATION_MAX_OUTPUT_TOKENS,
+            timeout=settings.MODEL_ROUTE_LARGE_TIMEOUT
+        )
+    ]
+
+class RouteStatistics:
+    """Outcome counts and recent latencies of one route's completion attempts"""
+
+    def __init__(self):
+        self.successes = 0
+        self.failures = 0
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    def to_dict(self) -> Dict[str, Any]:
+        requests = self.successes + self.failures
+        latencies = sorted(self.latencies)
+        return {
+            "requests": requests,
+            "successes": self.successes,
+            "failures": self.failures,
+            "success_rate": self.successes / requests if requests else None,
+            "latency_avg": sum(latencies) / len(latencies) if latencies else None,
+            "latency_p50": latencies[(len(latencies) - 1) // 2] if latencies else None,
+            "latency_p95": latencies[int(0.95 * (len(latencies) - 1))] if latencies else None
+        }
+
+class ModelRouter:
+    """
+    Route each template to the first route whose limits it fits
+
+    Routes are ordered from smallest to largest and the last one should have no
+    limits; templates that fit none of them still go to the last route.
+    """
+
+    def __init__(self, routes: Optional[List[ModelRoute]] = None):
+        self.routes = routes or default_routes()
+        self._statistics = {route.name: RouteStatistics() for route in self.routes}
+        # Completion attempts finish on worker threads
+        self._lock = threading.Lock()
+
+    def select(self, tdd_template: str, workflow_name: str = "", estimated_duration: Optional[int] = None) -> ModelRoute:
+        stats = template_stats(tdd_template, estimated_duration)
+        route = next((route for route in self.routes if route.accepts(stats)), self.routes[-1])
+        logger.info(f"Routing {workflow_name or 'template'} ({stats.test_cases} test cases, {stats.steps} steps, "
+                    f"~{stats.estimated_duration}s) to the {route.name} route: {route.deployment}, "
+                    f"up to {route.max_tokens} tokens, {route.timeout:.0f}s timeout")
+        return route
+
+    def record(self, route: ModelRoute, latency: float, success: bool):
+        """Record one completion attempt; failed attempts count towards the success rate only"""
+        with self._lock:
+            statistics = self._statistics.setdefault(route.name, RouteStatistics())
+            if success:
+                statistics.successes += 1
+                statistics.latencies.append(latency)
+            else:
+                statistics.failures += 1
+        LLM_ROUTE_REQUESTS.inc(route=route.name, status="success" if success else "error")
+        if success:
+            LLM_ROUTE_LATENCY.observe(latency, route=route.name)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Each route's configuration with its observed success rate and latency"""
+        with self._lock:
+            observed = {name: statistics.to_dict() for name, statistics in self._statistics.items()}
+        return {
+            route.name: {
+                "deployment": route.deployment,
+                "max_tokens": route.max_tokens,
+                "timeout": route.timeout,
+                **observed[route.name]
+            }
+            for route in self.routes
+        }
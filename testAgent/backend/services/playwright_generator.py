@@ -4,12 +4,18 @@ File: backend/services/playwright_generator.py
 """
 
 import logging
-from typing import Dict, List, Any, Optional
+import asyncio
+from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
 import json
 import re
 from datetime import datetime
 from services.azure_openai_service import azure_openai_service
+from services.step_cache import StepSnippetCache, normalize_step, parameter_values, parameterize, fill_parameters
+from services.spec_compiler import SpecCompiler
+from services.tdd_compiler import TDDCompiler, extract_test_cases, storage_state_save_code, fixtures_module, FIXTURES_PATH
+from core.config import settings
+from core.tracing import traced
 
 logger = logging.getLogger(__name__)
 
@@ -25,21 +31,37 @@ class TestCase:
 class PlaywrightGeneratorService:
     """Enhanced service for generating Playwright test code using Azure OpenAI"""
     
-    def __init__(self):
+    def __init__(self, generation_mode: str = None, step_cache: StepSnippetCache = None,
+                 spec_compiler: SpecCompiler = None, tdd_compiler: TDDCompiler = None):
         self.base_imports = [
             "import { test, expect, Page, BrowserContext } from '@playwright/test';",
             ""
         ]
         self.azure_openai = azure_openai_service
         
+        # In steps mode only steps without a cached snippet are sent to the LLM
+        self.generation_mode = generation_mode or settings.GENERATION_MODE
+        self.step_cache = step_cache if step_cache is not None else StepSnippetCache(path=settings.STEP_CACHE_FILE or None)
+        
+        # Generated specs are type-checked together before they reach the browser
+        self.compile_check = settings.SPEC_COMPILE_CHECK
+        self.repair_attempts = settings.SPEC_REPAIR_ATTEMPTS
+        self.spec_compiler = spec_compiler or SpecCompiler()
+        
+        # Rule-based compilation of TDD steps; in hybrid mode well-covered templates skip the LLM
+        self.tdd_compiler = tdd_compiler or TDDCompiler()
+        self.rule_coverage_threshold = settings.RULE_COVERAGE_THRESHOLD
+        
     async def initialize(self):
         """Initialize the playwright generator service"""
         # Initialize Azure OpenAI service
         await self.azure_openai.initialize()
         logger.info("PlaywrightGeneratorService initialized with Azure OpenAI")
         
+    @traced(record_args=("workflow_name",))
     async def generate_playwright_test(self, workflow_name: str, tdd_template: str, 
-                                      cluster_config: Dict[str, Any]) -> str:
+                                      cluster_config: Dict[str, Any],
+                                      estimated_duration: Optional[int] = None) -> str:
         """
         Generate Playwright test code using Azure OpenAI
         
@@ -47,19 +69,37 @@ class PlaywrightGeneratorService:
             workflow_name: Name of the workflow
             tdd_template: TDD template content
             cluster_config: Cluster configuration (url, username, password)
+            estimated_duration: Run time from the workflow metadata, for model routing (optional)
             
         Returns:
             Complete Playwright TypeScript test code generated by Azure OpenAI
         """
         logger.info(f"Generating Playwright test for workflow: {workflow_name} using Azure OpenAI")
         
+        if self.generation_mode in ("rules", "hybrid"):
+            compiled = self.tdd_compiler.compile(workflow_name, tdd_template, cluster_config)
+            # Every action and assertion must compile, or the spec would quietly leave it out
+            if self.generation_mode == "rules" or (compiled.coverage >= self.rule_coverage_threshold
+                                                   and not compiled.unmatched_actions):
+                logger.info(f"Compiled Playwright test for {workflow_name} without the LLM "
+                            f"({compiled.coverage:.0%} of steps covered by rules)")
+                return compiled.code
+            logger.info(f"Rules cover {compiled.coverage:.0%} of {workflow_name} steps, "
+                        f"{len(compiled.unmatched_actions)} When/Then step(s) unmatched, generating with Azure OpenAI")
+        
         try:
-            # Use Azure OpenAI to generate the test
-            playwright_code = await self.azure_openai.generate_playwright_test(
-                tdd_template=tdd_template,
-                cluster_config=cluster_config,
-                workflow_name=workflow_name
-            )
+            if self.generation_mode == "steps":
+                # Assemble the spec from per-step snippets, generating only new steps
+                playwright_code = await self._generate_from_steps(workflow_name, tdd_template, cluster_config)
+            else:
+                # Use Azure OpenAI to generate the test
+                playwright_code = await self.azure_openai.generate_playwright_test(
+                    tdd_template=tdd_template,
+                    cluster_config=cluster_config,
+                    workflow_name=workflow_name,
+                    shared_fixtures=self.tdd_compiler.shared_fixtures,
+                    estimated_duration=estimated_duration
+                )
             
             # Validate the generated code
             if not self._validate_generated_code(playwright_code):
@@ -87,6 +127,180 @@ class PlaywrightGeneratorService:
                 cluster_config.get('password', '')
             )
     
+    def support_files(self, cluster_config: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Files a session's specs import, written once next to them
+        
+        Args:
+            cluster_config: Cluster configuration (url, username, password)
+            
+        Returns:
+            Dictionary of {path relative to the specs: content}; empty when specs declare their own helpers
+        """
+        if not self.tdd_compiler.shared_fixtures:
+            return {}
+        return {FIXTURES_PATH: fixtures_module(cluster_config.get('url', ''))}
+    
+    @traced()
+    async def check_and_repair(self, playwright_tests: Dict[str, str], tdd_templates: Dict[str, str],
+                               cluster_config: Dict[str, Any]) -> Tuple[Dict[str, str], Dict[str, List[str]]]:
+        """
+        Type-check a session's specs in one compiler run and regenerate only the broken ones
+        
+        Broken specs are sent back to the LLM with their compiler errors. Specs that still
+        don't compile after the repair attempts are replaced by basic generation.
+        
+        Args:
+            playwright_tests: Dictionary of {workflow_name: playwright_code}
+            tdd_templates: Customized TDD template of each workflow
+            cluster_config: Cluster configuration (url, username, password)
+            
+        Returns:
+            Specs to run, and the compile errors of any spec that must not run
+        """
+        if not self.compile_check:
+            return playwright_tests, {}
+        
+        specs = dict(playwright_tests)
+        support_files = self.support_files(cluster_config)
+        errors = await self.spec_compiler.check(specs, support_files)
+        
+        for attempt in range(self.repair_attempts):
+            if not errors:
+                break
+            broken = list(errors)
+            logger.warning(f"Compile errors in {', '.join(broken)}, regenerating (attempt {attempt + 1})")
+            
+            # Cached snippets produced the broken code, so the next session must not reuse them
+            if self.generation_mode == "steps":
+                for workflow_name in broken:
+                    self._forget_steps(tdd_templates[workflow_name], cluster_config)
+            
+            repairs = await asyncio.gather(*[
+                self.azure_openai.repair_playwright_test(
+                    workflow_name, specs[workflow_name], [str(error) for error in errors[workflow_name]]
+                )
+                for workflow_name in broken
+            ], return_exceptions=True)
+            
+            repaired = {}
+            for workflow_name, code in zip(broken, repairs):
+                if isinstance(code, Exception):
+                    logger.warning(f"Failed to repair the {workflow_name} spec: {str(code)}")
+                elif self._validate_generated_code(code):
+                    repaired[workflow_name] = code
+            if not repaired:
+                break
+            
+            specs.update(repaired)
+            remaining = {name: errs for name, errs in errors.items() if name not in repaired}
+            remaining.update(await self.spec_compiler.check(repaired, support_files))
+            errors = remaining
+        
+        if errors:
+            logger.warning(f"Using basic generation for specs that still don't compile: {', '.join(errors)}")
+            fallback = {
+                workflow_name: self._generate_basic_playwright_test(
+                    workflow_name, tdd_templates[workflow_name],
+                    cluster_config.get('url', ''),
+                    cluster_config.get('username', ''),
+                    cluster_config.get('password', '')
+                )
+                for workflow_name in errors
+            }
+            specs.update(fallback)
+            errors = await self.spec_compiler.check(fallback, support_files)
+        
+        return specs, {name: [str(error) for error in errs] for name, errs in errors.items()}
+    
+    def _forget_steps(self, tdd_template: str, cluster_config: Dict[str, Any]):
+        """Drop the cached snippets of a template's steps"""
+        values = parameter_values(cluster_config)
+        for test_case in self._extract_test_cases_from_tdd(tdd_template):
+            for step in test_case['steps']:
+                self.step_cache.discard(parameterize(step, values))
+        self.step_cache.save()
+    
+    async def _generate_from_steps(self, workflow_name: str, tdd_template: str,
+                                   cluster_config: Dict[str, Any]) -> str:
+        """
+        Generate a spec from cached step snippets, asking the LLM only for uncached steps
+        
+        Args:
+            workflow_name: Name of the workflow
+            tdd_template: Customized TDD template content
+            cluster_config: Cluster configuration (url, username, password)
+            
+        Returns:
+            Playwright TypeScript test code
+        """
+        test_cases = self._extract_test_cases_from_tdd(tdd_template)
+        if not test_cases:
+            raise ValueError(f"No test cases found in TDD template for {workflow_name}")
+        
+        # One lookup per distinct step, in template order; snippets by normalized step.
+        # The cache holds steps and snippets with parameter placeholders instead of values.
+        values = parameter_values(cluster_config)
+        snippets: Dict[str, str] = {}
+        missing: Dict[str, str] = {}
+        for test_case in test_cases:
+            for step in test_case['steps']:
+                key = normalize_step(step)
+                if key in snippets or key in missing:
+                    continue
+                cached = self.step_cache.get(parameterize(step, values))
+                if cached is None:
+                    missing[key] = step
+                else:
+                    snippets[key] = fill_parameters(cached, values)
+        
+        logger.info(f"Step generation for {workflow_name}: {len(snippets)} cached, {len(missing)} new step(s)")
+        
+        if missing:
+            generated = await self.azure_openai.generate_step_snippets(list(missing.values()), workflow_name)
+            for key, step in missing.items():
+                snippet = generated.get(step)
+                if snippet and snippet.count('{') == snippet.count('}'):
+                    self.step_cache.put(parameterize(step, values), parameterize(snippet, values))
+                    snippets[key] = snippet
+                else:
+                    # Not cached, so the next run asks again
+                    logger.warning(f"No usable snippet generated for step: {step}")
+                    snippets[key] = self._convert_tdd_step_to_playwright(step)
+            self.step_cache.save()
+        
+        return self._assemble_spec_from_steps(workflow_name, test_cases, snippets, cluster_config.get('url', ''))
+    
+    def _assemble_spec_from_steps(self, workflow_name: str, test_cases: List[Dict[str, Any]],
+                                  snippets: Dict[str, str], cluster_url: str) -> str:
+        """Build a spec whose tests run the snippets of their steps, keyed by normalized step, in order"""
+        
+        tests = ""
+        for test_case in test_cases:
+            test_name = test_case['name']
+            tests += f"""
+  test('{test_name.replace('_', ' ')}', async ({{ page }}) => {{
+    // Test: {test_name}
+    await page.goto(process.env.CLUSTER_URL || '{cluster_url}');
+"""
+            for step in test_case['steps']:
+                tests += f"\n    // {step}\n"
+                for line in snippets[normalize_step(step)].splitlines():
+                    tests += f"    {line}\n" if line.strip() else "\n"
+            
+            tests += self._storage_state_save_code(test_name)
+            tests += "  });\n"
+        
+        # Snippets compiled by rules call the compiler's helper functions
+        support_code = self.tdd_compiler.support_code(tests, cluster_url)
+        
+        return f"""import {{ test, expect, Page, Locator }} from '@playwright/test';
+
+{support_code}
+test.describe('{workflow_name} Tests', () => {{
+{tests}}});
+"""
+    
     def _validate_generated_code(self, code: str) -> bool:
         """Validate that the generated code is proper Playwright test code"""
         try:
@@ -132,146 +346,26 @@ class PlaywrightGeneratorService:
                 "timestamp": datetime.now().isoformat()
             }
     
-    # Fallback methods (keep existing implementation as backup)
+    # Fallback methods
     def _generate_basic_playwright_test(self, workflow_name: str, tdd_template: str,
                                       cluster_url: str, username: str, password: str) -> str:
-        """Generate a basic Playwright test structure (fallback)"""
-        
-        # Sanitize workflow name for test function
-        sanitized_name = workflow_name.replace('_', ' ').title().replace(' ', '')
-        
-        # Extract test cases from TDD template
-        test_cases = self._extract_test_cases_from_tdd(tdd_template)
-        
-        # Generate the Playwright test
-        playwright_code = f'''import {{ test, expect, Page }} from '@playwright/test';
-
-test.describe('{workflow_name} Tests', () => {{
-  let page: Page;
-
-  test.beforeEach(async ({{ browser }}) => {{
-    page = await browser.newPage();
-    // Setup for {workflow_name}
-  }});
-
-  test.afterEach(async () => {{
-    await page.close();
-  }});
-
-'''
-        
-        # Add test cases
-        for i, test_case in enumerate(test_cases):
-            test_function = self._generate_test_function_from_case(test_case, cluster_url, username, password)
-            playwright_code += test_function + '\n\n'
-        
-        # Close the describe block
-        playwright_code += '});'
-        
-        return playwright_code
+        """Compile the Playwright test with the TDD rulebook (fallback); credentials come from the environment"""
+        return self.tdd_compiler.compile(
+            workflow_name, tdd_template, {"url": cluster_url, "username": username, "password": password}
+        ).code
     
     def _extract_test_cases_from_tdd(self, tdd_template: str) -> List[Dict[str, Any]]:
-        """Extract test cases from TDD template"""
-        test_cases = []
-        
-        # Split template into sections
-        sections = tdd_template.split('\n\n')
-        current_test = None
-        
-        for section in sections:
-            lines = section.strip().split('\n')
-            if not lines:
-                continue
-                
-            first_line = lines[0].strip()
-            
-            # Check if this is a test case name
-            if first_line.startswith('test_') and not first_line.startswith('Given:'):
-                if current_test:
-                    test_cases.append(current_test)
-                
-                current_test = {
-                    'name': first_line,
-                    'steps': []
-                }
-            elif current_test and (first_line.startswith('Given:') or 
-                                 first_line.startswith('When:') or 
-                                 first_line.startswith('Then:')):
-                # Add steps to current test
-                for line in lines:
-                    if line.strip() and (line.startswith('Given:') or 
-                                       line.startswith('When:') or 
-                                       line.startswith('Then:')):
-                        current_test['steps'].append(line.strip())
-        
-        # Add the last test case
-        if current_test:
-            test_cases.append(current_test)
-        
-        return test_cases
-    
-    def _generate_test_function_from_case(self, test_case: Dict[str, Any],
-                                        cluster_url: str, username: str, password: str) -> str:
-        """Generate a Playwright test function from a test case"""
-        
-        test_name = test_case['name']
-        steps = test_case.get('steps', [])
-        
-        # Create test function
-        test_code = f'''  test('{test_name.replace('_', ' ')}', async () => {{
-    // Test: {test_name}
-    
-    // Navigate to cluster
-    await page.goto('{cluster_url}');
+        """Extract test cases and their Given/When/Then steps from TDD template"""
+        return extract_test_cases(tdd_template)
     
-'''
-        
-        # Convert TDD steps to Playwright actions
-        for step in steps:
-            playwright_action = self._convert_tdd_step_to_playwright(step, username, password)
-            if playwright_action:
-                test_code += f'    {playwright_action}\n'
-        
-        test_code += '  });'
-        
-        return test_code
+    def _storage_state_save_code(self, test_name: str) -> str:
+        """Save the logged-in state so downstream workflows can skip the login UI"""
+        return storage_state_save_code(test_name)
     
-    def _convert_tdd_step_to_playwright(self, step: str, username: str, password: str) -> str:
-        """Convert a TDD step to Playwright action"""
-        
-        step_lower = step.lower()
-        
-        # Handle different types of steps
-        if step.startswith('Given:'):
-            return f'// Setup: {step[6:].strip()}'
-        
-        elif step.startswith('When:') and 'navigate' in step_lower:
-            return 'await page.goto(arguments[0]);'
-        
-        elif step.startswith('When:') and 'enter' in step_lower and 'username' in step_lower:
-            return f"await page.fill('input[name=\"username\"], input[id=\"username\"]', '{username}');"
-        
-        elif step.startswith('When:') and 'enter' in step_lower and 'password' in step_lower:
-            return f"await page.fill('input[type=\"password\"]', '{password}');"
-        
-        elif step.startswith('When:') and 'click' in step_lower and 'login' in step_lower:
-            return "await page.click('button[type=\"submit\"], button:has-text(\"login\"), button:has-text(\"sign in\")');"
-        
-        elif step.startswith('When:') and 'click' in step_lower:
-            # Extract what to click from the step
-            click_target = step[5:].strip().replace('The user clicks on', '').replace('clicks on', '').strip()
-            return f"await page.click('text={click_target}');"
-        
-        elif step.startswith('Then:') and 'should' in step_lower:
-            if 'home page' in step_lower:
-                return "await expect(page).toHaveURL(/home|dashboard|main/);"
-            elif 'title' in step_lower:
-                return "await expect(page.locator('title, h1, .title')).toBeVisible();"
-            else:
-                return f"// Verify: {step[5:].strip()}"
-        
-        else:
-            return f"// {step}"
+    def _convert_tdd_step_to_playwright(self, step: str) -> str:
+        """Convert a TDD step to Playwright statements with the rulebook"""
+        _, lines = self.tdd_compiler.compile_step(step)
+        return "\n".join(lines)
     
     # Keep all existing methods for backward compatibility
     def generate_test_from_steps(self, 
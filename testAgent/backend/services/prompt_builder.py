@@ -0,0 +1,302 @@
+"""
+Prompt Builder - Token-budgeted prompts for Playwright generation and per-session token accounting
+File: backend/services/prompt_builder.py
+"""
+
+import logging
+import asyncio
+import os
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional, Tuple
+from core.config import settings
+from services.tdd_compiler import FIXTURES_IMPORT, fixtures_api
+
+logger = logging.getLogger(__name__)
+
+# Instructions for every generation request; the executor writes the Playwright config itself
+SYSTEM_PROMPT = """You write Playwright TypeScript tests for Cisco Catalyst Center, a Java enterprise web application.
+Respond with one complete spec file for the given TDD template; the test runner provides playwright.config.ts.
+Use multiple selector strategies (aria-label, data-test-name, data-test-id, CSS selectors, text content) to robustly find elements
+Implement retry logic for flaky actions like button clicks
+Add detailed logging throughout the test for better debugging
+Implement graceful error handling to make tests more resilient to timing issues
+Take screenshots at key points for debugging failures"""
+
+# Prompt sections that never apply to a generated spec
+IRRELEVANT_SECTIONS = ("Browser Configuration",)
+
+# Sections dropped, in this order, while a prompt is over its token limit
+OPTIONAL_SECTIONS = (
+    "Screenshots and Debugging",
+    "Test Organization",
+    "Error Handling and Reliability",
+    "Selectors Strategy (Priority Order)",
+)
+
+# Guidance lines only kept when the TDD template mentions one of their keywords
+LINE_KEYWORDS = {
+    "**File uploads**": ("upload", "file"),
+    "**File Upload**": ("upload", "file"),
+    "**Dropdown Selection**": ("dropdown", "select"),
+    "**Tables**": ("table", "column", "row"),
+    "**Dialogs**": ("dialog", "popup", "modal"),
+    "**Forms**": ("enter", "fill", "textbox", "field", "form"),
+    "**Text Input**": ("enter", "fill", "textbox", "type"),
+    "**Expansion controls**": ("expansion", "expand", "arrow"),
+    "**Expansion Arrows**": ("expansion", "expand", "arrow"),
+    "**More Options**": ("more options", "⋮", "..."),
+    "**Success Messages**": ("success",),
+}
+
+# Guidance lines the shared fixtures module makes unnecessary: login, stored auth state, menu navigation,
+# tree expansion and overflow menus, and the credentials themselves (the fixtures read them from the environment)
+FIXTURE_LINES = (
+    "Handle authentication", "**Reuse authenticated state**", "After a successful valid login",
+    "`process.env.AUTH_STORAGE_STATE`", "Use the cluster configuration for navigation and authentication",
+    "**Navigation**", "**Hamburger Menu**", "**Menu Items**", "**Expansion controls**", "**Expansion Arrows**",
+    "**More Options**", "**Clicks**", "**Text Input**", "- Username: {username}", "- Password: {password}",
+)
+
+# Sections the fixtures module implements: locate and clickOn follow the selector priority
+FIXTURE_SECTIONS = ("Selectors Strategy (Priority Order)",)
+
+FIXTURES_SECTION_AFTER = "Cluster Configuration"
+
+FIXTURES_SECTION = f"""## Shared Fixtures
+Login and navigation are implemented once per session in `{FIXTURES_IMPORT}`. Import what the spec uses from there and never re-implement them:
+```typescript
+{fixtures_api()}
+```
+- Open the page with `openApp(browser)`, which reuses a stored logged-in state, then call `ensureLoggedIn(page)`
+- Navigate with `navigateTo(page, 'Design', 'Network Hierarchy')` instead of clicking through the hamburger menu
+- Find and click elements by name with `locate` and `clickOn`, which try data-test-id, label, text and role in turn
+- In login tests, call `saveStorageState(page)` after a successful valid login
+
+"""
+
+# Output allowance: a fixed part for imports and structure plus a share per TDD step
+OUTPUT_TOKENS_BASE = 1000
+OUTPUT_TOKENS_BASE_WITH_FIXTURES = 600  # Login and helpers come from the fixtures module
+OUTPUT_TOKENS_PER_STEP = 120
+
+# Set once load_tokenizer succeeds; counting never loads it, since tiktoken downloads missing data
+_encoding = None
+_encoding_requested = False
+
+def _load_encoding():
+    """Load the model's tiktoken encoding; blocking, and fetches it over HTTPS unless cached"""
+    global _encoding
+    try:
+        if settings.TIKTOKEN_CACHE_DIR:
+            os.environ["TIKTOKEN_CACHE_DIR"] = settings.TIKTOKEN_CACHE_DIR
+        import tiktoken
+        try:
+            encoding = tiktoken.encoding_for_model(settings.AZURE_OPENAI_MODEL)
+        except KeyError:
+            encoding = tiktoken.get_encoding("cl100k_base")
+        _encoding = encoding
+        logger.info(f"Loaded the {encoding.name} tokenizer for prompt token counts")
+    except Exception as e:
+        logger.info(f"Tokenizer unavailable, estimating prompt tokens from text length: {e}")
+
+async def load_tokenizer(timeout: float = 10.0):
+    """
+    Load the tokenizer once in a worker thread, giving up waiting after the timeout
+
+    Until it is loaded, or with TOKENIZER_ENABLED off, token counts are estimated.
+    """
+    global _encoding_requested
+    if _encoding_requested or not settings.TOKENIZER_ENABLED:
+        return
+    _encoding_requested = True
+    try:
+        # tiktoken's download has no timeout; the thread is left to finish on its own
+        await asyncio.wait_for(asyncio.to_thread(_load_encoding), timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"Tokenizer did not load within {timeout:g}s, estimating prompt tokens from text length")
+
+def count_tokens(text: str) -> int:
+    """Count the tokens of a text locally, estimating about four characters per token without tiktoken"""
+    if not text:
+        return 0
+    encoding = _encoding
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+class TokenBudgetExceeded(Exception):
+    """Raised when an LLM request would take a session over its token budget"""
+
+class TokenLedger:
+    """Input and output tokens used by one session's LLM requests"""
+
+    def __init__(self, session_id: str, budget: Optional[int] = None):
+        self.session_id = session_id
+        self.budget = budget or None
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.requests = 0
+        self.rejected = 0
+
+    @property
+    def used(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    @property
+    def remaining(self) -> Optional[int]:
+        return None if self.budget is None else max(self.budget - self.used, 0)
+
+    def check(self, estimated_tokens: int):
+        """Raise TokenBudgetExceeded if a request of this size could exceed the budget"""
+        if self.budget is not None and self.used + estimated_tokens > self.budget:
+            self.rejected += 1
+            raise TokenBudgetExceeded(
+                f"Session {self.session_id} token budget exceeded: {self.used} of {self.budget} used, "
+                f"request needs up to {estimated_tokens}"
+            )
+
+    def record(self, usage: Dict[str, Any], estimated_prompt_tokens: int):
+        """Add a completed request, using the local estimate when the API reports no usage"""
+        self.requests += 1
+        self.prompt_tokens += usage.get("prompt_tokens") or estimated_prompt_tokens
+        self.completion_tokens += usage.get("completion_tokens") or 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.used,
+            "budget": self.budget,
+            "rejected_requests": self.rejected
+        }
+
+_current_ledger: ContextVar[Optional[TokenLedger]] = ContextVar("token_ledger", default=None)
+
+@contextmanager
+def token_ledger(session_id: str, budget: Optional[int] = None):
+    """Account the LLM requests made in the enclosed block to a session"""
+    ledger = TokenLedger(session_id, budget)
+    token = _current_ledger.set(ledger)
+    try:
+        yield ledger
+    finally:
+        _current_ledger.reset(token)
+
+def current_token_ledger() -> Optional[TokenLedger]:
+    """Get the token ledger of the session the current task works for"""
+    return _current_ledger.get()
+
+@dataclass
+class BuiltPrompt:
+    """A generation request sized to its token limits"""
+    system_prompt: str
+    prompt: str
+    prompt_tokens: int
+    max_output_tokens: int
+    dropped_sections: List[str] = field(default_factory=list)
+
+class PlaywrightPromptBuilder:
+    """Fill the Playwright prompt template with only the guidance a workflow needs"""
+
+    def __init__(self, prompt_template: str, max_input_tokens: int = None, max_output_tokens: int = None):
+        self.sections = self._split_sections(prompt_template)
+        self.max_input_tokens = max_input_tokens or settings.PROMPT_MAX_INPUT_TOKENS
+        self.max_output_tokens = max_output_tokens or settings.GENERATION_MAX_OUTPUT_TOKENS
+
+    @staticmethod
+    def _split_sections(prompt_template: str) -> List[Tuple[str, str]]:
+        """Split the template into (heading title, text) sections at ## and ### headings"""
+        sections = []
+        title, lines = "", []
+        for line in prompt_template.splitlines(keepends=True):
+            heading = re.match(r"#{2,3} (.+)", line)
+            if heading:
+                sections.append((title, "".join(lines)))
+                title, lines = heading.group(1).strip(), []
+            lines.append(line)
+        sections.append((title, "".join(lines)))
+        return [(title, text) for title, text in sections if text]
+
+    def build(self, workflow_name: str, tdd_template: str, cluster_config: Dict[str, Any],
+              shared_fixtures: bool = False) -> BuiltPrompt:
+        """
+        Build the prompt for a workflow within the input token limit
+
+        Args:
+            workflow_name: Name of the workflow, for logging
+            tdd_template: Customized TDD template content
+            cluster_config: Cluster configuration (url, username, password)
+            shared_fixtures: The spec imports login and navigation from the session's fixtures module
+
+        Returns:
+            Prompt, system prompt, prompt size and output token allowance
+        """
+        mentioned = tdd_template.lower()
+        sections = []
+        for title, text in self.sections:
+            if title in IRRELEVANT_SECTIONS or (shared_fixtures and title in FIXTURE_SECTIONS):
+                continue
+            sections.append((title, self._filter_lines(text, mentioned, shared_fixtures)))
+            if shared_fixtures and title == FIXTURES_SECTION_AFTER:
+                sections.append(("Shared Fixtures", FIXTURES_SECTION))
+        values = {
+            "tdd_template": tdd_template.strip(),
+            "cluster_url": cluster_config.get("url", ""),
+            "username": cluster_config.get("username", ""),
+            "password": cluster_config.get("password", "")
+        }
+
+        dropped = []
+        system_tokens = count_tokens(SYSTEM_PROMPT)
+        prompt = self._render(sections, values)
+        prompt_tokens = system_tokens + count_tokens(prompt)
+        for title in OPTIONAL_SECTIONS:
+            if prompt_tokens <= self.max_input_tokens:
+                break
+            if any(section_title == title for section_title, _ in sections):
+                sections = [(t, text) for t, text in sections if t != title]
+                dropped.append(title)
+                prompt = self._render(sections, values)
+                prompt_tokens = system_tokens + count_tokens(prompt)
+
+        if prompt_tokens > self.max_input_tokens:
+            logger.warning(f"Prompt for {workflow_name} is {prompt_tokens} tokens, "
+                           f"over the limit of {self.max_input_tokens} with all optional sections dropped")
+
+        step_count = len(re.findall(r"^\s*(Given|When|Then):", tdd_template, re.MULTILINE))
+        base_tokens = OUTPUT_TOKENS_BASE_WITH_FIXTURES if shared_fixtures else OUTPUT_TOKENS_BASE
+        max_output_tokens = min(self.max_output_tokens, base_tokens + OUTPUT_TOKENS_PER_STEP * step_count)
+
+        logger.info(f"Prompt for {workflow_name}: {prompt_tokens} input tokens, up to {max_output_tokens} "
+                    f"output tokens" + (f", dropped {', '.join(dropped)}" if dropped else ""))
+
+        return BuiltPrompt(
+            system_prompt=SYSTEM_PROMPT,
+            prompt=prompt,
+            prompt_tokens=prompt_tokens,
+            max_output_tokens=max_output_tokens,
+            dropped_sections=dropped
+        )
+
+    @staticmethod
+    def _filter_lines(text: str, mentioned: str, shared_fixtures: bool = False) -> str:
+        """Drop guidance lines for UI elements the TDD template never mentions, and those the fixtures cover"""
+        kept = []
+        for line in text.splitlines(keepends=True):
+            if shared_fixtures and any(marker in line for marker in FIXTURE_LINES):
+                continue
+            keywords = next((words for marker, words in LINE_KEYWORDS.items() if marker in line), None)
+            if keywords is None or any(word in mentioned for word in keywords):
+                kept.append(line)
+        return "".join(kept)
+
+    @staticmethod
+    def _render(sections: List[Tuple[str, str]], values: Dict[str, str]) -> str:
+        """Join the sections and fill in the placeholders; other braces in the template are code"""
+        prompt = "".join(text for _, text in sections)
+        return re.sub(r"\{(tdd_template|cluster_url|username|password)\}",
+                      lambda match: str(values[match.group(1)]), prompt)
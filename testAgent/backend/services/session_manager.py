@@ -9,6 +9,7 @@ from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
 import uuid
+from core.tracing import traced
 
 logger = logging.getLogger(__name__)
 
@@ -17,10 +18,13 @@ class SessionStatus(str, Enum):
     CREATED = "created"
     PARSING = "parsing"
     PARSED = "parsed"
+    QUEUED = "queued"
     GENERATING = "generating"
     EXECUTING = "executing"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
+    TIMED_OUT = "timed_out"
     EXPIRED = "expired"
     TERMINATED = "terminated"
 
@@ -57,6 +61,7 @@ class SessionManagerService:
         self.sessions: Dict[str, UserSession] = {}
         self.session_timeout = session_timeout  # seconds
         
+    @traced()
     async def create_session(self, session_id: str, instruction: str, 
                            workflows: List[str], parameters: Dict[str, Any],
                            cluster_config: Dict[str, Any], user_id: str = None) -> UserSession:
@@ -143,6 +148,7 @@ class SessionManagerService:
         logger.info(f"Updated session {session_id} status to: {status}")
         return True
     
+    @traced()
     async def store_execution_results(self, session_id: str, results: Dict[str, Any]) -> bool:
         """Store execution results in session"""
         session = await self.get_session(session_id)
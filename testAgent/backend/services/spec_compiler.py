@@ -0,0 +1,181 @@
+"""
+Spec Compiler - Batched TypeScript checks of generated Playwright specs before they run
+File: backend/services/spec_compiler.py
+"""
+
+import logging
+import asyncio
+import json
+import os
+import re
+import shlex
+import shutil
+import signal
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+from core.config import settings
+from core.metrics import SPEC_COMPILE_CHECKS
+
+logger = logging.getLogger(__name__)
+
+# tsc --pretty false output: file(line,column): error TScode: message
+COMPILE_ERROR = re.compile(r"^(?P<file>.+?)\((?P<line>\d+),(?P<column>\d+)\): error TS(?P<code>\d+): (?P<message>.*)$")
+
+# Missing modules and type definitions depend on the checking directory, not on the spec
+IGNORED_ERROR_CODES = {2307, 2580, 2591, 7016}
+
+TSCONFIG = {
+    "compilerOptions": {
+        "target": "ES2020",
+        "module": "commonjs",
+        "moduleResolution": "node",
+        "lib": ["ES2020", "DOM"],
+        "esModuleInterop": True,
+        "skipLibCheck": True,
+        "strict": False,
+        "noEmit": True
+    }
+}
+
+@dataclass
+class CompileError:
+    """A TypeScript diagnostic in a generated spec"""
+    workflow: str
+    line: int
+    column: int
+    code: int
+    message: str
+
+    def __str__(self) -> str:
+        return f"line {self.line}, column {self.column}: TS{self.code} {self.message}"
+
+class SpecCompiler:
+    """Type-check the specs of a session in one TypeScript compiler run"""
+
+    def __init__(self, command: str = None, timeout: float = None, work_dir: str = None,
+                 retry_after: float = None):
+        self.command = shlex.split(command or settings.SPEC_COMPILER_COMMAND)
+        self.timeout = timeout or settings.SPEC_COMPILE_TIMEOUT
+        self.retry_after = retry_after if retry_after is not None else settings.SPEC_COMPILER_RETRY_AFTER
+        # Inside the backend, so node resolves @playwright/test types from its node_modules
+        self.work_dir = Path(work_dir or os.path.join(settings.TEST_OUTPUT_DIR, ".compile"))
+        self.available: Optional[bool] = None
+        # When a compiler that failed to run is tried again; None while it's missing altogether
+        self.retry_at: Optional[float] = None
+        self.stats = {"runs": 0, "specs_checked": 0, "specs_with_errors": 0, "skipped": 0}
+
+    async def check(self, specs: Dict[str, str], support_files: Dict[str, str] = None) -> Dict[str, List[CompileError]]:
+        """
+        Type-check specs together
+
+        Args:
+            specs: Dictionary of {workflow_name: playwright_code}
+            support_files: Modules the specs import, by path relative to the specs
+
+        Returns:
+            Compile errors of each workflow that has any; empty when the compiler is unavailable
+        """
+        if not specs or (self.available is False and (self.retry_at is None or time.monotonic() < self.retry_at)):
+            self.stats["skipped"] += len(specs)
+            return {}
+
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        check_dir = Path(tempfile.mkdtemp(prefix="check-", dir=self.work_dir))
+        try:
+            for relative_path, content in (support_files or {}).items():
+                support_path = check_dir / relative_path
+                support_path.parent.mkdir(parents=True, exist_ok=True)
+                support_path.write_text(content, encoding="utf-8")
+            files = {}
+            for workflow_name, code in specs.items():
+                file_name = f"{workflow_name}.spec.ts"
+                (check_dir / file_name).write_text(code, encoding="utf-8")
+                files[file_name] = workflow_name
+            (check_dir / "tsconfig.json").write_text(
+                json.dumps(dict(TSCONFIG, files=list(files)), indent=2), encoding="utf-8"
+            )
+
+            output = await self._run_compiler(check_dir)
+            if output is None:
+                self.stats["skipped"] += len(specs)
+                return {}
+        finally:
+            shutil.rmtree(check_dir, ignore_errors=True)
+
+        errors: Dict[str, List[CompileError]] = {}
+        for line in output.splitlines():
+            match = COMPILE_ERROR.match(line.strip())
+            if not match or int(match.group("code")) in IGNORED_ERROR_CODES:
+                continue
+            workflow_name = files.get(Path(match.group("file")).name)
+            if workflow_name:
+                errors.setdefault(workflow_name, []).append(CompileError(
+                    workflow=workflow_name,
+                    line=int(match.group("line")),
+                    column=int(match.group("column")),
+                    code=int(match.group("code")),
+                    message=match.group("message")
+                ))
+
+        self.stats["runs"] += 1
+        self.stats["specs_checked"] += len(specs)
+        self.stats["specs_with_errors"] += len(errors)
+        for workflow_name in specs:
+            SPEC_COMPILE_CHECKS.inc(result="error" if workflow_name in errors else "ok")
+        logger.info(f"Type-checked {len(specs)} spec(s): {len(errors)} with errors")
+        return errors
+
+    async def _run_compiler(self, check_dir: Path) -> Optional[str]:
+        """Run tsc on the check directory, returning its output or None if it couldn't check"""
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *self.command, "--noEmit", "--pretty", "false", "-p", str(check_dir / "tsconfig.json"),
+                cwd=str(check_dir),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                start_new_session=True
+            )
+        except FileNotFoundError as e:
+            self._mark_unavailable(str(e), missing=True)
+            return None
+        except OSError as e:
+            self._mark_unavailable(str(e))
+            return None
+
+        try:
+            stdout, _ = await asyncio.wait_for(process.communicate(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"TypeScript check timed out after {self.timeout}s, running specs unchecked")
+            os.killpg(process.pid, signal.SIGKILL)
+            await process.wait()
+            return None
+        except asyncio.CancelledError:
+            os.killpg(process.pid, signal.SIGKILL)
+            raise
+
+        output = stdout.decode("utf-8", errors="replace")
+        if process.returncode != 0 and not any(COMPILE_ERROR.match(line.strip()) for line in output.splitlines()):
+            # A failure without diagnostics means tsc itself couldn't run this time
+            self._mark_unavailable(output.strip().splitlines()[-1] if output.strip() else f"exit code {process.returncode}")
+            return None
+
+        self.available = True
+        self.retry_at = None
+        return output
+
+    def _mark_unavailable(self, reason: str, missing: bool = False):
+        """Stop checking for good when the command doesn't exist, else until the retry delay passed"""
+        self.available = False
+        if missing:
+            self.retry_at = None
+            logger.warning(f"TypeScript compiler not found ({' '.join(self.command)}), specs run unchecked: {reason}")
+            return
+        self.retry_at = time.monotonic() + self.retry_after
+        logger.warning(f"TypeScript compiler failed to run ({' '.join(self.command)}), specs run unchecked "
+                       f"for {self.retry_after:.0f}s: {reason}")
+
+    def get_statistics(self) -> Dict[str, object]:
+        return dict(self.stats, available=self.available)
@@ -0,0 +1,139 @@
+"""
+Step Snippet Cache - Generated Playwright code for individual TDD steps
+File: backend/services/step_cache.py
+"""
+
+import logging
+import json
+import os
+import re
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional
+from core.config import settings
+from core.metrics import STEP_CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+STEP_KEYWORDS = ("Given:", "When:", "Then:")
+
+def normalize_step(step: str) -> str:
+    """
+    Normalize a TDD step so equivalent wordings share a cache entry
+
+    The keyword is kept, since a Then step asserts what a When step does.
+    Case, whitespace, quote style and trailing punctuation are not significant.
+    """
+    step = step.strip()
+    keyword = ""
+    for candidate in STEP_KEYWORDS:
+        if step.startswith(candidate):
+            keyword, step = candidate[:-1].lower(), step[len(candidate):]
+            break
+    text = step.lower().replace('"', "'").replace("‘", "'").replace("’", "'")
+    text = re.sub(r"\s+", " ", text).strip().rstrip(".!;")
+    return f"{keyword}: {text}" if keyword else text
+
+def parameter_values(cluster_config: Dict[str, Any]) -> Dict[str, str]:
+    """Template placeholder names of the cluster settings filled into a session's steps"""
+    values = {
+        "cluster_url": cluster_config.get('url', ''),
+        "username": cluster_config.get('username', ''),
+        "password": cluster_config.get('password', '')
+    }
+    return {name: str(value) for name, value in values.items() if value}
+
+def parameterize(text: str, values: Dict[str, str]) -> str:
+    """
+    Put {{name}} placeholders back in place of filled-in parameter values
+
+    Cache keys and snippets are stored this way, so credentials never reach the
+    cache file and sessions with other clusters or users share entries.
+    """
+    for name, value in sorted(values.items(), key=lambda item: len(item[1]), reverse=True):
+        text = text.replace(value, f"{{{{{name}}}}}")
+    return text
+
+def fill_parameters(text: str, values: Dict[str, str]) -> str:
+    """Fill a parameterized snippet with this session's values"""
+    for name, value in values.items():
+        text = text.replace(f"{{{{{name}}}}}", value)
+    return text
+
+class StepSnippetCache:
+    """LRU cache of Playwright snippets by normalized step, optionally persisted as JSON"""
+
+    def __init__(self, max_size: int = None, path: Optional[str] = None):
+        self.max_size = max_size or settings.STEP_CACHE_SIZE
+        self.path = Path(path) if path else None
+        self._snippets: "OrderedDict[str, str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self):
+        if not self.path or not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                snippets = json.load(f)
+            for key, snippet in list(snippets.items())[-self.max_size:]:
+                self._snippets[key] = snippet
+            logger.info(f"Loaded {len(self._snippets)} cached step snippets from {self.path}")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable step cache {self.path}: {e}")
+
+    def get(self, step: str) -> Optional[str]:
+        """Get the snippet for a step, if one was generated before"""
+        key = normalize_step(step)
+        snippet = self._snippets.get(key)
+        if snippet is None:
+            self.misses += 1
+            STEP_CACHE_LOOKUPS.inc(result="miss")
+            return None
+        self._snippets.move_to_end(key)
+        self.hits += 1
+        STEP_CACHE_LOOKUPS.inc(result="hit")
+        return snippet
+
+    def put(self, step: str, snippet: str):
+        """Store a snippet, evicting the least recently used entry when full"""
+        key = normalize_step(step)
+        self._snippets[key] = snippet
+        self._snippets.move_to_end(key)
+        while len(self._snippets) > self.max_size:
+            self._snippets.popitem(last=False)
+
+    def discard(self, step: str):
+        """Forget a step's snippet, e.g. after it produced a spec that doesn't compile"""
+        self._snippets.pop(normalize_step(step), None)
+
+    def save(self):
+        """Write the cache to its file so other processes and restarts reuse it"""
+        if not self.path:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._snippets, f, indent=1)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Failed to save step cache to {self.path}: {e}")
+
+    def clear(self):
+        self._snippets.clear()
+
+    def __len__(self) -> int:
+        return len(self._snippets)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._snippets),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "path": str(self.path) if self.path else None
+        }
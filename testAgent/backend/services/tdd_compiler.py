@@ -0,0 +1,667 @@
+"""
+TDD Compiler - Rule-based translation of TDD Given/When/Then steps to Playwright code
+File: backend/services/tdd_compiler.py
+"""
+
+import logging
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Any, Optional, Pattern, Tuple
+from core.config import settings
+from core.metrics import TDD_RULE_STEPS
+
+logger = logging.getLogger(__name__)
+
+STEP_KEYWORDS = ("Given", "When", "Then")
+
+# 'Let's Do It' is one quoted name: a quote only ends before a non-word character
+QUOTED = re.compile(r"(?<!\w)'(.+?)'(?!\w)|\"(.+?)\"")
+
+ORDINALS = {"first": 1, "second": 2, "third": 3, "fourth": 4, "fifth": 5}
+
+# Session-level module exporting every helper, next to the specs that import it
+FIXTURES_PATH = "common/fixtures.ts"
+FIXTURES_IMPORT = "./common/fixtures"
+
+# Helper functions a compiled spec may call, in definition order: declared in the spec only when used,
+# or all exported once per session by the shared fixtures module.
+# Element lookups follow the selector priority of prompt.md: data-test-id, aria-label, text, role.
+HELPERS = {
+    "openApp": """async function openApp(browser: Browser): Promise<Page> {
+  // A stored authenticated state from login_flow starts the page logged in
+  const page = await browser.newPage({ storageState: process.env.AUTH_STORAGE_STATE || undefined });
+  await page.goto(CLUSTER_URL);
+  return page;
+}""",
+    "testId": """function testId(name: string): string {
+  return name.toLowerCase().replace(/[^a-z0-9]+/g, '-').replace(/^-+|-+$/g, '');
+}""",
+    "firstVisible": """async function firstVisible(candidates: Locator[]): Promise<Locator> {
+  // Wait for any candidate, then take the visible one with the highest priority
+  let found: Locator | undefined;
+  await expect.poll(async () => {
+    for (const candidate of candidates) {
+      if (await candidate.first().isVisible()) {
+        found = candidate.first();
+        return true;
+      }
+    }
+    return false;
+  }, { timeout: 30000 }).toBe(true);
+  return found as Locator;
+}""",
+    "locate": """async function locate(page: Page, name: string): Promise<Locator> {
+  return firstVisible([
+    page.locator(`[data-test-id="${testId(name)}"]`),
+    page.getByLabel(name, { exact: true }),
+    page.getByText(name, { exact: true }),
+    page.getByRole('button', { name }),
+    page.getByRole('link', { name }),
+    page.getByRole('menuitem', { name }),
+  ]);
+}""",
+    "clickOn": """async function clickOn(page: Page, name: string) {
+  await (await locate(page, name)).click();
+}""",
+    "fillField": """async function fillField(page: Page, label: string, value: string) {
+  const input = await firstVisible([
+    page.locator(`[data-test-id="${testId(label)}"]`),
+    page.getByLabel(label),
+    page.getByPlaceholder(label),
+    page.getByRole('textbox', { name: label }),
+  ]);
+  await input.fill(value);
+}""",
+    "fillCredentials": """async function fillCredentials(page: Page, username: string, password: string) {
+  await page.locator('input[name="username"], input[id="username"]').first().fill(username);
+  await page.locator('input[type="password"]').first().fill(password);
+}""",
+    "submitLogin": """async function submitLogin(page: Page) {
+  await page.locator('button[type="submit"]').or(page.getByRole('button', { name: /log ?in|sign ?in/i })).first().click();
+}""",
+    "ensureLoggedIn": """async function ensureLoggedIn(page: Page) {
+  // A stored authenticated state skips the login form
+  await page.waitForLoadState('networkidle');
+  if (await page.locator('input[type="password"]').first().isVisible()) {
+    await fillCredentials(page, process.env.CLUSTER_USERNAME || '', process.env.CLUSTER_PASSWORD || '');
+    await submitLogin(page);
+    await page.waitForLoadState('networkidle');
+  }
+}""",
+    "openMenu": """async function openMenu(page: Page) {
+  await page.locator('[data-test-id="hamburger-menu"]').or(page.getByRole('button', { name: /menu/i })).or(page.getByText('☰')).first().click();
+}""",
+    "navigateTo": """async function navigateTo(page: Page, ...items: string[]) {
+  // Hamburger menu, then each menu item in turn
+  await openMenu(page);
+  for (const item of items) {
+    await clickOn(page, item);
+  }
+  await page.waitForLoadState('networkidle');
+}""",
+    "saveStorageState": """async function saveStorageState(page: Page) {
+  // Lets later workflows start logged in
+  if (process.env.STORAGE_STATE_PATH) {
+    await page.context().storageState({ path: process.env.STORAGE_STATE_PATH });
+  }
+}""",
+    "expandNode": """async function expandNode(page: Page, name: string) {
+  const node = page.getByText(name, { exact: true }).first().locator('xpath=..');
+  await node.locator('[data-test-id="expand-arrow"]').or(node.locator('[aria-expanded="false"]')).or(node.getByText('▶')).first().click();
+}""",
+    "expandAll": """async function expandAll(page: Page) {
+  const collapsed = page.locator('[role="tree"] [aria-expanded="false"], [data-test-id="expand-arrow"][aria-expanded="false"]');
+  for (let i = 0; i < 50 && await collapsed.count() > 0; i++) {
+    await collapsed.first().click();
+  }
+}""",
+    "openMoreOptions": """async function openMoreOptions(page: Page, name: string) {
+  const row = page.getByText(name, { exact: true }).first().locator('xpath=..');
+  await row.hover();
+  await row.locator('[data-test-id="more-options"]').or(row.getByRole('button', { name: /more|options|overflow/i })).or(row.getByText('⋮')).first().click();
+}""",
+    "numberAbove": """function numberAbove(page: Page, label: string): Locator {
+  return page.getByText(label, { exact: true }).first().locator('xpath=..').getByText(/^\\s*\\d+\\s*$/).first();
+}""",
+}
+
+# Building blocks of the other helpers, exported but left out of prompts
+INTERNAL_HELPERS = ("testId", "firstVisible")
+
+def ts(value: str) -> str:
+    """TypeScript string literal for a value"""
+    return json.dumps(value, ensure_ascii=False)
+
+def quoted_names(text: str) -> List[str]:
+    """Names quoted in a step, in order"""
+    return [single or double for single, double in QUOTED.findall(text)]
+
+def expect_text(text: str) -> str:
+    return f"await expect(page.getByText({ts(text)}).first()).toBeVisible();"
+
+def wait_for_page() -> str:
+    return "await page.waitForLoadState('networkidle');"
+
+def extend_timeout(milliseconds: int) -> str:
+    """Give the test time for a long wait on top of the configured test timeout"""
+    return f"test.setTimeout(test.info().timeout + {milliseconds});"
+
+def extract_test_cases(tdd_template: str) -> List[Dict[str, Any]]:
+    """Extract test cases and their Given/When/Then steps from a TDD template"""
+    test_cases = []
+    current_test = None
+
+    # Steps usually follow their test name directly, without a blank line
+    for line in tdd_template.split('\n'):
+        line = line.strip()
+        if line.startswith('test_'):
+            if current_test:
+                test_cases.append(current_test)
+            current_test = {'name': line, 'steps': []}
+        elif current_test and line.startswith(tuple(f"{keyword}:" for keyword in STEP_KEYWORDS)):
+            current_test['steps'].append(line)
+
+    if current_test:
+        test_cases.append(current_test)
+
+    return test_cases
+
+def storage_state_save_code(test_name: str) -> str:
+    """Save the logged-in state so downstream workflows can skip the login UI"""
+    if 'login' not in test_name or 'invalid' in test_name:
+        return ''
+
+    return ('    if (process.env.STORAGE_STATE_PATH) {\n'
+            '      await page.context().storageState({ path: process.env.STORAGE_STATE_PATH });\n'
+            '    }\n')
+
+@dataclass
+class StepRule:
+    """A step phrase pattern and the Playwright statements it compiles to"""
+    name: str
+    pattern: Pattern[str]
+    render: Callable[[re.Match, "StepContext"], List[str]]
+    keywords: Tuple[str, ...] = STEP_KEYWORDS
+
+class Rulebook:
+    """
+    Ordered phrase-to-action rules; the first rule whose pattern is found in a step wins
+
+    The default rulebook ends with catch-all rules, so project rules that refine
+    a phrase are registered with first=True.
+    """
+
+    def __init__(self, rules: List[StepRule] = None):
+        self.rules: List[StepRule] = list(rules or [])
+
+    def add(self, rule: StepRule, first: bool = False):
+        """Add a rule, before the existing ones when it refines them"""
+        if first:
+            self.rules.insert(0, rule)
+        else:
+            self.rules.append(rule)
+
+    def rule(self, pattern: str, keywords: Tuple[str, ...] = STEP_KEYWORDS, name: str = None, first: bool = False):
+        """Register the decorated function as the renderer of a case-insensitive phrase pattern"""
+        def decorator(render: Callable[[re.Match, "StepContext"], List[str]]):
+            self.add(StepRule(name or render.__name__, re.compile(pattern, re.IGNORECASE), render, keywords), first)
+            return render
+        return decorator
+
+    def copy(self) -> "Rulebook":
+        return Rulebook(self.rules)
+
+    def match(self, keyword: str, text: str) -> Optional[Tuple[StepRule, re.Match]]:
+        for step_rule in self.rules:
+            if keyword in step_rule.keywords:
+                match = step_rule.pattern.search(text)
+                if match:
+                    return step_rule, match
+        return None
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+@dataclass
+class StepContext:
+    """State shared by the steps of one test case"""
+    rulebook: Rulebook
+    test_name: str
+    credentials: str = "valid"
+    screenshots: int = 0
+
+    def compile_phrase(self, keyword: str, text: str) -> Optional[List[str]]:
+        """Compile part of a step, for rules that combine several actions"""
+        found = self.rulebook.match(keyword, text)
+        return found[0].render(found[1], self) if found else None
+
+    def screenshot(self) -> str:
+        self.screenshots += 1
+        path = f"{self.test_name}-{self.screenshots}.png"
+        return f"await page.screenshot({{ path: test.info().outputPath({ts(path)}), fullPage: true }});"
+
+@dataclass
+class CompiledSpec:
+    """A spec compiled from a TDD template and the steps no rule matched"""
+    workflow_name: str
+    code: str
+    total_steps: int
+    unmatched_steps: List[str] = field(default_factory=list)
+    # Matched steps that compile to no statements, like preconditions earlier steps establish
+    empty_steps: int = 0
+
+    @property
+    def coverage(self) -> float:
+        """Share of the steps that compile to statements; steps matched without any don't count"""
+        steps = self.total_steps - self.empty_steps
+        if not steps:
+            return 0.0
+        return (steps - len(self.unmatched_steps)) / steps
+
+    @property
+    def unmatched_actions(self) -> List[str]:
+        """Unmatched When and Then steps, which the spec would silently leave out"""
+        return [step for step in self.unmatched_steps if step.startswith(("When", "Then"))]
+
+DEFAULT_RULEBOOK = Rulebook()
+rule = DEFAULT_RULEBOOK.rule
+
+# Login preconditions
+
+@rule(r"logged into .*?sees (?P<text>'.+'|\".+\")", keywords=("Given",))
+def logged_in(match, context):
+    return ["await ensureLoggedIn(page);"] + [expect_text(text) for text in quoted_names(match.group("text"))]
+
+@rule(r"user with an? (?P<validity>valid|invalid) username", keywords=("Given",))
+def credentials(match, context):
+    context.credentials = match.group("validity").lower()
+    if context.credentials == "valid":
+        return ["// Credentials come from CLUSTER_USERNAME and CLUSTER_PASSWORD"]
+    return [
+        "await page.context().clearCookies();",
+        "await page.goto(CLUSTER_URL);",
+        "await fillCredentials(page, 'invalid-user', 'invalid-password');",
+    ]
+
+# Login
+
+@rule(r"navigates to \S+ login page")
+def open_login_page(match, context):
+    return ["await page.goto(CLUSTER_URL);"]
+
+@rule(r"enters credentials and clicks? (?:on )?(?:the )?log ?in button")
+def login(match, context):
+    if context.credentials == "invalid":
+        lines = ["await fillCredentials(page, 'invalid-user', 'invalid-password');"]
+    else:
+        lines = ["await fillCredentials(page, process.env.CLUSTER_USERNAME || '', process.env.CLUSTER_PASSWORD || '');"]
+    return lines + ["await submitLogin(page);"]
+
+@rule(r"clicks? (?:on )?(?:the )?log ?in(?: in)? button")
+def click_login(match, context):
+    return ["await submitLogin(page);"]
+
+# Navigation
+
+@rule(r"hamburger menu")
+def hamburger_menu(match, context):
+    return ["await openMenu(page);"]
+
+@rule(r"clicks? on menu item (?P<item>'.+?'|\".+?\")")
+def menu_item(match, context):
+    lines = [f"await clickOn(page, {ts(quoted_names(match.group('item'))[0])});"]
+    if "navigate" in match.string.lower():
+        lines.append(wait_for_page())
+    return lines
+
+@rule(r"clicks? on (?P<option>'.+?'|\".+?\") option under")
+def option_under_section(match, context):
+    return [f"await clickOn(page, {ts(quoted_names(match.group('option'))[0])});"]
+
+@rule(r"(?:is navigated|navigates) to (?P<target>.+?)(?: page| panel)?$", keywords=("When",))
+def navigated(match, context):
+    return [wait_for_page()] + [expect_text(text) for text in quoted_names(match.group("target"))]
+
+@rule(r"views the .+ page|waits till .*(?:navigated|page loads)", keywords=("When",))
+def page_loads(match, context):
+    return [wait_for_page()]
+
+# Waits and screenshots
+
+@rule(r"waits for (?P<seconds>\d+) seconds?")
+def wait_seconds(match, context):
+    milliseconds = int(match.group("seconds")) * 1000
+    return [extend_timeout(milliseconds), f"await page.waitForTimeout({milliseconds});"]
+
+@rule(r"waits for the (?P<name>.+?) button to be enabled")
+def wait_until_enabled(match, context):
+    name = match.group("name").strip("'\"")
+    lines = [
+        extend_timeout(600000),
+        f"await expect(await locate(page, {ts(name[:1].upper() + name[1:])})).toBeEnabled({{ timeout: 600000 }});"
+    ]
+    if "screenshot" in match.string.lower():
+        lines.append(context.screenshot())
+    return lines
+
+@rule(r"takes? (?:a )?screenshot|able to take (?:a )?screenshot")
+def screenshot(match, context):
+    return [context.screenshot()]
+
+# Dialogs and file uploads
+
+@rule(r"file picker dialog (?P<event>opens|closes)(?:,? (?:and )?user (?P<rest>.+))?")
+def file_picker(match, context):
+    # Files are set on the upload input directly, so the native picker never opens
+    if match.group("event").lower() == "opens" or not match.group("rest"):
+        return ["// The file is set on the upload input without the native file picker"]
+    # None when the trailing action doesn't compile, so the step counts as unmatched
+    return context.compile_phrase("When", match.group("rest"))
+
+@rule(r"clicks? on (?P<area>'[^']*upload[^']*'|\"[^\"]*upload[^\"]*\")")
+def upload_area(match, context):
+    return ["await expect(page.locator('input[type=\"file\"]').first()).toBeAttached();"]
+
+@rule(r"looks for the (?P<file>.+?) by scrolling and selects|selects the file (?P<named>\S+)")
+def select_file(match, context):
+    file_name = (match.group("file") or match.group("named")).strip("'\"")
+    return [f"await page.locator('input[type=\"file\"]').first().setInputFiles([process.env.UPLOAD_DIR || '.', {ts(file_name)}].join('/'));"]
+
+@rule(r"the (?P<dialog>.+?) dialog opens(?:,? user (?P<rest>.+))?$")
+def dialog_opens(match, context):
+    lines = [f"await expect(page.getByRole('dialog').filter({{ hasText: {ts(match.group('dialog'))} }})).toBeVisible();"]
+    if match.group("rest"):
+        rest = context.compile_phrase("When", match.group("rest"))
+        if rest is None:
+            return None
+        lines.extend(rest)
+    return lines
+
+@rule(r"enters (?P<value>'.+?'|\".+?\"|\S+) in the search box")
+def search_box(match, context):
+    value = quoted_names(match.group("value")) or [match.group("value")]
+    return [f"await page.getByRole('searchbox').or(page.getByPlaceholder(/search/i)).first().fill({ts(value[0])});"]
+
+@rule(r"clicks? on expansion or dropdown arrow")
+def dropdown_arrow(match, context):
+    return ["await page.getByRole('dialog').getByRole('combobox').or(page.getByRole('dialog').locator('[aria-haspopup=\"listbox\"]')).first().click();"]
+
+# Trees and overflow menus
+
+@rule(r"selects the (?P<item>.+?) by clicking on the expansion arrow of (?P<path>.+)$")
+def select_in_tree(match, context):
+    nodes = [node.strip() for node in match.group("path").split(" and ")]
+    return [f"await expandNode(page, {ts(node)});" for node in nodes] + [f"await clickOn(page, {ts(match.group('item'))});"]
+
+@rule(r"expansion arrows? of all, selects the (?P<item>.+?) and clicks? on (?P<button>'.+?'|\".+?\")")
+def select_in_expanded_tree(match, context):
+    return [
+        "await expandAll(page);",
+        f"await clickOn(page, {ts(match.group('item'))});",
+        f"await clickOn(page, {ts(quoted_names(match.group('button'))[0])});",
+    ]
+
+@rule(r"clicks? on expansion arrow of (?P<node>.+)$")
+def expand(match, context):
+    return [f"await expandNode(page, {ts(match.group('node'))});"]
+
+@rule(r"\"more options\" or \"overflow menu\" for (?P<name>.+)$|more options for (?P<other>.+)$")
+def more_options(match, context):
+    return [f"await openMoreOptions(page, {ts(match.group('name') or match.group('other'))});"]
+
+# Tables
+
+@rule(r"selects (?:the )?checkbox of (?P<ordinal>first|second|third|fourth|fifth) (?:device|row)")
+def select_row(match, context):
+    # Row 0 is the header row
+    return [f"await page.getByRole('row').nth({ORDINALS[match.group('ordinal').lower()]}).getByRole('checkbox').check();"]
+
+@rule(r"selects the checkbox select all")
+def select_all_rows(match, context):
+    return ["await page.getByRole('row').first().getByRole('checkbox').check();"]
+
+@rule(r"clicks? on the numeric value or number shown above (?P<label>'.+?'|\".+?\")")
+def click_number(match, context):
+    return [f"await numberAbove(page, {ts(quoted_names(match.group('label'))[0])}).click();"]
+
+# Forms
+
+@rule(r"enters (?P<label>[A-Z][\w ]*?): (?P<value>.+)$")
+def enter_labelled_value(match, context):
+    return [f"await fillField(page, {ts(match.group('label'))}, {ts(match.group('value'))});"]
+
+@rule(r"enters (?P<value>'.+?'|\".+?\"|\S+) in (?:the )?(?P<label>.+?) (?:textbox|text box|field|input)(?P<rest>.*)$")
+def enter_value(match, context):
+    value = quoted_names(match.group("value")) or [match.group("value")]
+    lines = [f"await fillField(page, {ts(match.group('label'))}, {ts(value[0])});"]
+    if re.search(r"selects? (?:the )?first option", match.group("rest"), re.IGNORECASE):
+        lines.append("await page.getByRole('option').first().click();")
+    return lines
+
+# Clicks
+
+@rule(r"(?:clicks?|selects?|chooses?) .*?(?:'.+?'|\".+?\")", keywords=("When",))
+def click_quoted(match, context):
+    return [f"await clickOn(page, {ts(name)});" for name in quoted_names(match.string)]
+
+@rule(r"clicks? on (?:the )?(?P<name>[^'\"]+?)(?: button| option| link)?$", keywords=("When",))
+def click_named(match, context):
+    return [f"await clickOn(page, {ts(match.group('name'))});"]
+
+@rule(r"(?:sees|verifies|shows) .*?(?:'.+?'|\".+?\")", keywords=("When",))
+def see_quoted(match, context):
+    return [expect_text(text) for text in quoted_names(match.string)]
+
+# Outcomes
+
+@rule(r"land into the home page", keywords=("Then",))
+def home_page(match, context):
+    return [wait_for_page(), "await expect(page.locator('input[type=\"password\"]')).toHaveCount(0);"]
+
+@rule(r"title element be present", keywords=("Then",))
+def title_present(match, context):
+    return ["await expect(page).toHaveTitle(/\\S/);"]
+
+@rule(r"able to click on (?P<name>'.+?'|\".+?\")", keywords=("Then",))
+def clickable(match, context):
+    return [f"await expect(await locate(page, {ts(quoted_names(match.group('name'))[0])})).toBeEnabled();"]
+
+@rule(r"devices listed under column header (?P<column>'.+?'|\".+?\")", keywords=("Then",))
+def table_rows(match, context):
+    column = quoted_names(match.group("column"))[0]
+    return [
+        f"await expect(page.getByRole('columnheader', {{ name: {ts(column)} }}).first()).toBeVisible();",
+        "await expect(page.getByRole('row').nth(1)).toBeVisible();",
+    ]
+
+@rule(r"numeric value or number shown above (?P<label>'.+?'|\".+?\")", keywords=("Then",))
+def number_visible(match, context):
+    return [f"await expect(numberAbove(page, {ts(quoted_names(match.group('label'))[0])})).toBeVisible();"]
+
+@rule(r"(?:'.+?'|\".+?\")", keywords=("Then",))
+def quoted_text_visible(match, context):
+    return [expect_text(text) for text in quoted_names(match.string)]
+
+@rule(r"should be navigated (?:back )?to (?P<target>.+?)(?: page)?$", keywords=("Then",))
+def navigated_to(match, context):
+    # Page names like 'Provision / Inventory' show their last part as the heading
+    return [wait_for_page(), expect_text(match.group("target").split("/")[-1].strip())]
+
+@rule(r"hierarchy should show (?P<path>.+)$", keywords=("Then",))
+def hierarchy(match, context):
+    return [expect_text(node.strip()) for node in re.split(r"→|->|>", match.group("path")) if node.strip()]
+
+@rule(r"building (?P<building>.+?) should be visible under area (?P<area>.+)$", keywords=("Then",))
+def building_under_area(match, context):
+    return [expect_text(match.group("area")), expect_text(match.group("building"))]
+
+@rule(r"(?:fabric site for|fabric name) (?P<name>.+?) should be (?:visible|displayed)"
+      r"|should display .+? for (?P<owner>.+)$", keywords=("Then",))
+def name_visible(match, context):
+    return [expect_text(match.group("name") or match.group("owner"))]
+
+@rule(r"should see (?P<name>.+?) under (?P<parent>.+?)(?: scope)?$", keywords=("Then",))
+def item_under(match, context):
+    return [expect_text(match.group("parent")), expect_text(match.group("name"))]
+
+@rule(r"^the devices should be assigned to (?P<site>.+)$", keywords=("Then",))
+def assigned_to(match, context):
+    return [expect_text(match.group("site"))]
+
+@rule(r"success confirmation|successfully created", keywords=("Then",))
+def success_message(match, context):
+    return ["await expect(page.getByText(/success/i).first()).toBeVisible();"]
+
+@rule(r"deployment progress indicators", keywords=("Then",))
+def progress_indicator(match, context):
+    return ["await expect(page.getByRole('progressbar').or(page.getByText(/in progress/i)).first()).toBeVisible();"]
+
+@rule(r"(?:page|interface) should (?:load successfully|be displayed)", keywords=("Then",))
+def page_displayed(match, context):
+    return [wait_for_page()]
+
+# Other preconditions
+
+@rule(r"^(?P<state>.+)$", keywords=("Given",))
+def precondition(match, context):
+    # Earlier test cases of the serial spec and dependency workflows leave the application in this state
+    return []
+
+class TDDCompiler:
+    """Compile TDD templates to Playwright specs without an LLM"""
+
+    def __init__(self, rulebook: Rulebook = None, shared_fixtures: bool = None):
+        self.rulebook = rulebook or DEFAULT_RULEBOOK
+        # Import helpers from the session's fixtures module instead of declaring them in every spec
+        self.shared_fixtures = settings.SHARED_FIXTURES if shared_fixtures is None else shared_fixtures
+
+    def compile_step(self, step: str, context: StepContext = None) -> Tuple[Optional[str], List[str]]:
+        """
+        Compile one TDD step
+
+        Args:
+            step: Step line, e.g. "When: The user clicks on 'Next' button"
+            context: State of the test case the step belongs to
+
+        Returns:
+            Name of the matching rule, None if no rule matched, and the step's statements
+        """
+        context = context or StepContext(self.rulebook, "test")
+        keyword, _, text = step.partition(":")
+        keyword, text = keyword.strip(), text.strip().rstrip(".")
+        found = self.rulebook.match(keyword, text)
+        if found:
+            step_rule, match = found
+            lines = step_rule.render(match, context)
+            if lines is not None:
+                TDD_RULE_STEPS.inc(result="compiled")
+                return step_rule.name, lines
+        TDD_RULE_STEPS.inc(result="unmatched")
+        return None, ["// No rule matched this step"]
+
+    def compile(self, workflow_name: str, tdd_template: str, cluster_config: Dict[str, Any]) -> CompiledSpec:
+        """
+        Compile a customized TDD template to a serial Playwright spec
+
+        Test cases share one page and run in template order, since each continues
+        where the previous one left the application.
+
+        Args:
+            workflow_name: Name of the workflow
+            tdd_template: Customized TDD template content
+            cluster_config: Cluster configuration; only the URL ends up in the spec, the password is masked in step comments
+
+        Returns:
+            The spec and the steps no rule matched
+        """
+        password = cluster_config.get('password')
+        total, empty, unmatched = 0, 0, []
+        tests = ""
+        for test_case in extract_test_cases(tdd_template):
+            test_name = test_case['name']
+            context = StepContext(self.rulebook, test_name)
+            tests += f"""
+  test('{test_name.replace('_', ' ')}', async () => {{
+    // Test: {test_name}
+"""
+            for step in test_case['steps']:
+                total += 1
+                rule_name, lines = self.compile_step(step, context)
+                if rule_name is None:
+                    unmatched.append(step)
+                elif not lines:
+                    empty += 1
+                comment = step.replace(password, "********") if password else step
+                tests += f"\n    // {comment}\n" + "".join(f"    {line}\n" for line in lines)
+
+            tests += storage_state_save_code(test_name)
+            tests += "  });\n"
+
+        body = f"""test.describe.configure({{ mode: 'serial' }});
+
+test.describe('{workflow_name} Tests', () => {{
+  let page: Page;
+
+  test.beforeAll(async ({{ browser }}) => {{
+    page = await openApp(browser);
+  }});
+
+  test.afterAll(async () => {{
+    await page.close();
+  }});
+{tests}}});
+"""
+        code = f"""import {{ test, expect, Browser, Page, Locator }} from '@playwright/test';
+
+{self.support_code(body, cluster_config.get('url', ''))}
+{body}"""
+        spec = CompiledSpec(workflow_name=workflow_name, code=code, total_steps=total,
+                            unmatched_steps=unmatched, empty_steps=empty)
+        logger.info(f"Compiled {workflow_name} with rules: {total - len(unmatched)} of {total} steps")
+        return spec
+
+    def support_code(self, body: str, cluster_url: str) -> str:
+        """Declarations used by compiled statements: the cluster URL and the helpers they call, or their import"""
+        if self.shared_fixtures:
+            names = [name for name in ["CLUSTER_URL"] + list(HELPERS) if re.search(rf"\b{name}\b", body)]
+            return f"import {{ {', '.join(names)} }} from '{FIXTURES_IMPORT}';\n" if names else ""
+
+        used = {name for name in HELPERS if re.search(rf"\b{name}\(", body)}
+        # Helpers call each other; definitions come in dependency order
+        for name in reversed(list(HELPERS)):
+            if name in used:
+                used.update(other for other in HELPERS if re.search(rf"\b{other}\(", HELPERS[name]))
+
+        code = f"const CLUSTER_URL = process.env.CLUSTER_URL || {ts(cluster_url)};\n"
+        for name, helper in HELPERS.items():
+            if name in used:
+                code += f"\n{helper}\n"
+        return code
+
+def fixtures_module(cluster_url: str) -> str:
+    """
+    Shared login and navigation fixtures of a session, written once next to its specs
+
+    Args:
+        cluster_url: Fallback for CLUSTER_URL when the environment doesn't set it
+
+    Returns:
+        TypeScript module exporting CLUSTER_URL and every helper
+    """
+    code = ("import { expect, Browser, Locator, Page } from '@playwright/test';\n\n"
+            f"export const CLUSTER_URL = process.env.CLUSTER_URL || {ts(cluster_url)};\n")
+    for helper in HELPERS.values():
+        code += f"\nexport {helper}\n"
+    return code
+
+def fixtures_api() -> str:
+    """Compact signatures of the fixtures module's exports, for prompts"""
+    signatures = ["CLUSTER_URL: string"]
+    for name, helper in HELPERS.items():
+        if name in INTERNAL_HELPERS:
+            continue
+        match = re.match(r"(?:async )?function \w+\((.*?)\)(?:: (.+?))? \{", helper)
+        parameters = ", ".join(parameter.split(":")[0] for parameter in match.group(1).split(", "))
+        signatures.append(f"{name}({parameters})" + (f": {match.group(2)}" if match.group(2) else ""))
+    return "\n".join(signatures)
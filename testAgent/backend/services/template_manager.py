@@ -5,16 +5,36 @@ File: backend/services/template_manager.py
 
 import os
 import re
+import heapq
 import yaml
 import logging
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Set, Iterable
 from pathlib import Path
 from dataclasses import dataclass, field
 from enum import Enum
 from core.config import settings
+from core.tracing import traced
 
 logger = logging.getLogger(__name__)
 
+# Tie-break order for workflows that become ready at the same time during
+# topological sorting (lower number = higher priority)
+WORKFLOW_PRIORITIES: Dict[str, int] = {
+    "login_flow": 1,
+    "network_hierarchy_creation": 2,
+    "inventory_workflow": 3,
+    "fabric_creation": 4,
+    "device_provisioning": 5,
+    "l3vn_management": 6,
+    "fabric_settings": 7,
+    "get_fabric": 8
+}
+DEFAULT_WORKFLOW_PRIORITY = 999
+
+def get_workflow_priority(workflow_name: str) -> int:
+    """Get workflow priority for sorting (lower number = higher priority)"""
+    return WORKFLOW_PRIORITIES.get(workflow_name, DEFAULT_WORKFLOW_PRIORITY)
+
 class WorkflowType(str, Enum):
     """Workflow type enumeration"""
     CREATION = "creation"
@@ -55,6 +75,12 @@ class TemplateManagerService:
             WorkflowType.MODIFICATION: []
         }
         self.dependency_graph: Dict[str, List[str]] = {}
+        
+        # Dependency index, rebuilt whenever the template set changes
+        self.transitive_dependencies: Dict[str, Set[str]] = {}
+        self.topological_rank: Dict[str, int] = {}
+        self.graph_version: int = 0
+        
         self.playwright_prompt_template: Optional[str] = None
         
     async def initialize(self):
@@ -171,7 +197,8 @@ class TemplateManagerService:
             
             # Store template
             self.templates[template_name] = template
-            self.templates_by_type[metadata.workflow_type].append(template_name)
+            if template_name not in self.templates_by_type[metadata.workflow_type]:
+                self.templates_by_type[metadata.workflow_type].append(template_name)
             
             logger.info(f"Loaded template: {template_name} ({metadata.workflow_type.value}) with {len(parameters)} parameters")
             
@@ -338,7 +365,86 @@ class TemplateManagerService:
         # Validate dependency graph
         await self._validate_dependency_graph()
         
-        logger.info(f"Built dependency graph with {len(self.dependency_graph)} workflows")
+        # Precompute transitive closure and topological ranks
+        self._build_dependency_index()
+        
+        logger.info(f"Built dependency graph with {len(self.dependency_graph)} workflows (version {self.graph_version})")
+
+    def _build_dependency_index(self):
+        """Precompute transitive dependencies and topological rank for every workflow in the graph"""
+        
+        # Include dependencies that have no template of their own
+        nodes = set(self.dependency_graph)
+        for dependencies in self.dependency_graph.values():
+            nodes.update(dependencies)
+        
+        # Iterative post-order walk so deep chains don't hit the recursion limit
+        closure: Dict[str, Set[str]] = {}
+        for root in nodes:
+            if root in closure:
+                continue
+            stack = [(root, False)]
+            while stack:
+                node, expanded = stack.pop()
+                if node in closure:
+                    continue
+                dependencies = self.dependency_graph.get(node, [])
+                if expanded:
+                    node_closure = set(dependencies)
+                    for dep in dependencies:
+                        node_closure |= closure[dep]
+                    closure[node] = node_closure
+                    continue
+                stack.append((node, True))
+                for dep in dependencies:
+                    if dep not in closure:
+                        stack.append((dep, False))
+        
+        ordered = self._topological_sort(nodes)
+        
+        self.transitive_dependencies = closure
+        self.topological_rank = {workflow: rank for rank, workflow in enumerate(ordered)}
+        self.graph_version += 1
+
+    def _topological_sort(self, workflows: Iterable[str]) -> List[str]:
+        """Sort workflows by dependencies using Kahn's algorithm with priority tie-breaking"""
+        
+        workflows = list(dict.fromkeys(workflows))
+        workflow_set = set(workflows)
+        
+        # Create adjacency list and in-degree count
+        graph: Dict[str, List[str]] = {workflow: [] for workflow in workflows}
+        in_degree: Dict[str, int] = {workflow: 0 for workflow in workflows}
+        
+        for workflow in workflows:
+            for dep in self.dependency_graph.get(workflow, []):
+                if dep in workflow_set:  # Only consider dependencies that are in our workflow list
+                    graph[dep].append(workflow)
+                    in_degree[workflow] += 1
+        
+        # Priority keys are computed once; the heap keeps ready workflows in
+        # (priority, name) order so each step is O(log n) instead of a full re-sort
+        sort_keys = {workflow: (get_workflow_priority(workflow), workflow) for workflow in workflows}
+        ready = [sort_keys[workflow] for workflow in workflows if in_degree[workflow] == 0]
+        heapq.heapify(ready)
+        result = []
+        
+        while ready:
+            _, current = heapq.heappop(ready)
+            result.append(current)
+            
+            # Reduce in-degree of neighbors
+            for neighbor in graph[current]:
+                in_degree[neighbor] -= 1
+                if in_degree[neighbor] == 0:
+                    heapq.heappush(ready, sort_keys[neighbor])
+        
+        # Check if all workflows were processed (no cycles)
+        if len(result) != len(workflows):
+            remaining = workflow_set - set(result)
+            raise ValueError(f"Circular dependency detected involving: {remaining}")
+        
+        return result
 
     async def _validate_dependency_graph(self):
         """Validate dependency graph for circular dependencies and missing workflows"""
@@ -358,31 +464,34 @@ class TemplateManagerService:
     def _has_circular_dependencies(self) -> bool:
         """Check if there are circular dependencies in the workflow graph"""
         
-        def has_cycle_util(node: str, visited: set, rec_stack: set) -> bool:
-            visited.add(node)
-            rec_stack.add(node)
-            
-            for dependency in self.dependency_graph.get(node, []):
-                if dependency not in visited:
-                    if has_cycle_util(dependency, visited, rec_stack):
-                        return True
-                elif dependency in rec_stack:
-                    logger.error(f"Circular dependency detected: {node} -> {dependency}")
-                    return True
-            
-            rec_stack.remove(node)
-            return False
-        
         visited = set()
         rec_stack = set()
-        
+
+        # Iterative DFS with an explicit stack so deep chains don't hit the recursion limit
         for workflow in self.dependency_graph:
-            if workflow not in visited:
-                if has_cycle_util(workflow, visited, rec_stack):
+            if workflow in visited:
+                continue
+            visited.add(workflow)
+            rec_stack.add(workflow)
+            stack = [(workflow, iter(self.dependency_graph.get(workflow, [])))]
+
+            while stack:
+                node, dependencies = stack[-1]
+                dependency = next(dependencies, None)
+                if dependency is None:
+                    rec_stack.remove(node)
+                    stack.pop()
+                elif dependency in rec_stack:
+                    logger.error(f"Circular dependency detected: {node} -> {dependency}")
                     return True
-        
+                elif dependency not in visited:
+                    visited.add(dependency)
+                    rec_stack.add(dependency)
+                    stack.append((dependency, iter(self.dependency_graph.get(dependency, []))))
+
         return False
 
+    @traced(record_args=("workflow_name",))
     async def load_tdd_template(self, workflow_name: str) -> str:
         """Load TDD template content for a specific workflow"""
         
@@ -399,6 +508,9 @@ class TemplateManagerService:
                 logger.info(f"Reloading modified template: {workflow_name}")
                 workflow_type = template.workflow_type
                 await self._load_single_template_with_metadata(file_path, workflow_type)
+                
+                # Dependencies may have changed, refresh the index
+                await self._build_dependency_graph()
         
         return self.templates[workflow_name].content
 
@@ -413,11 +525,38 @@ class TemplateManagerService:
         
         return self.dependency_graph.get(workflow_name, [])
 
+    async def get_transitive_dependencies(self, workflow_name: str) -> Set[str]:
+        """Get all direct and indirect dependencies for a specific workflow"""
+        
+        return self.transitive_dependencies.get(workflow_name, set())
+
+    async def resolve_execution_order(self, workflows: List[str]) -> List[str]:
+        """Get workflows plus all their transitive dependencies in execution order"""
+        
+        required = set(workflows)
+        for workflow in workflows:
+            required |= self.transitive_dependencies.get(workflow, set())
+        
+        return await self.sort_by_rank(required)
+
+    async def sort_by_rank(self, workflows: Iterable[str]) -> List[str]:
+        """Sort workflows by precomputed topological rank"""
+        
+        workflows = list(workflows)
+        
+        # Workflows outside the index (no template, not a known dependency)
+        # can't be placed by rank, so sort this set from scratch
+        if any(workflow not in self.topological_rank for workflow in workflows):
+            return self._topological_sort(workflows)
+        
+        return sorted(workflows, key=self.topological_rank.__getitem__)
+
     async def get_workflows_by_type(self, workflow_type: WorkflowType) -> List[str]:
         """Get all workflows of a specific type"""
         
         return self.templates_by_type.get(workflow_type, [])
 
+    @traced()
     async def customize_template(self, template_content: str, parameters: Dict[str, Any]) -> str:
         """Customize template by replacing parameter placeholders with actual values"""
         
@@ -640,6 +779,7 @@ Generate the complete Playwright test now:
             },
             "total_dependencies": sum(len(deps) for deps in self.dependency_graph.values()),
             "workflows_with_dependencies": len([w for w, deps in self.dependency_graph.items() if deps]),
+            "graph_version": self.graph_version,
             "standalone_workflows": len([w for w, t in self.templates.items() if t.metadata.can_run_standalone]),
             "fabric_dependent_workflows": len([w for w, t in self.templates.items() if t.metadata.requires_existing_fabric])
         }
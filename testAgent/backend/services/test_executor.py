@@ -9,14 +9,40 @@ import subprocess
 import os
 import json
 import random
-from typing import Dict, List, Any, Optional
+import hashlib
+import signal
+import time
+from typing import Dict, List, Any, Optional, Set
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from core.config import settings
+from core.metrics import track_stage, TEST_RUNS
+from services.artifact_manager import ArtifactManagerService
+from core.tracing import traced
 
 logger = logging.getLogger(__name__)
 
+# Workflow whose successful run produces the authenticated browser state
+LOGIN_WORKFLOW = "login_flow"
+
+# Artifact kinds recorded in the manifest, by Playwright attachment name and file suffix
+ARTIFACT_KINDS = {
+    "screenshot": "screenshots",
+    "video": "videos",
+    "trace": "traces"
+}
+# Seconds a cancelled Playwright run gets to exit after SIGTERM before it is killed
+PROCESS_KILL_GRACE = 5.0
+
+ARTIFACT_SUFFIXES = {
+    ".png": "screenshots",
+    ".jpeg": "screenshots",
+    ".jpg": "screenshots",
+    ".webm": "videos",
+    ".zip": "traces"
+}
+
 @dataclass
 class TestResult:
     """Test execution result"""
@@ -51,15 +77,39 @@ class TestExecutorService:
         self.active_executions: Dict[str, TestExecution] = {}
         self.use_real_playwright = use_real_playwright
         
+        # Authenticated storage states shared across sessions, one per cluster and credential set
+        self.auth_state_dir = self.output_dir / ".auth"
+        self.auth_state_dir.mkdir(mode=0o700, exist_ok=True)
+        
+        # Shared Playwright configs keyed by content fingerprint
+        self.config_dir = self.output_dir / ".config"
+        self.config_dir.mkdir(exist_ok=True)
+        self._config_paths: Dict[str, Path] = {}
+        
+        # Retention, compression and size budgets for everything under output_dir
+        self.artifact_manager = ArtifactManagerService(self.output_dir)
+        self.storage_state_ttl = settings.STORAGE_STATE_TTL
+        
+        # Results gathered before a session's execution was cancelled, by session
+        self._interrupted_results: Dict[str, Dict[str, Any]] = {}
+        
+    @traced(record_args=("session_id",))
     async def execute_tests(self, session_id: str, playwright_tests: Dict[str, str], 
-                           cluster_config: Dict[str, Any]) -> Dict[str, Any]:
+                           cluster_config: Dict[str, Any],
+                           dependencies: Optional[Dict[str, Set[str]]] = None,
+                           compile_errors: Optional[Dict[str, List[str]]] = None,
+                           support_files: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
         """
         Execute multiple Playwright tests for a session
         
         Args:
             session_id: Session identifier
-            playwright_tests: Dictionary of {workflow_name: playwright_code}
+            playwright_tests: Dictionary of {workflow_name: playwright_code}, in execution order
             cluster_config: Cluster configuration
+            dependencies: Transitive dependencies of each workflow; workflows whose
+                dependencies failed are skipped instead of run
+            compile_errors: TypeScript errors of specs that don't compile; these fail without a browser run
+            support_files: Modules the specs import, such as the shared fixtures, by path relative to the specs
             
         Returns:
             Dictionary with execution results
@@ -70,6 +120,14 @@ class TestExecutorService:
             # Create output directory for this session
             session_output_dir = self.output_dir / session_id
             session_output_dir.mkdir(exist_ok=True)
+            self.artifact_manager.mark_session(session_output_dir)
+            
+            # Written once for all of the session's specs
+            for relative_path, content in (support_files or {}).items():
+                support_path = session_output_dir / relative_path
+                support_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(support_path, 'w', encoding='utf-8') as f:
+                    f.write(content)
             
             # Results storage
             execution_results = {
@@ -78,42 +136,107 @@ class TestExecutorService:
                 "total_tests": len(playwright_tests),
                 "passed_tests": 0,
                 "failed_tests": 0,
+                "skipped_tests": 0,
                 "test_results": {},
                 "error_message": None,
                 "execution_summary": [],
                 "execution_mode": "real_playwright" if self.use_real_playwright else "simulation"
             }
             
+            # Workflows that failed or were skipped, whose dependents can't succeed
+            unsuccessful: Set[str] = set()
+            
             # Execute each workflow test
             for workflow_name, playwright_code in playwright_tests.items():
+                failed_dependencies = sorted((dependencies or {}).get(workflow_name, set()) & unsuccessful)
+                if failed_dependencies:
+                    logger.info(f"Skipping {workflow_name}: depends on failed {', '.join(failed_dependencies)}")
+                    execution_results["test_results"][workflow_name] = {
+                        "status": "skipped",
+                        "duration": 0,
+                        "message": f"Skipped because {', '.join(failed_dependencies)} failed",
+                        "failed_dependencies": failed_dependencies
+                    }
+                    execution_results["execution_summary"].append({
+                        "workflow": workflow_name,
+                        "status": "skipped",
+                        "failed_dependencies": failed_dependencies
+                    })
+                    execution_results["skipped_tests"] += 1
+                    unsuccessful.add(workflow_name)
+                    TEST_RUNS.inc(status="skipped")
+                    continue
+                
+                spec_errors = (compile_errors or {}).get(workflow_name)
+                if spec_errors:
+                    logger.warning(f"Not running {workflow_name}: its spec doesn't compile")
+                    execution_results["test_results"][workflow_name] = {
+                        "status": "failed",
+                        "duration": 0,
+                        "error": f"Generated spec has {len(spec_errors)} TypeScript compile error(s)",
+                        "compile_errors": spec_errors
+                    }
+                    execution_results["execution_summary"].append({
+                        "workflow": workflow_name,
+                        "status": "failed",
+                        "compile_errors": spec_errors
+                    })
+                    execution_results["failed_tests"] += 1
+                    execution_results["success"] = False
+                    unsuccessful.add(workflow_name)
+                    TEST_RUNS.inc(status="failed")
+                    continue
+                
                 logger.info(f"Executing test for workflow: {workflow_name}")
                 
                 try:
                     # Save test code to file
                     test_file_path = session_output_dir / f"{workflow_name}.spec.ts"
-                    with open(test_file_path, 'w', encoding='utf-8') as f:
-                        f.write(playwright_code)
+                    with track_stage("file_write"):
+                        with open(test_file_path, 'w', encoding='utf-8') as f:
+                            f.write(playwright_code)
                     
                     logger.info(f"Saved test file: {test_file_path}")
                     
-                    # Execute test (real or simulated)
+                    # Reuse the login from an earlier run instead of repeating the login UI
+                    storage_state = None
                     if self.use_real_playwright:
-                        test_result = await self._execute_real_playwright_test(
-                            workflow_name, test_file_path, cluster_config, session_output_dir
-                        )
+                        storage_state = self.get_storage_state(cluster_config)
+                    
+                    # Execute test (real or simulated)
+                    if storage_state and workflow_name == LOGIN_WORKFLOW:
+                        # Already logged in to this cluster with these credentials; dependents start from the state
+                        logger.info(f"Not running {workflow_name}: using the storage state saved by an earlier login")
+                        test_result = {
+                            "status": "passed",
+                            "duration": 0,
+                            "message": "Logged in with the storage state saved by an earlier run"
+                        }
+                    elif self.use_real_playwright:
+                        with track_stage("playwright_run"):
+                            test_result = await self._execute_real_playwright_test(
+                                workflow_name, test_file_path, cluster_config, session_output_dir,
+                                storage_state=storage_state
+                            )
+                        
+                        if workflow_name == LOGIN_WORKFLOW:
+                            self._record_login_result(cluster_config, test_result["status"] == "passed")
                     else:
                         test_result = await self._simulate_test_execution(
                             workflow_name, test_file_path, cluster_config
                         )
                     
                     execution_results["test_results"][workflow_name] = test_result
+                    TEST_RUNS.inc(status=test_result["status"])
                     execution_results["execution_summary"].append({
                         "workflow": workflow_name,
                         "status": test_result["status"],
                         "duration": test_result.get("duration", 0),
                         "test_file": str(test_file_path),
                         "screenshot": test_result.get("screenshot_path"),
-                        "video": test_result.get("video_path")
+                        "video": test_result.get("video_path"),
+                        "artifacts": test_result.get("artifacts"),
+                        "reused_auth_state": storage_state is not None
                     })
                     
                     if test_result["status"] == "passed":
@@ -121,6 +244,7 @@ class TestExecutorService:
                     else:
                         execution_results["failed_tests"] += 1
                         execution_results["success"] = False
+                        unsuccessful.add(workflow_name)
                         
                 except Exception as e:
                     logger.error(f"Failed to execute test for {workflow_name}: {str(e)}")
@@ -131,6 +255,10 @@ class TestExecutorService:
                     }
                     execution_results["failed_tests"] += 1
                     execution_results["success"] = False
+                    unsuccessful.add(workflow_name)
+            
+            # Keep the session within its disk budget
+            await self.artifact_manager.enforce_session_budget(session_output_dir)
             
             # Overall success if all tests passed
             if execution_results["failed_tests"] == 0:
@@ -139,11 +267,19 @@ class TestExecutorService:
             else:
                 execution_results["success"] = False
                 execution_results["error_message"] = f"{execution_results['failed_tests']} test(s) failed"
+                if execution_results["skipped_tests"]:
+                    execution_results["error_message"] += f", {execution_results['skipped_tests']} skipped after failed dependencies"
             
-            logger.info(f"Test execution completed for session {session_id}: {execution_results['passed_tests']} passed, {execution_results['failed_tests']} failed")
+            logger.info(f"Test execution completed for session {session_id}: {execution_results['passed_tests']} passed, {execution_results['failed_tests']} failed, {execution_results['skipped_tests']} skipped")
             
             return execution_results
             
+        except asyncio.CancelledError:
+            # Keep what finished so the caller can report it alongside the skipped workflows
+            logger.warning(f"Test execution cancelled for session {session_id}")
+            self._interrupted_results[session_id] = execution_results
+            raise
+            
         except Exception as e:
             logger.error(f"Error executing tests for session {session_id}: {str(e)}")
             return {
@@ -155,8 +291,10 @@ class TestExecutorService:
                 "failed_tests": len(playwright_tests)
             }
     
+    @traced(record_args=("workflow_name",))
     async def _execute_real_playwright_test(self, workflow_name: str, test_file_path: Path,
-                                          cluster_config: Dict[str, Any], output_dir: Path) -> Dict[str, Any]:
+                                          cluster_config: Dict[str, Any], output_dir: Path,
+                                          storage_state: Optional[Path] = None) -> Dict[str, Any]:
         """
         Execute real Playwright test
         
@@ -165,6 +303,7 @@ class TestExecutorService:
             test_file_path: Path to the test file
             cluster_config: Cluster configuration
             output_dir: Output directory for results
+            storage_state: Authenticated storage state to start the browser context with
             
         Returns:
             Real test execution result
@@ -174,17 +313,14 @@ class TestExecutorService:
         start_time = datetime.now()
         
         try:
-            # Create playwright config file
-            config_path = await self._create_playwright_config(test_file_path.parent, output_dir)
+            # Shared config, written once per distinct set of config settings
+            config_path = self._get_playwright_config_path()
             
             # Prepare Playwright command
             cmd = [
                 "npx", "playwright", "test",
-                str(test_file_path),
-                f"--config={config_path}",
-                "--reporter=json",
-                "--headed" if not settings.PLAYWRIGHT_HEADLESS else "--headless",
-                f"--timeout={settings.PLAYWRIGHT_TIMEOUT}"
+                str(test_file_path.resolve()),
+                f"--config={config_path}"
             ]
             
             # Set environment variables
@@ -192,19 +328,39 @@ class TestExecutorService:
             env.update({
                 "CLUSTER_URL": cluster_config.get("url", ""),
                 "CLUSTER_USERNAME": cluster_config.get("username", ""),
-                "CLUSTER_PASSWORD": cluster_config.get("password", "")
+                "CLUSTER_PASSWORD": cluster_config.get("password", ""),
+                # Where a successful login should save the browser storage state
+                "STORAGE_STATE_PATH": str(self._storage_state_path(cluster_config))
             })
             
-            # Execute the test
+            # Each run reports into its own directory so artifacts are indexed per run
+            run_output_dir = output_dir / "runs" / workflow_name
+            run_output_dir.mkdir(parents=True, exist_ok=True)
+            (run_output_dir / "results.json").unlink(missing_ok=True)
+            
+            # Per-run values read by the shared config
+            env.update(self._playwright_run_env(test_file_path.parent, run_output_dir, storage_state))
+            
+            if storage_state:
+                # Tells the spec its browser context is already logged in
+                env["AUTH_STORAGE_STATE"] = str(storage_state)
+            
+            # Execute the test in its own process group, so npx, node and the browsers can be stopped together
             process = await asyncio.create_subprocess_exec(
                 *cmd,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
                 cwd=test_file_path.parent,
-                env=env
+                env=env,
+                start_new_session=True
             )
             
-            stdout, stderr = await process.communicate()
+            try:
+                stdout, stderr = await process.communicate()
+            except asyncio.CancelledError:
+                # Don't leave the browser holding the slot
+                await self._terminate_process_group(process)
+                raise
             
             execution_time = (datetime.now() - start_time).total_seconds()
             
@@ -229,16 +385,20 @@ class TestExecutorService:
                     "test_cases": []
                 }
             
-            # Look for generated artifacts
-            screenshots_dir = output_dir / "test-results"
-            if screenshots_dir.exists():
-                screenshots = list(screenshots_dir.glob("**/*.png"))
-                if screenshots:
-                    result["screenshot_path"] = str(screenshots[0])
-                
-                videos = list(screenshots_dir.glob("**/*.webm"))
-                if videos:
-                    result["video_path"] = str(videos[0])
+            # Index the artifacts produced by this run
+            manifest = self._build_artifact_manifest(run_output_dir)
+            result["test_cases"] = manifest["test_cases"]
+            result["artifacts"] = {kind: manifest[kind] for kind in ARTIFACT_KINDS.values()}
+            if manifest["screenshots"]:
+                result["screenshot_path"] = manifest["screenshots"][0]
+            if manifest["videos"]:
+                result["video_path"] = manifest["videos"][0]
+            
+            # Passed runs keep only their summary
+            if await self.artifact_manager.finalize_run(run_output_dir, result["status"] == "passed"):
+                result["artifacts"] = {kind: [] for kind in ARTIFACT_KINDS.values()}
+                result.pop("screenshot_path", None)
+                result.pop("video_path", None)
             
             logger.info(f"Real Playwright test execution for {workflow_name}: {result['status']} in {execution_time:.2f}s")
             
@@ -255,14 +415,111 @@ class TestExecutorService:
                 "message": f"Real Playwright test {workflow_name} failed with error"
             }
     
-    async def _create_playwright_config(self, test_dir: Path, output_dir: Path) -> Path:
-        """Create Playwright configuration file"""
-        config_content = f"""
+    async def _terminate_process_group(self, process: asyncio.subprocess.Process):
+        """Stop a Playwright run and every process it started"""
+        if process.returncode is not None:
+            return
+        
+        def send(sig):
+            try:
+                os.killpg(process.pid, sig)
+            except ProcessLookupError:
+                pass
+        
+        send(signal.SIGTERM)
+        try:
+            await asyncio.wait_for(process.wait(), timeout=PROCESS_KILL_GRACE)
+        except asyncio.TimeoutError:
+            send(signal.SIGKILL)
+            await process.wait()
+        # Children may outlive the group leader
+        send(signal.SIGKILL)
+        logger.info(f"Terminated Playwright process group {process.pid}")
+    
+    def take_interrupted_results(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Get and forget the results gathered before a session's execution was cancelled"""
+        return self._interrupted_results.pop(session_id, None)
+    
+    def _build_artifact_manifest(self, run_output_dir: Path) -> Dict[str, Any]:
+        """
+        Build the artifact manifest for one run from its Playwright JSON report
+        
+        Args:
+            run_output_dir: Output directory of the run
+            
+        Returns:
+            Manifest with per test case attachments and flat lists per artifact kind
+        """
+        manifest = {"test_cases": [], **{kind: [] for kind in ARTIFACT_KINDS.values()}}
+        
+        report_path = run_output_dir / "results.json"
+        try:
+            with open(report_path, 'r', encoding='utf-8') as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            # No usable report, fall back to this run's own artifact directory
+            logger.warning(f"No JSON report in {run_output_dir}, scanning run artifacts")
+            self._scan_run_artifacts(run_output_dir / "test-results", manifest)
+            return manifest
+        
+        # Walk nested describe blocks without recursion, inheriting the spec file
+        suites = [(suite, suite.get("file")) for suite in report.get("suites", [])]
+        while suites:
+            suite, suite_file = suites.pop()
+            suite_file = suite.get("file", suite_file)
+            suites.extend((child, suite_file) for child in suite.get("suites", []))
+            
+            for spec in suite.get("specs", []):
+                for test in spec.get("tests", []):
+                    for attempt, test_run in enumerate(test.get("results", [])):
+                        test_case = {
+                            "title": spec.get("title"),
+                            "file": spec.get("file", suite_file),
+                            "status": test_run.get("status"),
+                            "duration": test_run.get("duration", 0) / 1000,
+                            "retry": test_run.get("retry", attempt),
+                            "attachments": {kind: [] for kind in ARTIFACT_KINDS.values()}
+                        }
+                        
+                        for attachment in test_run.get("attachments", []):
+                            path = attachment.get("path")
+                            kind = self._artifact_kind(attachment.get("name", ""), path)
+                            if path and kind:
+                                test_case["attachments"][kind].append(path)
+                                manifest[kind].append(path)
+                        
+                        manifest["test_cases"].append(test_case)
+        
+        return manifest
+    
+    def _artifact_kind(self, name: str, path: Optional[str]) -> Optional[str]:
+        """Get the manifest kind of an attachment, or None if it isn't an indexed artifact"""
+        if name in ARTIFACT_KINDS:
+            return ARTIFACT_KINDS[name]
+        if path:
+            return ARTIFACT_SUFFIXES.get(Path(path).suffix.lower())
+        return None
+    
+    def _scan_run_artifacts(self, results_dir: Path, manifest: Dict[str, Any]):
+        """Add the artifacts found in a single run's results directory to the manifest"""
+        if not results_dir.exists():
+            return
+        
+        for path in sorted(results_dir.rglob("*")):
+            kind = ARTIFACT_SUFFIXES.get(path.suffix.lower())
+            if kind and path.is_file():
+                manifest[kind].append(str(path))
+    
+    def _render_playwright_config(self) -> str:
+        """Render the Playwright config; per-run paths and auth state come from the environment"""
+        return f"""
 import {{ defineConfig, devices }} from '@playwright/test';
 
+const outputDir = process.env.PW_OUTPUT_DIR || '.';
+
 export default defineConfig({{
-  testDir: '{test_dir}',
-  outputDir: '{output_dir}/test-results',
+  testDir: process.env.PW_TEST_DIR || '.',
+  outputDir: `${{outputDir}}/test-results`,
   
   // Test timeout
   timeout: {settings.PLAYWRIGHT_TIMEOUT},
@@ -280,8 +537,9 @@ export default defineConfig({{
   
   // Reporter to use
   reporter: [
-    ['html', {{ outputFolder: '{output_dir}/html-report' }}],
-    ['json', {{ outputFile: '{output_dir}/results.json' }}]
+    ['list'],
+    ['html', {{ outputFolder: `${{outputDir}}/html-report`, open: 'never' }}],
+    ['json', {{ outputFile: `${{outputDir}}/results.json` }}]
   ],
   
   // Global setup
@@ -289,6 +547,8 @@ export default defineConfig({{
     // Base URL
     baseURL: process.env.CLUSTER_URL,
     
+    headless: {str(settings.PLAYWRIGHT_HEADLESS).lower()},
+    
     // Global timeout
     actionTimeout: 15000,
     navigationTimeout: 30000,
@@ -299,6 +559,9 @@ export default defineConfig({{
     
     // Trace
     trace: 'retain-on-failure',
+    
+    // Authenticated state from an earlier login_flow run
+    storageState: process.env.PW_STORAGE_STATE || undefined,
   }},
   
   // Browser projects
@@ -308,21 +571,81 @@ export default defineConfig({{
       use: {{ ...devices['Desktop Chrome'] }},
     }},
   ],
-  
-  // Web Server (if needed)
-  // webServer: {{
-  //   command: 'npm run start',
-  //   port: 3000,
-  // }},
 }});
 """
+    
+    def _get_playwright_config_path(self) -> Path:
+        """Get the shared config file for the current settings, writing it only if it doesn't exist"""
+        config_content = self._render_playwright_config()
+        fingerprint = hashlib.sha256(config_content.encode("utf-8")).hexdigest()[:16]
         
-        config_path = test_dir / "playwright.config.ts"
-        with open(config_path, 'w', encoding='utf-8') as f:
-            f.write(config_content)
+        config_path = self._config_paths.get(fingerprint)
+        if config_path and config_path.exists():
+            return config_path
         
+        config_path = self.config_dir / f"playwright.{fingerprint}.config.ts"
+        if not config_path.exists():
+            # Write then rename so concurrent sessions never read a partial file
+            tmp_path = config_path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(config_content)
+            os.replace(tmp_path, config_path)
+            logger.info(f"Created Playwright config {config_path.name}")
+        
+        self._config_paths[fingerprint] = config_path
         return config_path
     
+    def _playwright_run_env(self, test_dir: Path, output_dir: Path,
+                            storage_state: Optional[Path] = None) -> Dict[str, str]:
+        """Get the per-run overrides read by the shared Playwright config"""
+        env = {
+            "PW_TEST_DIR": str(test_dir.resolve()),
+            "PW_OUTPUT_DIR": str(output_dir.resolve())
+        }
+        if storage_state:
+            env["PW_STORAGE_STATE"] = str(storage_state.resolve())
+        return env
+    
+    def _storage_state_path(self, cluster_config: Dict[str, Any]) -> Path:
+        """Get the storage state file for a cluster and credential set"""
+        credentials = "\n".join([
+            (cluster_config.get("url") or "").rstrip("/"),
+            cluster_config.get("username") or "",
+            cluster_config.get("password") or ""
+        ])
+        fingerprint = hashlib.sha256(credentials.encode("utf-8")).hexdigest()[:16]
+        return self.auth_state_dir / f"{fingerprint}.json"
+    
+    def get_storage_state(self, cluster_config: Dict[str, Any]) -> Optional[Path]:
+        """Get a still-valid authenticated storage state for a cluster, if one exists"""
+        state_path = self._storage_state_path(cluster_config)
+        if not state_path.exists():
+            return None
+        
+        age = time.time() - state_path.stat().st_mtime
+        if age > self.storage_state_ttl:
+            logger.info(f"Storage state for {cluster_config.get('url')} expired ({age:.0f}s old)")
+            state_path.unlink(missing_ok=True)
+            return None
+        
+        return state_path
+    
+    def invalidate_storage_state(self, cluster_config: Dict[str, Any]):
+        """Drop the storage state for a cluster and credential set"""
+        self._storage_state_path(cluster_config).unlink(missing_ok=True)
+    
+    def _record_login_result(self, cluster_config: Dict[str, Any], passed: bool):
+        """Keep or drop the saved storage state based on the login run"""
+        if not passed:
+            # A failed login must not leave stale credentials for downstream workflows
+            self.invalidate_storage_state(cluster_config)
+            return
+        
+        if self.get_storage_state(cluster_config):
+            logger.info(f"Authenticated storage state available for {cluster_config.get('url')}")
+        else:
+            logger.warning(f"{LOGIN_WORKFLOW} passed but did not save a storage state to STORAGE_STATE_PATH")
+    
     async def _simulate_test_execution(self, workflow_name: str, test_file_path: Path, 
                                      cluster_config: Dict[str, Any]) -> Dict[str, Any]:
         """
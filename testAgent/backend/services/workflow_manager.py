@@ -4,15 +4,20 @@ File: backend/services/workflow_manager.py
 """
 
 import logging
-from typing import List, Dict, Any, Set, Tuple, Optional
-from collections import defaultdict, deque
+from typing import List, Dict, Any, Set, Tuple, Optional, FrozenSet
+from collections import OrderedDict
 from dataclasses import dataclass
 from enum import Enum
-from services.template_manager import TemplateManagerService, WorkflowType
+from services.template_manager import TemplateManagerService, WorkflowType, get_workflow_priority
+from services.cluster_inventory import ClusterInventoryService, cluster_inventory_service
 from core.config import settings
+from core.tracing import traced
 
 logger = logging.getLogger(__name__)
 
+# Parameters that identify an existing fabric and skip fabric selection
+FABRIC_PARAMETER_KEYS = ('fabric_name', 'fabric_id', 'existing_fabric')
+
 class ClarificationType(str, Enum):
     """Types of clarifications needed from user"""
     FABRIC_SELECTION = "fabric_selection"
@@ -48,11 +53,22 @@ class WorkflowExecutionPlan:
     requires_clarification: bool = False
     clarification_question: Optional[ClarificationQuestion] = None
 
+@dataclass(frozen=True)
+class CachedExecutionPlan:
+    """Session-independent part of a resolved execution plan"""
+    execution_chain: Tuple[str, ...]
+    estimated_duration: int
+
+PlanCacheKey = Tuple[FrozenSet[str], FrozenSet[str], int]
+
 class WorkflowManagerService:
     """Enhanced service for managing workflow dependencies, clarifications, and execution"""
     
     def __init__(self):
         self.template_manager: Optional[TemplateManagerService] = None
+        self.cluster_inventory: Optional[ClusterInventoryService] = (
+            cluster_inventory_service if settings.CLUSTER_INVENTORY_ENABLED else None
+        )
         self.mock_cluster_resources: Dict[str, List[Dict[str, Any]]] = {
             "fabrics": [],  # Mock empty for POC
             "devices": [],  # Mock empty for POC
@@ -60,6 +76,14 @@ class WorkflowManagerService:
             "buildings": [] # Mock empty for POC
         }
         
+        # Resolved plans keyed by (primary workflows, relevant parameter keys, graph version)
+        self.plan_cache: "OrderedDict[PlanCacheKey, CachedExecutionPlan]" = OrderedDict()
+        self.plan_cache_size = settings.PLAN_CACHE_SIZE
+        self.plan_cache_hits = 0
+        self.plan_cache_misses = 0
+        self._relevant_parameter_keys: Set[str] = set()
+        self._relevant_parameter_keys_version: Optional[int] = None
+        
     async def initialize(self):
         """Initialize workflow manager with template manager integration"""
         logger.info("Initializing Enhanced Workflow Manager Service...")
@@ -92,6 +116,7 @@ class WorkflowManagerService:
         
         logger.info("Initialized mock cluster resources (empty for POC)")
 
+    @traced()
     async def resolve_workflow_chain(self, primary_workflows: List[str], 
                                    parameters: Dict[str, Any],
                                    session_id: str) -> WorkflowExecutionPlan:
@@ -109,6 +134,25 @@ class WorkflowManagerService:
         logger.info(f"Resolving workflow chain for session {session_id}: {primary_workflows}")
         
         try:
+            # Identical workflow sets resolve straight from the plan cache
+            cache_key = self._get_plan_cache_key(primary_workflows, parameters)
+            cached_plan = self.plan_cache.get(cache_key)
+            
+            if cached_plan:
+                self.plan_cache.move_to_end(cache_key)
+                self.plan_cache_hits += 1
+                logger.info(f"Resolved workflow chain for session {session_id} from plan cache: {list(cached_plan.execution_chain)}")
+                return WorkflowExecutionPlan(
+                    session_id=session_id,
+                    primary_workflows=primary_workflows,
+                    execution_chain=list(cached_plan.execution_chain),
+                    parameters=parameters,
+                    estimated_duration=cached_plan.estimated_duration,
+                    requires_clarification=False
+                )
+            
+            self.plan_cache_misses += 1
+            
             # Step 1: Collect all required workflows including dependencies
             all_required_workflows = await self._collect_all_dependencies(primary_workflows)
             
@@ -116,6 +160,7 @@ class WorkflowManagerService:
             clarification = await self._detect_clarification_needs(all_required_workflows, parameters)
             
             if clarification:
+                # Clarification plans depend on the user's answer and are never cached
                 logger.info(f"Clarification needed for session {session_id}: {clarification.type}")
                 return WorkflowExecutionPlan(
                     session_id=session_id,
@@ -145,6 +190,13 @@ class WorkflowManagerService:
                 requires_clarification=False
             )
             
+            # Plans that were decided by live cluster state may change, so skip those
+            if not await self._depends_on_cluster_state(all_required_workflows, parameters):
+                self._store_cached_plan(cache_key, CachedExecutionPlan(
+                    execution_chain=tuple(ordered_workflows),
+                    estimated_duration=estimated_duration
+                ))
+            
             logger.info(f"Resolved workflow chain for session {session_id}: {ordered_workflows}")
             return execution_plan
             
@@ -152,28 +204,61 @@ class WorkflowManagerService:
             logger.error(f"Failed to resolve workflow chain for session {session_id}: {str(e)}")
             raise
 
-    async def _collect_all_dependencies(self, workflows: List[str]) -> List[str]:
-        """Collect all workflows including their dependencies recursively"""
+    def _get_plan_cache_key(self, primary_workflows: List[str], parameters: Dict[str, Any]) -> PlanCacheKey:
+        """Build the plan cache key from the workflow set, relevant parameter keys and graph version"""
+        
+        graph_version = self.template_manager.graph_version
+        
+        # Only parameters named by templates or fabric selection affect resolution
+        if self._relevant_parameter_keys_version != graph_version:
+            relevant_keys = set(FABRIC_PARAMETER_KEYS)
+            for template in self.template_manager.templates.values():
+                relevant_keys.update(template.metadata.required_parameters)
+                relevant_keys.update(template.metadata.optional_parameters)
+            self._relevant_parameter_keys = relevant_keys
+            self._relevant_parameter_keys_version = graph_version
+        
+        return (
+            frozenset(primary_workflows),
+            frozenset(key for key in parameters if key in self._relevant_parameter_keys),
+            graph_version
+        )
+
+    def _store_cached_plan(self, cache_key: PlanCacheKey, plan: CachedExecutionPlan):
+        """Store a resolved plan, evicting the least recently used entry when full"""
         
-        all_workflows = set()
+        self.plan_cache[cache_key] = plan
+        self.plan_cache.move_to_end(cache_key)
         
-        async def add_workflow_with_deps(workflow: str):
-            if workflow in all_workflows:
-                return
-            
-            # Get dependencies from template metadata
-            dependencies = await self.template_manager.get_workflow_dependencies(workflow)
-            
-            # Add dependencies first (depth-first)
-            for dep in dependencies:
-                await add_workflow_with_deps(dep)
-            
-            # Then add the workflow itself
-            all_workflows.add(workflow)
+        while len(self.plan_cache) > self.plan_cache_size:
+            self.plan_cache.popitem(last=False)
+
+    def clear_plan_cache(self):
+        """Drop all cached execution plans"""
+        
+        self.plan_cache.clear()
+        logger.info("Cleared workflow plan cache")
+
+    async def _depends_on_cluster_state(self, workflows: List[str], parameters: Dict[str, Any]) -> bool:
+        """Check if clarification detection had to look up existing cluster resources"""
+        
+        if any(key in parameters for key in FABRIC_PARAMETER_KEYS):
+            return False
+        
+        for workflow in workflows:
+            metadata = await self.template_manager.get_workflow_metadata(workflow)
+            if metadata and metadata.requires_existing_fabric:
+                return True
+        
+        return False
+
+    async def _collect_all_dependencies(self, workflows: List[str]) -> List[str]:
+        """Collect all workflows including their dependencies from the precomputed closure"""
+        
+        all_workflows = set(workflows)
         
-        # Process each primary workflow
         for workflow in workflows:
-            await add_workflow_with_deps(workflow)
+            all_workflows |= await self.template_manager.get_transitive_dependencies(workflow)
         
         return list(all_workflows)
 
@@ -190,7 +275,7 @@ class WorkflowManagerService:
         
         if fabric_dependent_workflows:
             # Check if fabric is specified in parameters
-            fabric_specified = any(key in parameters for key in ['fabric_name', 'fabric_id', 'existing_fabric'])
+            fabric_specified = any(key in parameters for key in FABRIC_PARAMETER_KEYS)
             
             if not fabric_specified:
                 # Try to auto-detect existing fabrics
@@ -213,10 +298,7 @@ class WorkflowManagerService:
 
     async def _get_existing_cluster_resources(self, resource_type: str, 
                                            parameters: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Get existing cluster resources (mock implementation for POC)"""
-        
-        # For POC, always return empty to simulate "nothing found"
-        # In real implementation, this would make API calls to the cluster
+        """Get existing cluster resources from the cluster inventory (mock resources without a cluster)"""
         
         try:
             cluster_config = {
@@ -225,10 +307,14 @@ class WorkflowManagerService:
                 "password": parameters.get("password", "")
             }
             
-            logger.info(f"Checking for existing {resource_type} on cluster {cluster_config.get('url', 'unknown')}")
+            logger.info(f"Checking for existing {resource_type} on cluster {cluster_config.get('url') or 'unknown'}")
             
-            # Mock cluster API call (always returns empty for POC)
-            existing_resources = self.mock_cluster_resources.get(resource_type, [])
+            if self.cluster_inventory and cluster_config["url"]:
+                # Cached per cluster and coalesced across concurrent sessions
+                existing_resources = await self.cluster_inventory.get_resources(cluster_config, resource_type)
+            else:
+                # No cluster to query, use mock resources (empty for POC)
+                existing_resources = self.mock_cluster_resources.get(resource_type, [])
             
             logger.info(f"Found {len(existing_resources)} existing {resource_type}")
             return existing_resources
@@ -249,7 +335,7 @@ class WorkflowManagerService:
             options.append(ClarificationOption(
                 value=f"existing_{fabric['id']}",
                 label=f"Use existing fabric: {fabric['name']}",
-                description=f"Status: {fabric.get('status', 'Unknown')}",
+                description=f"Status: {fabric.get('status') or 'Unknown'}",
                 data=fabric
             ))
         
@@ -293,63 +379,14 @@ class WorkflowManagerService:
         return None
 
     async def _topological_sort_workflows(self, workflows: List[str]) -> List[str]:
-        """Sort workflows based on dependencies using topological sort"""
+        """Sort workflows based on dependencies using the precomputed topological rank"""
         
-        # Create adjacency list and in-degree count
-        graph = defaultdict(list)
-        in_degree = defaultdict(int)
-        
-        # Initialize all workflows with in-degree 0
-        for workflow in workflows:
-            in_degree[workflow] = 0
-        
-        # Build the graph from template dependencies
-        for workflow in workflows:
-            dependencies = await self.template_manager.get_workflow_dependencies(workflow)
-            for dep in dependencies:
-                if dep in workflows:  # Only consider dependencies that are in our workflow list
-                    graph[dep].append(workflow)
-                    in_degree[workflow] += 1
-        
-        # Topological sort using Kahn's algorithm
-        queue = deque([workflow for workflow in workflows if in_degree[workflow] == 0])
-        result = []
-        
-        while queue:
-            # Sort queue by priority to ensure deterministic order
-            queue = deque(sorted(queue, key=lambda w: self._get_workflow_priority(w)))
-            
-            current = queue.popleft()
-            result.append(current)
-            
-            # Reduce in-degree of neighbors
-            for neighbor in graph[current]:
-                in_degree[neighbor] -= 1
-                if in_degree[neighbor] == 0:
-                    queue.append(neighbor)
-        
-        # Check if all workflows were processed (no cycles)
-        if len(result) != len(workflows):
-            remaining = set(workflows) - set(result)
-            raise ValueError(f"Circular dependency detected involving: {remaining}")
-        
-        return result
+        return await self.template_manager.sort_by_rank(workflows)
 
     def _get_workflow_priority(self, workflow_name: str) -> int:
         """Get workflow priority for sorting (lower number = higher priority)"""
         
-        priority_map = {
-            "login_flow": 1,
-            "network_hierarchy_creation": 2,
-            "inventory_workflow": 3,
-            "fabric_creation": 4,
-            "device_provisioning": 5,
-            "l3vn_management": 6,
-            "fabric_settings": 7,
-            "get_fabric": 8
-        }
-        
-        return priority_map.get(workflow_name, 999)
+        return get_workflow_priority(workflow_name)
 
     async def _calculate_total_duration(self, workflows: List[str]) -> int:
         """Calculate total estimated duration for workflow chain"""
@@ -536,6 +573,13 @@ class WorkflowManagerService:
                 resource_type: len(resources) 
                 for resource_type, resources in self.mock_cluster_resources.items()
             },
+            "cluster_inventory": self.cluster_inventory.get_statistics() if self.cluster_inventory else None,
+            "plan_cache": {
+                "size": len(self.plan_cache),
+                "max_size": self.plan_cache_size,
+                "hits": self.plan_cache_hits,
+                "misses": self.plan_cache_misses
+            },
             "clarification_types_supported": [ct.value for ct in ClarificationType],
             "workflow_priorities": {
                 "login_flow": 1,
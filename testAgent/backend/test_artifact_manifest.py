@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test script to verify per-run artifact indexing from the Playwright JSON report
+File: test_artifact_manifest.py
+"""
+
+import asyncio
+import json
+import sys
+import os
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+FAKES_BIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fakes", "bin")
+
+async def test_artifact_manifest():
+    """Test that every artifact of a run is recorded per test case"""
+    print("Testing artifact manifest in TestExecutorService...")
+    print("=" * 50)
+
+    try:
+        from services.test_executor import TestExecutorService
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            os.environ["PATH"] = FAKES_BIN + os.pathsep + os.environ["PATH"]
+            os.environ["FAKE_PLAYWRIGHT_FAIL"] = "inventory_workflow"
+
+            test_executor = TestExecutorService(output_dir=os.path.join(tmp_dir, "outputs"))
+            cluster_config = {"url": "https://10.0.0.1", "username": "admin", "password": "secret"}
+            spec = "import { test } from '@playwright/test';"
+
+            results = await test_executor.execute_tests(
+                "session-1", {"inventory_workflow": spec, "fabric_creation": spec}, cluster_config
+            )
+            del os.environ["FAKE_PLAYWRIGHT_FAIL"]
+
+            failed = results["test_results"]["inventory_workflow"]
+            assert len(failed["artifacts"]["screenshots"]) == 1
+            assert len(failed["artifacts"]["videos"]) == 1
+            assert len(failed["artifacts"]["traces"]) == 1
+            assert failed["test_cases"][0]["status"] == "failed"
+            assert failed["test_cases"][0]["attachments"]["traces"] == failed["artifacts"]["traces"]
+            assert failed["screenshot_path"] == failed["artifacts"]["screenshots"][0]
+            print(f"✓ Failed run indexed screenshot, video and trace: {failed['test_cases'][0]['title']}")
+
+            # Artifacts from other runs in the session never leak into a passing run
+            passed = results["test_results"]["fabric_creation"]
+            assert passed["test_cases"][0]["status"] == "passed"
+            assert not any(passed["artifacts"].values())
+            assert "screenshot_path" not in passed
+            print("✓ Passing run has no artifacts from other workflows")
+
+            # Nested suites and retries are flattened into test cases
+            run_dir = Path(tmp_dir) / "nested"
+            run_dir.mkdir()
+            (run_dir / "results.json").write_text(json.dumps({"suites": [{"file": "a.spec.ts", "specs": [], "suites": [{
+                "specs": [{"title": "step", "tests": [{"results": [
+                    {"status": "failed", "duration": 1500, "retry": 0, "attachments": [
+                        {"name": "screenshot", "path": "/x/1.png"}, {"name": "error-context", "path": "/x/ctx.md"}]},
+                    {"status": "passed", "duration": 500, "retry": 1, "attachments": []}
+                ]}]}]
+            }]}]}))
+            manifest = test_executor._build_artifact_manifest(run_dir)
+            assert [c["retry"] for c in manifest["test_cases"]] == [0, 1]
+            assert manifest["test_cases"][0]["file"] == "a.spec.ts"
+            assert manifest["screenshots"] == ["/x/1.png"] and not manifest["traces"]
+            print("✓ Nested suites and retries recorded, unrelated attachments ignored")
+
+            # Without a report only the run's own results directory is scanned
+            (run_dir / "results.json").unlink()
+            (run_dir / "test-results" / "case").mkdir(parents=True)
+            (run_dir / "test-results" / "case" / "video.webm").write_bytes(b"fake")
+            manifest = test_executor._build_artifact_manifest(run_dir)
+            assert manifest["videos"] == [str(run_dir / "test-results" / "case" / "video.webm")]
+            print("✓ Missing report falls back to a scan scoped to the run")
+
+        print("\n🎉 SUCCESS: Artifact manifest works correctly!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Artifact manifest test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    success = asyncio.run(test_artifact_manifest())
+    sys.exit(0 if success else 1)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Test script to verify artifact retention, compression and size budgets
+File: test_artifact_retention.py
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+FAKES_BIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fakes", "bin")
+
+def write_file(path: Path, size: int, age: float = 0):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+    if age:
+        mtime = time.time() - age
+        os.utime(path, (mtime, mtime))
+        os.utime(path.parent, (mtime, mtime))
+
+def write_session(manager, name: str, file_name: str, size: int, age: float, marked: bool = True):
+    """Write an aged session directory, marked as the executor's unless told otherwise"""
+    from services.artifact_manager import SESSION_MARKER
+    session_dir = manager.output_dir / name
+    write_file(session_dir / file_name, size, age)
+    if marked:
+        write_file(session_dir / SESSION_MARKER, 0, age)
+
+async def test_artifact_retention():
+    """Test that passed runs keep summaries and disk use stays within budgets"""
+    print("Testing ArtifactManagerService...")
+    print("=" * 50)
+
+    try:
+        from services.test_executor import TestExecutorService
+        from services.artifact_manager import ArtifactManagerService, MB
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            os.environ["PATH"] = FAKES_BIN + os.pathsep + os.environ["PATH"]
+            os.environ["FAKE_PLAYWRIGHT_FAIL"] = "inventory_workflow"
+
+            test_executor = TestExecutorService(output_dir=os.path.join(tmp_dir, "outputs"))
+            cluster_config = {"url": "https://10.0.0.1", "username": "admin", "password": "secret"}
+            spec = "import { test } from '@playwright/test';"
+
+            results = await test_executor.execute_tests(
+                "session-1", {"inventory_workflow": spec, "fabric_creation": spec}, cluster_config
+            )
+            del os.environ["FAKE_PLAYWRIGHT_FAIL"]
+            await test_executor.artifact_manager.wait_for_pending()
+
+            runs_dir = test_executor.output_dir / "session-1" / "runs"
+            passed_run = runs_dir / "fabric_creation"
+            assert sorted(p.name for p in passed_run.iterdir()) == ["results.json"]
+            assert not any(results["test_results"]["fabric_creation"]["artifacts"].values())
+            print("✓ Passed run keeps only its summary")
+
+            failed_run = runs_dir / "inventory_workflow"
+            assert (failed_run / "html-report.zip").exists() and not (failed_run / "html-report").exists()
+            assert all(Path(p).exists() for p in results["test_results"]["inventory_workflow"]["artifacts"]["videos"])
+            print("✓ Failed run keeps artifacts, html report compressed in the background")
+
+            # Session budget evicts oldest artifacts but never summaries or specs
+            manager = ArtifactManagerService(Path(tmp_dir) / "budget", retention_hours=1,
+                                             session_budget_mb=1, total_budget_mb=3)
+            session_dir = manager.output_dir / "s1"
+            write_file(session_dir / "runs" / "a" / "test-results" / "old.webm", MB, age=60)
+            write_file(session_dir / "runs" / "b" / "test-results" / "new.webm", MB // 2)
+            write_file(session_dir / "runs" / "a" / "results.json", MB // 4, age=120)
+            write_file(session_dir / "a.spec.ts", 100, age=120)
+            await manager.enforce_session_budget(session_dir)
+            assert not (session_dir / "runs" / "a" / "test-results" / "old.webm").exists()
+            assert (session_dir / "runs" / "b" / "test-results" / "new.webm").exists()
+            assert (session_dir / "runs" / "a" / "results.json").exists() and (session_dir / "a.spec.ts").exists()
+            print("✓ Session budget evicts oldest artifacts first")
+
+            # The budget waits for the session's report compressions instead of racing them
+            report_run = session_dir / "runs" / "c"
+            for i in range(50):
+                write_file(report_run / "html-report" / "data" / f"{i}.json", MB // 50)
+            await manager.finalize_run(report_run, passed=False)
+            assert manager.get_statistics()["pending_compressions"] == 1
+            await manager.enforce_session_budget(session_dir)
+            assert manager.get_statistics()["pending_compressions"] == 0
+            assert (report_run / "html-report.zip").exists() and not (report_run / "html-report").exists()
+            print("✓ Session budget waits for the session's report to be archived")
+
+            # Sweep drops expired sessions, then oldest sessions over the global budget
+            for name in ["expired", "live", "sample", "tracked"]:
+                write_session(manager, name, "video.webm", 100, age=7200, marked=name != "sample")
+            for i, name in enumerate(["big-old", "big-mid", "big-new"]):
+                write_session(manager, name, "trace.zip", MB + 1, age=300 - i * 100)
+            write_file(manager.output_dir / ".config" / "playwright.config.ts", 100, age=7200)
+            subprocess.run(["git", "init", "-q"], cwd=manager.output_dir, check=True)
+            subprocess.run(["git", "add", "tracked"], cwd=manager.output_dir, check=True)
+
+            removed = await manager.sweep(active_sessions=["live"])
+            assert sorted(removed["sessions"]) == ["big-old", "expired"]
+            remaining = sorted(p.name for p in manager.output_dir.iterdir() if p.name != ".git")
+            assert remaining == [".config", "big-mid", "big-new", "live", "s1", "sample", "tracked"], remaining
+            print(f"✓ Sweep removed {removed['sessions']}, kept live, unmarked and git-tracked sessions")
+
+            # Background sweeper runs until cleanup
+            manager.start(lambda: [], interval=0.05)
+            await asyncio.sleep(0.1)
+            await manager.cleanup()
+            print(f"  Stats: {manager.get_statistics()}")
+
+        print("\n🎉 SUCCESS: Artifact retention works correctly!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Artifact retention test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    success = asyncio.run(test_artifact_retention())
+    sys.exit(0 if success else 1)
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Test script to verify session cancellation and execution budgets
+File: test_cancellation.py
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+FAKES_BIN = os.path.join(BACKEND_DIR, "fakes", "bin")
+
+# Fail Azure OpenAI authentication fast so generation falls back to the basic generator
+os.environ["CISCO_IDP"] = "http://127.0.0.1:9/"
+os.environ["PATH"] = FAKES_BIN + os.pathsep + os.environ["PATH"]
+
+WORKFLOWS = ["login_flow", "inventory_workflow", "fabric_settings_workflow"]
+CLUSTER_CONFIG = {"url": "https://10.0.0.1", "username": "admin", "password": "secret"}
+
+def process_alive(pid: int) -> bool:
+    """Whether a process exists and isn't a zombie"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+async def wait_for_hang(log_path: str, timeout: float = 60) -> dict:
+    """Wait for the fake runner to report a hung run, returning its log entry"""
+    for _ in range(int(timeout * 10)):
+        if os.path.exists(log_path):
+            with open(log_path) as f:
+                for line in f:
+                    entry = json.loads(line)
+                    if entry.get("hung"):
+                        return entry
+        await asyncio.sleep(0.1)
+    raise AssertionError("Playwright run never started")
+
+async def wait_for_status(session, statuses, timeout: float = 60):
+    for _ in range(int(timeout * 10)):
+        if session.status in statuses:
+            return
+        await asyncio.sleep(0.1)
+    raise AssertionError(f"session stuck in {session.status}")
+
+def assert_stopped(entry: dict):
+    for _ in range(50):
+        if not process_alive(entry["pid"]) and not process_alive(entry["child_pid"]):
+            return
+        time.sleep(0.1)
+    raise AssertionError(f"Playwright process group still running: {entry}")
+
+async def test_cancellation():
+    """Test budgets, the cancel endpoint and cancellation in worker processes"""
+    print("Testing session cancellation and budgets...")
+    print("=" * 50)
+
+    try:
+        from services.template_manager import TemplateManagerService
+        from services.playwright_generator import PlaywrightGeneratorService
+        from services.test_executor import TestExecutorService
+        from services.execution_pipeline import run_session_with_budget, session_outcome
+
+        template_manager = TemplateManagerService()
+        await template_manager.initialize()
+        playwright_generator = PlaywrightGeneratorService()
+
+        async def report_status(status, error_message=None):
+            pass
+
+        # A hung run is killed with its process group when the budget runs out
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            log_path = os.path.join(tmp_dir, "playwright.log")
+            os.environ["FAKE_PLAYWRIGHT_LOG"] = log_path
+            os.environ["FAKE_PLAYWRIGHT_HANG"] = "inventory_workflow"
+            test_executor = TestExecutorService(output_dir=os.path.join(tmp_dir, "outputs"))
+
+            results = await run_session_with_budget(
+                "budget-session", WORKFLOWS, {}, CLUSTER_CONFIG, template_manager,
+                playwright_generator, test_executor, report_status, timeout=5
+            )
+            assert session_outcome(results) == "timed_out" and results["timed_out"]
+            statuses = {w: r["status"] for w, r in results["test_results"].items()}
+            assert statuses == {"login_flow": "passed", "inventory_workflow": "skipped",
+                                "fabric_settings_workflow": "skipped"}, statuses
+            assert results["skipped_tests"] == 2 and results["total_tests"] == 3
+            assert_stopped(await wait_for_hang(log_path))
+            print("✓ Budget overrun kills the Playwright process group and skips unfinished workflows")
+
+        # A TimeoutError from inside the pipeline is an error, not the budget running out
+        class TimingOutTemplates:
+            async def load_tdd_template(self, workflow_name):
+                raise TimeoutError("template store timed out")
+
+        for timeout in (None, 60):
+            try:
+                await run_session_with_budget(
+                    "error-session", WORKFLOWS, {}, CLUSTER_CONFIG, TimingOutTemplates(),
+                    playwright_generator, test_executor, report_status, timeout=timeout
+                )
+                assert False, "expected the pipeline's TimeoutError"
+            except TimeoutError as e:
+                assert str(e) == "template store timed out"
+        print("✓ Timeouts raised by the pipeline itself propagate instead of reporting a budget overrun")
+
+        # Cancel endpoint stops running sessions and drops queued ones
+        import httpx
+        import main
+        from services.job_queue import JobQueueService
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            log_path = os.path.join(tmp_dir, "playwright.log")
+            os.environ["FAKE_PLAYWRIGHT_LOG"] = log_path
+            await main.workflow_manager.set_template_manager(template_manager)
+            main.template_manager = template_manager
+            main.test_executor = TestExecutorService(output_dir=os.path.join(tmp_dir, "outputs"))
+            main.job_queue = JobQueueService(workers=1, max_depth=5)
+
+            for session_id in ("running", "waiting"):
+                session = await main.session_manager.create_session(
+                    session_id, "run inventory", WORKFLOWS, {}, CLUSTER_CONFIG
+                )
+                session.status = "parsed"
+
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.post("/execute_test_plan", json={"session_id": "running", "budget_seconds": 600})
+                assert response.json()["budget_seconds"] == 600
+                await asyncio.sleep(0.05)
+                response = await client.post("/execute_test_plan", json={"session_id": "waiting"})
+                assert response.json()["queue_position"] == 1
+                response = await client.post("/execute_test_plan", json={"session_id": "waiting", "budget_seconds": -1})
+                assert response.status_code == 422
+
+                entry = await wait_for_hang(log_path)
+                response = await client.post("/cancel_session", json={"session_id": "waiting"})
+                assert response.json()["status"] == "cancelled" and response.json()["cancelled_while"] == "queued"
+
+                response = await client.post("/cancel_session", json={"session_id": "running"})
+                assert response.status_code == 200, response.text
+                assert response.json()["status"] == "cancelled" and response.json()["cancelled_while"] == "running"
+                assert_stopped(entry)
+
+                session = await main.session_manager.get_session("running")
+                statuses = {w: r["status"] for w, r in session.context["execution_results"]["test_results"].items()}
+                assert statuses["login_flow"] == "passed" and statuses["inventory_workflow"] == "skipped"
+                assert session.error_message == "Cancelled by user"
+                waiting = await main.session_manager.get_session("waiting")
+                assert waiting.context["execution_results"]["skipped_tests"] == 3
+
+                response = await client.post("/cancel_session", json={"session_id": "running"})
+                assert response.status_code == 400
+                assert main.job_queue.get_statistics()["cancelled"] == 2
+            await main.job_queue.stop()
+            print("✓ /cancel_session stops running sessions and drops queued ones")
+
+        # Worker processes stop a session when its cancellation reaches them
+        from services.broker import create_broker
+        from services.session_manager import SessionManagerService
+        from services.execution_workers import BrokerResultConsumer
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            log_path = os.path.join(tmp_dir, "playwright.log")
+            broker_url = f"sqlite:///{os.path.join(tmp_dir, 'jobs.db')}"
+            broker = create_broker(broker_url)
+            session_manager = SessionManagerService()
+            session = await session_manager.create_session("worker-session", "run inventory", WORKFLOWS, {}, CLUSTER_CONFIG)
+            consumer = BrokerResultConsumer(broker, session_manager, poll_interval=0.1)
+            await consumer.start()
+            await broker.enqueue("worker-session", {
+                "session_id": "worker-session", "workflows": WORKFLOWS,
+                "parameters": {}, "cluster_config": CLUSTER_CONFIG, "budget": 600
+            })
+
+            env = dict(os.environ, FAKE_PLAYWRIGHT_LOG=log_path, TRACING_EXPORTER="none")
+            worker = subprocess.Popen(
+                [sys.executable, "worker.py", "--broker", broker_url,
+                 "--output-dir", os.path.join(tmp_dir, "outputs"),
+                 "--log-file", os.path.join(tmp_dir, "worker.log")],
+                cwd=BACKEND_DIR, env=env
+            )
+            try:
+                entry = await wait_for_hang(log_path)
+                assert await broker.cancel("worker-session") == "running"
+                await wait_for_status(session, ("cancelled",))
+                assert_stopped(entry)
+                assert session.context["execution_results"]["test_results"]["inventory_workflow"]["status"] == "skipped"
+                assert await broker.cancel("worker-session") is None
+            finally:
+                worker.terminate()
+                worker.wait(timeout=30)
+                await consumer.stop()
+            print("✓ Worker processes stop cancelled sessions on their next heartbeat")
+
+        print("\n🎉 SUCCESS: Cancellation and budgets work correctly!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Cancellation test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    success = asyncio.run(test_cancellation())
+    sys.exit(0 if success else 1)
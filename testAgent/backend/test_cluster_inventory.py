@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Test script to verify cluster resource discovery against a fake Catalyst Center
+File: test_cluster_inventory.py
+"""
+
+import asyncio
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+async def test_cluster_inventory():
+    """Test TTL caching, request coalescing and clarification integration"""
+    print("Testing ClusterInventoryService...")
+    print("=" * 50)
+
+    from fakes.catalyst_center import FakeCatalystCenter
+    from services.cluster_inventory import ClusterInventoryService
+
+    fake_cluster = FakeCatalystCenter(
+        resources={
+            "fabrics": [{"id": "f-1", "name": "Global/SanJose", "status": "Active"}],
+            "devices": [{"instanceUuid": "d-1", "hostname": "border-1", "reachabilityStatus": "Reachable"}],
+            "areas": [{"id": "a-1", "name": "SanJose"}],
+            "buildings": []
+        },
+        latency=0.1
+    )
+    inventory = ClusterInventoryService(cache_ttl=0.5, error_ttl=0.2)
+
+    try:
+        base_url = await fake_cluster.start()
+        cluster_config = {"url": base_url, "username": "admin", "password": "admin123"}
+        print(f"✓ Fake Catalyst Center running at {base_url}")
+
+        # 20 concurrent sessions asking for the same fabrics share one request
+        results = await asyncio.gather(*[
+            inventory.get_resources(cluster_config, "fabrics") for _ in range(20)
+        ])
+        assert all(r == results[0] for r in results)
+        assert results[0][0]["id"] == "f-1" and results[0][0]["name"] == "Global/SanJose"
+        assert fake_cluster.request_counts["fabrics"] == 1
+        assert fake_cluster.request_counts["auth"] == 1
+        print(f"✓ 20 concurrent lookups coalesced into 1 request ({inventory.stats['coalesced']} coalesced)")
+
+        # Cached until TTL expires
+        await inventory.get_resources(cluster_config, "fabrics")
+        assert fake_cluster.request_counts["fabrics"] == 1
+        await asyncio.sleep(0.6)
+        await inventory.get_resources(cluster_config, "fabrics")
+        assert fake_cluster.request_counts["fabrics"] == 2
+        print("✓ Results cached per cluster until TTL expiry")
+
+        # Different resource types reuse the auth token and connection pool
+        devices = await inventory.get_resources(cluster_config, "devices")
+        assert devices[0]["name"] == "border-1" and devices[0]["status"] == "Reachable"
+        assert fake_cluster.request_counts["auth"] == 1
+        print("✓ Auth token reused across resource types")
+
+        # A wrong password gets neither the cached token nor the cached inventory
+        wrong_password = {**cluster_config, "password": "revoked"}
+        assert await inventory.get_resources(wrong_password, "fabrics") == []
+        assert fake_cluster.request_counts["auth"] == 2
+        assert (await inventory.get_resources(cluster_config, "fabrics"))[0]["id"] == "f-1"
+        print("✓ Tokens and resources are not shared with other credentials")
+
+        # Failures return empty results and are remembered briefly
+        fake_cluster.fail_requests = True
+        assert await inventory.get_resources(cluster_config, "buildings") == []
+        assert await inventory.get_resources(cluster_config, "buildings") == []
+        assert fake_cluster.request_counts["buildings"] == 1
+        fake_cluster.fail_requests = False
+        print("✓ Failed lookups return no resources and are not retried per request")
+
+        # Workflow manager asks for fabric selection when fabrics exist
+        from services.template_manager import TemplateManagerService
+        from services.workflow_manager import WorkflowManagerService
+
+        template_manager = TemplateManagerService()
+        await template_manager.initialize()
+        workflow_manager = WorkflowManagerService()
+        await workflow_manager.set_template_manager(template_manager)
+        workflow_manager.cluster_inventory = inventory
+
+        plan = await workflow_manager.resolve_workflow_chain(
+            ["fabric_settings_workflow"],
+            {"cluster_url": base_url, "username": "admin", "password": "admin123"},
+            "test-cluster-inventory"
+        )
+        assert plan.requires_clarification
+        assert plan.clarification_question.options[0].value == "existing_f-1"
+        print(f"✓ Clarification offered for existing fabric: {plan.clarification_question.options[0].label}")
+
+        # Normalized fabrics always carry a status key, which is None when the cluster omits it
+        question = await workflow_manager._create_fabric_selection_question(
+            "fabric_settings_workflow", [{"id": "f-2", "name": "Global/Austin", "status": None}]
+        )
+        assert question.options[0].description == "Status: Unknown", question.options[0].description
+        print("✓ Fabrics without a status are shown as Unknown")
+
+        print(f"  Stats: {inventory.get_statistics()}")
+        print("\n🎉 SUCCESS: Cluster inventory works correctly!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Cluster inventory test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    finally:
+        await inventory.cleanup()
+        await fake_cluster.stop()
+
+if __name__ == "__main__":
+    success = asyncio.run(test_cluster_inventory())
+    sys.exit(0 if success else 1)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the precomputed dependency index
+File: test_dependency_index.py
+"""
+
+import asyncio
+import itertools
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+async def test_dependency_index():
+    """Test transitive closure and rank-based ordering against a per-request walk"""
+    print("Testing TemplateManagerService dependency index...")
+    print("=" * 50)
+
+    try:
+        from services.template_manager import TemplateManagerService
+        from services.workflow_manager import WorkflowManagerService
+
+        template_manager = TemplateManagerService()
+        await template_manager.initialize()
+
+        workflow_manager = WorkflowManagerService()
+        await workflow_manager.set_template_manager(template_manager)
+
+        print(f"✓ Index built (graph version {template_manager.graph_version})")
+
+        # Closure should match a recursive walk of the raw graph
+        def walk(workflow, seen):
+            for dep in template_manager.dependency_graph.get(workflow, []):
+                if dep not in seen:
+                    seen.add(dep)
+                    walk(dep, seen)
+            return seen
+
+        for workflow in template_manager.dependency_graph:
+            expected = walk(workflow, set())
+            actual = await template_manager.get_transitive_dependencies(workflow)
+            assert actual == expected, f"{workflow}: expected {expected}, got {actual}"
+        print("✓ Transitive closure matches recursive walk")
+
+        # Every subset should resolve to a valid, deterministic order
+        names = sorted(template_manager.templates) + ["l3vn_management"]
+        checked = 0
+        for size in range(1, 4):
+            for primary in itertools.combinations(names, size):
+                chain = await template_manager.resolve_execution_order(list(primary))
+                position = {w: i for i, w in enumerate(chain)}
+                for workflow in chain:
+                    for dep in template_manager.dependency_graph.get(workflow, []):
+                        assert position[dep] < position[workflow], f"{dep} must run before {workflow} in {chain}"
+
+                # Per-subset sort must agree with the global rank
+                assert chain == template_manager._topological_sort(chain), f"Rank order differs for {primary}"
+                checked += 1
+        print(f"✓ {checked} workflow sets resolved in dependency order")
+
+        plan = await workflow_manager.resolve_workflow_chain(
+            primary_workflows=["fabric_creation_workflow"],
+            parameters={},
+            session_id="test-dependency-index"
+        )
+        print(f"  fabric_creation_workflow chain: {plan.execution_chain}")
+        assert plan.execution_chain[0] == "login_flow"
+        assert plan.execution_chain[-1] == "fabric_creation_workflow"
+
+        print("\n🎉 SUCCESS: Dependency index works correctly!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Dependency index test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    success = asyncio.run(test_dependency_index())
+    sys.exit(0 if success else 1)
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Test script to verify out-of-process execution workers and the job broker
+File: test_execution_workers.py
+"""
+
+import asyncio
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+FAKES_BIN = os.path.join(BACKEND_DIR, "fakes", "bin")
+
+async def test_execution_workers():
+    """Test broker admission, stale job recovery and a worker process running a session"""
+    print("Testing execution workers...")
+    print("=" * 50)
+
+    try:
+        from services.broker import SQLiteJobBroker, BrokerJob, create_broker
+        from services.execution_workers import ExecutionWorker
+        from services.job_queue import QueueFullError
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            broker = SQLiteJobBroker(os.path.join(tmp_dir, "broker", "jobs.db"), max_depth=3, max_attempts=2)
+
+            # Positions follow priority, then submission order
+            assert await broker.enqueue("low", {"workflows": []}, priority="low") == 1
+            assert await broker.enqueue("normal", {"workflows": []}) == 1
+            assert await broker.enqueue("high", {"workflows": []}, priority="high") == 1
+            assert [await broker.get_position(s) for s in ("high", "normal", "low")] == [1, 2, 3]
+            try:
+                await broker.enqueue("overflow", {"workflows": []})
+                assert False, "expected QueueFullError"
+            except QueueFullError as e:
+                assert e.retry_after > 0
+            try:
+                await broker.enqueue("high", {"workflows": []})
+                assert False, "expected ValueError for duplicate session"
+            except ValueError:
+                pass
+            print("✓ Broker queues by priority and rejects overflow and duplicates")
+
+            # A job whose worker stops heartbeating is requeued, then failed after max attempts
+            job = await broker.claim("crashed-worker")
+            assert job.session_id == "high" and await broker.get_position("high") == 0
+            await asyncio.sleep(0.05)
+            assert await broker.requeue_stale(0.01) == 1
+            assert await broker.get_position("high") == 1
+            await broker.claim("crashed-worker")
+            await asyncio.sleep(0.05)
+            await broker.requeue_stale(0.01)
+            assert await broker.get_position("high") is None
+            events = await broker.fetch_events(0)
+            assert events[-1].session_id == "high" and events[-1].data["status"] == "failed"
+            print("✓ Stale jobs are requeued and failed after their last attempt")
+
+            # Finished jobs drop their credentials at once and the jobs themselves after the retention
+            assert broker._query("SELECT payload FROM jobs WHERE session_id = 'high'", ()) == [("{}",)]
+            broker.event_retention = 0
+            await asyncio.sleep(0.01)
+            await broker.requeue_stale(60)
+            assert broker._query("SELECT session_id FROM jobs ORDER BY id", ()) == [("low",), ("normal",)]
+            print("✓ Finished jobs are scrubbed and pruned")
+
+            # A failing heartbeat is retried instead of silently ending
+            class FlakyBroker(SQLiteJobBroker):
+                calls = 0
+
+                async def heartbeat(self, job_id):
+                    FlakyBroker.calls += 1
+                    if FlakyBroker.calls == 1:
+                        raise sqlite3.OperationalError("database is locked")
+                    return FlakyBroker.calls >= 3
+
+            worker = ExecutionWorker(FlakyBroker(broker.path), None, None, None, lease_seconds=0.15)
+            pipeline = asyncio.create_task(asyncio.sleep(10))
+            heartbeat = asyncio.create_task(worker._heartbeat(BrokerJob(1, "low", {}, 1), pipeline))
+            await asyncio.wait({pipeline}, timeout=2)
+            heartbeat.cancel()
+            assert pipeline.cancelled() and FlakyBroker.calls >= 3
+            print("✓ Heartbeats survive a locked database and still deliver cancellation")
+
+            try:
+                create_broker("redis://localhost")
+                assert False, "expected ValueError for unknown backend"
+            except ValueError:
+                pass
+
+        # A worker process runs a session and the API applies its updates
+        from services.session_manager import SessionManagerService
+        from services.execution_workers import BrokerResultConsumer
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            broker_url = f"sqlite:///{os.path.join(tmp_dir, 'jobs.db')}"
+            broker = create_broker(broker_url)
+            session_manager = SessionManagerService()
+            cluster_config = {"url": "https://10.0.0.1", "username": "admin", "password": "secret"}
+            await session_manager.create_session(
+                "worker-session", "Test login", ["login_flow"], {}, cluster_config
+            )
+
+            consumer = BrokerResultConsumer(broker, session_manager, poll_interval=0.1)
+            await consumer.start()
+            assert await broker.enqueue("worker-session", {
+                "session_id": "worker-session",
+                "workflows": ["login_flow"],
+                "parameters": {},
+                "cluster_config": cluster_config
+            }) == 1
+
+            env = dict(os.environ)
+            env["PATH"] = FAKES_BIN + os.pathsep + env["PATH"]
+            env["CISCO_IDP"] = "http://127.0.0.1:9/"
+            env["TRACING_EXPORTER"] = "none"
+            worker = subprocess.Popen(
+                [sys.executable, "worker.py", "--broker", broker_url, "--concurrency", "1",
+                 "--output-dir", os.path.join(tmp_dir, "outputs"),
+                 "--log-file", os.path.join(tmp_dir, "worker.log")],
+                cwd=BACKEND_DIR, env=env
+            )
+            try:
+                session = await session_manager.get_session("worker-session")
+                for _ in range(600):
+                    if session.status in ("completed", "failed"):
+                        break
+                    await asyncio.sleep(0.1)
+                assert session.status == "completed", f"session ended as {session.status}: {session.error_message}"
+                results = session.context["execution_results"]
+                assert results["worker_id"] and results["passed_tests"] == 1
+                assert results["test_results"]["login_flow"]["status"] == "passed"
+                assert await broker.get_position("worker-session") is None
+            finally:
+                worker.terminate()
+                worker.wait(timeout=30)
+                await consumer.stop()
+            assert worker.returncode == 0
+            print("✓ Worker process executed the session and results reached the session manager")
+
+        print("\n🎉 SUCCESS: Execution workers work correctly!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Execution workers test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    success = asyncio.run(test_execution_workers())
+    sys.exit(0 if success else 1)
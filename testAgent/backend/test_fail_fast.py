@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test script to verify dependents of failed workflows are skipped
+File: test_fail_fast.py
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+FAKES_BIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fakes", "bin")
+
+# Fail Azure OpenAI authentication fast so generation falls back to the basic generator
+os.environ["CISCO_IDP"] = "http://127.0.0.1:9/"
+os.environ["PATH"] = FAKES_BIN + os.pathsep + os.environ["PATH"]
+
+CLUSTER_CONFIG = {"url": "https://10.0.0.1", "username": "admin", "password": "secret"}
+SPEC = "import { test } from '@playwright/test';"
+
+def executed_workflows(log_path: str):
+    with open(log_path) as f:
+        return [json.loads(line)["workflow"] for line in f]
+
+async def test_fail_fast():
+    """Test that failures skip transitive dependents while unrelated branches run"""
+    print("Testing dependency fail-fast...")
+    print("=" * 50)
+
+    try:
+        from services.template_manager import TemplateManagerService
+        from services.playwright_generator import PlaywrightGeneratorService
+        from services.test_executor import TestExecutorService
+        from services.execution_pipeline import run_session_pipeline
+
+        template_manager = TemplateManagerService()
+        await template_manager.initialize()
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            log_path = os.path.join(tmp_dir, "playwright.log")
+            os.environ["FAKE_PLAYWRIGHT_LOG"] = log_path
+            test_executor = TestExecutorService(output_dir=os.path.join(tmp_dir, "outputs"))
+
+            # Skips follow the chain: a -> b -> c, d unrelated
+            os.environ["FAKE_PLAYWRIGHT_FAIL"] = "a"
+            results = await test_executor.execute_tests(
+                "chain", {"a": SPEC, "b": SPEC, "d": SPEC, "c": SPEC}, CLUSTER_CONFIG,
+                dependencies={"b": {"a"}, "c": {"b"}}
+            )
+            statuses = {w: r["status"] for w, r in results["test_results"].items()}
+            assert statuses == {"a": "failed", "b": "skipped", "d": "passed", "c": "skipped"}, statuses
+            assert results["test_results"]["c"]["failed_dependencies"] == ["b"]
+            assert results["skipped_tests"] == 2 and results["failed_tests"] == 1 and not results["success"]
+            assert executed_workflows(log_path) == ["a", "d"]
+            print("✓ Skips propagate along the chain and unrelated workflows still run")
+
+            # Template graph: a failed login skips everything that depends on it
+            os.remove(log_path)
+            os.environ["FAKE_PLAYWRIGHT_FAIL"] = "login_flow"
+            workflows = ["login_flow", "network_hierarchy", "inventory_workflow", "fabric_settings_workflow", "login"]
+            dependencies = {w: await template_manager.get_transitive_dependencies(w) for w in workflows}
+            results = await test_executor.execute_tests(
+                "broken-login", {w: SPEC for w in workflows}, CLUSTER_CONFIG, dependencies=dependencies
+            )
+            statuses = {w: r["status"] for w, r in results["test_results"].items()}
+            assert statuses == {"login_flow": "failed", "network_hierarchy": "skipped", "inventory_workflow": "skipped",
+                                "fabric_settings_workflow": "skipped", "login": "passed"}, statuses
+            assert executed_workflows(log_path) == ["login_flow", "login"]
+            assert "3 skipped after failed dependencies" in results["error_message"]
+            print(f"✓ Failed login skipped its dependents: {results['error_message']}")
+
+            # The session pipeline passes the template graph to the executor
+            os.remove(log_path)
+            async def report_status(status, error_message=None):
+                pass
+            results = await run_session_pipeline(
+                "pipeline", ["login_flow", "fabric_settings_workflow"], {}, CLUSTER_CONFIG,
+                template_manager, PlaywrightGeneratorService(), test_executor, report_status
+            )
+            assert results["test_results"]["fabric_settings_workflow"]["status"] == "skipped"
+            assert executed_workflows(log_path) == ["login_flow"]
+            print("✓ Session pipeline skips dependents using the template dependency graph")
+
+            del os.environ["FAKE_PLAYWRIGHT_FAIL"]
+            await test_executor.artifact_manager.wait_for_pending()
+
+        print("\n🎉 SUCCESS: Dependency fail-fast works correctly!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Fail-fast test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    success = asyncio.run(test_fail_fast())
+    sys.exit(0 if success else 1)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the hot path microbenchmarks and cycle detection on deep graphs
+File: test_hot_path_benchmarks.py
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+async def test_hot_path_benchmarks():
+    """Test synthetic corpora, deep graph validation, baselines and regression flagging"""
+    print("Testing hot path microbenchmarks...")
+    print("=" * 50)
+
+    try:
+        import bench_hot_paths as bench
+        from services.template_manager import TemplateManagerService
+
+        # Corpora are reproducible and exercise the parsers
+        corpus = bench.build_instruction_corpus(50)
+        assert corpus == bench.build_instruction_corpus(50) and len(set(corpus)) > 40
+        template_manager = TemplateManagerService()
+        template = bench.build_large_template(30, steps_per_case=6)
+        assert len(template_manager._extract_test_cases(template)) == 30
+        customized = await template_manager.customize_template(template, {"username": "admin"})
+        assert "{{" not in customized and "admin" in customized
+        print(f"✓ Synthetic corpora: {len(corpus)} instructions, template with 30 test cases")
+
+        # Chains far deeper than the recursion limit validate, and cycles are still found
+        depth = sys.getrecursionlimit() * 3
+        workflow_manager = await bench.build_workflow_manager(bench.build_deep_graph(depth))
+        deep = workflow_manager.template_manager
+        assert len(deep.transitive_dependencies["chain_00010"]) == 10
+        deep.dependency_graph["chain_00000"] = [f"chain_{depth - 1:05d}"]
+        assert deep._has_circular_dependencies()
+        deep.dependency_graph = {"a": ["b", "c"], "b": ["c"], "c": []}
+        assert not deep._has_circular_dependencies()
+        print(f"✓ Cycle detection handles a {depth}-deep chain without recursion")
+
+        plan = await workflow_manager.resolve_workflow_chain(["chain_00005"], {"cluster_url": "x"}, "s")
+        assert plan.execution_chain == [f"chain_{i:05d}" for i in range(6)]
+        wide = await bench.build_workflow_manager(bench.build_wide_graph(50))
+        plan = await wide.resolve_workflow_chain(["layer2_00001"], {"cluster_url": "x"}, "s")
+        assert plan.execution_chain[0] == "root"
+        print("✓ Deep and wide synthetic graphs resolve in dependency order")
+
+        # Baselines round-trip and slower runs are flagged beyond the threshold
+        names = ["template._extract_test_cases[2000 cases]"]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "baselines", "hot_paths.json")
+            assert bench.load_baseline(path) is None
+            results = await bench.run_benchmarks(names, 2, None, 0.25)
+            bench.save_baseline(path, results)
+            baseline = bench.load_baseline(path)
+            assert set(baseline["benchmarks"]) == set(names) and baseline["python"]
+
+            baseline["benchmarks"][names[0]]["median"] /= 10
+            results = await bench.run_benchmarks(names, 2, baseline, 0.25)
+            assert results[names[0]]["regressed"] and results[names[0]]["change"] > 0.25
+            baseline["benchmarks"][names[0]]["median"] *= 1000
+            results = await bench.run_benchmarks(names, 2, baseline, 0.25)
+            assert not results[names[0]]["regressed"]
+        print("✓ Baselines are saved and regressions beyond the threshold are flagged")
+
+        print("\n🎉 SUCCESS: Hot path microbenchmarks work correctly!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Hot path microbenchmark test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    success = asyncio.run(test_hot_path_benchmarks())
+    sys.exit(0 if success else 1)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the session job queue and admission control
+File: test_job_queue.py
+"""
+
+import asyncio
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+async def test_job_queue():
+    """Test worker concurrency, priorities, depth limits and the API integration"""
+    print("Testing JobQueueService...")
+    print("=" * 50)
+
+    try:
+        from services.job_queue import JobQueueService, QueueFullError
+
+        queue = JobQueueService(workers=2, max_depth=3)
+        release = asyncio.Event()
+        running = set()
+        started = []
+        peak = 0
+
+        def make_job(name):
+            async def run():
+                nonlocal peak
+                running.add(name)
+                started.append(name)
+                peak = max(peak, len(running))
+                await release.wait()
+                running.discard(name)
+            return run
+
+        # Two jobs run, the rest wait in priority order
+        await queue.submit("a", make_job("a"))
+        await queue.submit("b", make_job("b"))
+        await asyncio.sleep(0.01)
+        assert queue.get_position("a") == 0 and queue.get_position("b") == 0
+        assert await queue.submit("low", make_job("low"), priority="low") == 1
+        assert await queue.submit("normal", make_job("normal")) == 1
+        assert await queue.submit("high", make_job("high"), priority="high") == 1
+        assert [queue.get_position(s) for s in ("high", "normal", "low")] == [1, 2, 3]
+        print("✓ Queue positions follow priority, then submission order")
+
+        try:
+            await queue.submit("overflow", make_job("overflow"))
+            assert False, "expected QueueFullError"
+        except QueueFullError as e:
+            assert e.retry_after > 0
+        try:
+            await queue.submit("a", make_job("a"))
+            assert False, "expected ValueError for duplicate session"
+        except ValueError:
+            pass
+        print("✓ Submissions beyond the depth limit and duplicates are rejected")
+
+        # A cancelled and resubmitted session takes its new place, not its old heap entry
+        assert await queue.cancel("high") == "queued"
+        assert await queue.submit("high", make_job("high"), priority="low") == 3
+        print("✓ Resubmitted sessions queue with their new priority")
+
+        release.set()
+        while queue.get_statistics()["completed"] < 5:
+            await asyncio.sleep(0.01)
+        assert peak == 2
+        assert started == ["a", "b", "normal", "low", "high"], started
+        print(f"✓ At most 2 jobs ran at once, execution order {started}")
+
+        # A failing job doesn't take its worker down
+        async def failing():
+            raise RuntimeError("boom")
+        await queue.submit("failing", failing)
+        await queue.submit("after", make_job("after"))
+        while queue.get_statistics()["completed"] < 6:
+            await asyncio.sleep(0.01)
+        assert queue.get_statistics()["failed"] == 1
+        print("✓ Failed jobs are counted and workers keep running")
+        await queue.stop()
+
+        # Without JOB_QUEUE_WORKERS the worker count follows MAX_CONCURRENT_TESTS, as set at runtime
+        from core.config import settings
+        configured = settings.JOB_QUEUE_WORKERS, settings.MAX_CONCURRENT_TESTS
+        try:
+            settings.JOB_QUEUE_WORKERS, settings.MAX_CONCURRENT_TESTS = None, 7
+            assert JobQueueService().workers == 7
+            settings.JOB_QUEUE_WORKERS = 3
+            assert JobQueueService().workers == 3
+        finally:
+            settings.JOB_QUEUE_WORKERS, settings.MAX_CONCURRENT_TESTS = configured
+        print("✓ Worker count defaults to MAX_CONCURRENT_TESTS")
+
+        # API: queued status, position and 429 when full
+        import httpx
+        import main
+        from services.job_queue import JobQueueService as Service
+
+        from services.template_manager import TemplateManagerService
+        template_manager = TemplateManagerService()
+        await template_manager.initialize()
+        await main.workflow_manager.set_template_manager(template_manager)
+
+        main.job_queue = Service(workers=1, max_depth=1)
+        gate = asyncio.Event()
+        executed = []
+        async def fake_execute(session_id, budget=None):
+            executed.append(session_id)
+            await gate.wait()
+        main.execute_test_workflow = fake_execute
+
+        for session_id in ("s1", "s2", "s3"):
+            session = await main.session_manager.create_session(session_id, "run inventory", ["inventory_workflow"], {}, {})
+            session.status = "parsed"
+
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/execute_test_plan", json={"session_id": "s1"})
+            assert response.status_code == 200 and response.json()["status"] == "queued"
+            await asyncio.sleep(0.01)
+            response = await client.post("/execute_test_plan", json={"session_id": "s2", "priority": "high"})
+            assert response.json()["queue_position"] == 1
+
+            status = (await client.post("/get_session_status", json={"session_id": "s2"})).json()
+            assert status["status"] == "queued" and status["queue_position"] == 1
+            print("✓ Session status reports queue position")
+
+            response = await client.post("/execute_test_plan", json={"session_id": "s3"})
+            assert response.status_code == 429 and int(response.headers["Retry-After"]) > 0
+            assert (await main.session_manager.get_session("s3")).status == "parsed"
+            print(f"✓ Full queue answers 429: {response.json()['detail']}")
+
+            response = await client.post("/execute_test_plan", json={"session_id": "missing"})
+            assert response.status_code == 404
+
+        gate.set()
+        while len(executed) < 2:
+            await asyncio.sleep(0.01)
+        await main.job_queue.stop()
+        assert executed == ["s1", "s2"]
+
+        print("\n🎉 SUCCESS: Job queue works correctly!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Job queue test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    success = asyncio.run(test_job_queue())
+    sys.exit(0 if success else 1)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test script to verify identical in-flight LLM completions are coalesced
+File: test_llm_coalescing.py
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+class SlowResponse:
+    def __init__(self, content):
+        self.content = content
+        self.response_metadata = {"token_usage": {"prompt_tokens": 100, "completion_tokens": 50}}
+
+class SlowModel:
+    """Chat model that takes a while to answer and counts its calls"""
+
+    def __init__(self, delay=0.3, error=None):
+        self.delay = delay
+        self.error = error
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def invoke(self, messages, max_tokens=None):
+        with self._lock:
+            self.calls.append(messages[-1].content)
+        time.sleep(self.delay)
+        if self.error:
+            raise RuntimeError(self.error)
+        return SlowResponse(f"answer to {messages[-1].content}")
+
+async def test_llm_coalescing():
+    """Test that concurrent identical prompts share one API call, result and error"""
+    print("Testing LLM request coalescing...")
+    print("=" * 50)
+
+    try:
+        from services.azure_openai_service import AzureOpenAIService
+        from core.metrics import LLM_REQUESTS
+
+        service = AzureOpenAIService()
+        service.access_token = "token"
+        service.token_expires_at = datetime.now() + timedelta(hours=1)
+        service.max_retries = 1
+
+        # A burst of identical prompts makes one call
+        service.llm = model = SlowModel()
+        coalesced_before = LLM_REQUESTS.get(status="coalesced")
+        responses = await asyncio.gather(*[
+            service.generate_completion("generate login_flow", max_tokens=100) for _ in range(8)
+        ])
+        assert len(model.calls) == 1, model.calls
+        assert all(r["content"] == "answer to generate login_flow" for r in responses)
+        assert LLM_REQUESTS.get(status="coalesced") - coalesced_before == 7
+        responses[0]["content"] = "changed"
+        assert responses[1]["content"] == "answer to generate login_flow"
+        print(f"✓ {len(responses)} identical concurrent requests made {len(model.calls)} API call")
+
+        # Different prompts, token limits or system prompts are not merged
+        service.llm = model = SlowModel()
+        await asyncio.gather(
+            service.generate_completion("generate login_flow", max_tokens=100),
+            service.generate_completion("generate inventory_workflow", max_tokens=100),
+            service.generate_completion("generate login_flow", max_tokens=200),
+            service.generate_completion("generate login_flow", max_tokens=100, system_prompt="be brief")
+        )
+        assert len(model.calls) == 4
+        print("✓ Requests differing in prompt, max tokens or system prompt are sent separately")
+
+        # Finished requests are not cached
+        await service.generate_completion("generate login_flow", max_tokens=100)
+        assert len(model.calls) == 5 and not service._inflight
+        print("✓ Only in-flight requests are shared; later requests call the API again")
+
+        # Every waiter receives the shared error
+        service.llm = model = SlowModel(error="rate limited")
+        results = await asyncio.gather(*[
+            service.generate_completion("generate fabric", max_tokens=100) for _ in range(4)
+        ], return_exceptions=True)
+        assert len(model.calls) == 1
+        assert all(isinstance(r, RuntimeError) and str(r) == "rate limited" for r in results), results
+        print("✓ All waiters receive the error of the shared request")
+
+        # A cancelled caller doesn't cancel the request for the others
+        service.llm = model = SlowModel()
+        first = asyncio.ensure_future(service.generate_completion("generate network", max_tokens=100))
+        second = asyncio.ensure_future(service.generate_completion("generate network", max_tokens=100))
+        await asyncio.sleep(0.05)
+        first.cancel()
+        response = await second
+        assert response["content"] == "answer to generate network" and len(model.calls) == 1
+        print("✓ Cancelling one caller leaves the shared request running for the rest")
+
+        print("\n🎉 SUCCESS: LLM request coalescing works correctly!")
+        return True
+
+    except Exception as e:
+        print(f"❌ LLM coalescing test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    success = asyncio.run(test_llm_coalescing())
+    sys.exit(0 if success else 1)
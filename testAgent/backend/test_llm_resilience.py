@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the LLM circuit breaker, adaptive concurrency and retry backoff
+File: test_llm_resilience.py
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+CLUSTER_CONFIG = {"url": "https://10.0.0.1", "username": "admin", "password": "secret"}
+
+class Response:
+    def __init__(self, content):
+        self.content = content
+        self.response_metadata = {"token_usage": {"prompt_tokens": 10, "completion_tokens": 5}}
+
+class ScriptedModel:
+    """Chat model that fails while `error` is set and tracks concurrent calls"""
+
+    def __init__(self, error=None, delay=0.0):
+        self.error = error
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def invoke(self, messages, max_tokens=None):
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.delay)
+            if self.error:
+                raise RuntimeError(self.error)
+            return Response("OK")
+        finally:
+            with self._lock:
+                self.active -= 1
+
+def make_service(model, threshold=3, reset_timeout=0.5, max_retries=3):
+    from services.azure_openai_service import AzureOpenAIService
+    from services.llm_resilience import CircuitBreaker
+
+    service = AzureOpenAIService()
+    service.llm = model
+    service.access_token = "token"
+    service.token_expires_at = datetime.now() + timedelta(hours=1)
+    service.max_retries = max_retries
+    service.backoff_base = 0.01
+    service.circuit_breaker = CircuitBreaker(threshold, reset_timeout, name="test")
+    return service
+
+async def test_llm_resilience():
+    """Test fail-fast on outages, recovery probes, AIMD limits and jittered backoff"""
+    print("Testing LLM client resilience...")
+    print("=" * 50)
+
+    try:
+        from services.llm_resilience import AdaptiveConcurrencyLimiter, CircuitOpenError, backoff_delay
+        from services.playwright_generator import PlaywrightGeneratorService
+        from core.metrics import LLM_REQUESTS
+
+        # Repeated failures open the circuit, after which requests fail without calling the endpoint
+        model = ScriptedModel(error="Connection error")
+        service = make_service(model)
+        try:
+            await service.generate_completion("generate", max_tokens=10)
+            raise AssertionError("failing endpoint returned a completion")
+        except RuntimeError:
+            pass
+        assert model.calls == 3 and service.circuit_breaker.state == "open"
+
+        rejected_before = LLM_REQUESTS.get(status="rejected")
+        started = time.monotonic()
+        try:
+            await service.generate_completion("generate again", max_tokens=10)
+            raise AssertionError("open circuit sent a request")
+        except CircuitOpenError:
+            pass
+        assert time.monotonic() - started < 0.1 and model.calls == 3
+        assert LLM_REQUESTS.get(status="rejected") - rejected_before == 1
+        print("✓ Circuit opens after repeated failures and rejects requests immediately")
+
+        # Generation falls back to the basic generator at once while the circuit is open
+        generator = PlaywrightGeneratorService(generation_mode="template")
+        generator.azure_openai = service
+        started = time.monotonic()
+        code = await generator.generate_playwright_test(
+            "login_flow", "test_login\nGiven: The user opens the login page", CLUSTER_CONFIG
+        )
+        elapsed = time.monotonic() - started
+        assert "test(" in code and model.calls == 3 and elapsed < 0.5, elapsed
+        print(f"✓ Generation fell back to basic generation in {elapsed * 1000:.0f}ms during the outage")
+
+        # After the reset timeout a single probe is let through; its success closes the circuit
+        await asyncio.sleep(0.55)
+        model.error = None
+        model.delay = 0.2
+        results = await asyncio.gather(
+            service.generate_completion("probe", max_tokens=10),
+            service.generate_completion("second", max_tokens=10),
+            return_exceptions=True
+        )
+        assert results[0]["content"] == "OK" and isinstance(results[1], CircuitOpenError), results
+        assert service.circuit_breaker.state == "closed" and model.calls == 4
+        assert (await service.generate_completion("after recovery", max_tokens=10))["content"] == "OK"
+        print("✓ Half-open circuit sends one probe and closes when it succeeds")
+
+        # A failed probe reopens the circuit straight away
+        for _ in range(3):
+            service.circuit_breaker.record_failure()
+        await asyncio.sleep(0.55)
+        model.error = "Connection error"
+        try:
+            await service.generate_completion("failing probe", max_tokens=10)
+        except (RuntimeError, CircuitOpenError):
+            pass
+        assert service.circuit_breaker.state == "open" and model.calls == 6
+        print("✓ Failed probe reopens the circuit without further retries")
+
+        # Concurrency stays within the limit, which halves on rate limiting
+        model = ScriptedModel(delay=0.1)
+        service = make_service(model, threshold=100, max_retries=2)
+        service.concurrency_limiter = AdaptiveConcurrencyLimiter(4, 1, 8, latency_target=5.0)
+        await asyncio.gather(*[service.generate_completion(f"prompt {i}", max_tokens=10) for i in range(12)])
+        grown = service.concurrency_limiter.limit
+        # The limit only grows during the batch, so it bounds every point of the run
+        assert grown > 4 and model.max_active <= int(grown), (model.max_active, grown)
+        model.error = "Error code: 429 - Too Many Requests"
+        await asyncio.gather(*[service.generate_completion(f"limited {i}", max_tokens=10) for i in range(4)],
+                             return_exceptions=True)
+        stats = service.get_statistics()["concurrency"]
+        assert stats["limit"] < grown and stats["decreases"] >= 1 and stats["in_flight"] == 0, stats
+        print(f"✓ Concurrency capped at {model.max_active}, grew to {grown:.2f} and fell to {stats['limit']} on 429s")
+
+        # Slow responses reduce the limit too
+        limiter = AdaptiveConcurrencyLimiter(8, 1, 8, latency_target=1.0)
+        await limiter.acquire()
+        await limiter.release(latency=3.0)
+        assert limiter.get_statistics()["limit"] == 4
+        print("✓ Responses slower than the latency target halve the limit")
+
+        # A burst of overloaded requests from one epoch halves the limit once
+        limiter = AdaptiveConcurrencyLimiter(8, 1, 8, latency_target=1.0)
+        epochs = [await limiter.acquire() for _ in range(6)]
+        for epoch in epochs:
+            await limiter.release(overloaded=True, epoch=epoch)
+        assert limiter.get_statistics()["limit"] == 4 and limiter.decreases == 1
+        epoch = await limiter.acquire()
+        await limiter.release(overloaded=True, epoch=epoch)
+        assert limiter.get_statistics()["limit"] == 2 and limiter.decreases == 2
+        print("✓ Concurrent 429s count as one congestion event; later ones halve the limit again")
+
+        # Backoff is jittered within the exponential bound
+        delays = [backoff_delay(3, 1.0, 5.0) for _ in range(50)]
+        assert all(0 <= d <= 5.0 for d in delays) and len(set(delays)) > 40
+        assert all(0 <= backoff_delay(1, 1.0, 20.0) <= 2.0 for _ in range(50))
+        print("✓ Retry delays are spread over the exponential backoff window")
+
+        print("\n🎉 SUCCESS: LLM client resilience works correctly!")
+        return True
+
+    except Exception as e:
+        print(f"❌ LLM resilience test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    success = asyncio.run(test_llm_resilience())
+    sys.exit(0 if success else 1)
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Test script to verify model routing by template complexity
+File: test_model_routing.py
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+import httpx
+from openai import APITimeoutError
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+CLUSTER_CONFIG = {"url": "https://10.0.0.1", "username": "admin", "password": "secret"}
+EXPECTED_ROUTES = {
+    "login_flow": "small", "login": "small", "network_hierarchy": "medium", "fabric_settings_workflow": "medium",
+    "inventory_workflow": "large", "fabric_creation_workflow": "large"
+}
+
+class Response:
+    def __init__(self, content):
+        self.content = content
+        self.response_metadata = {"token_usage": {"prompt_tokens": 100, "completion_tokens": 50}}
+
+class DeploymentModel:
+    """Chat model standing in for one deployment; records output limits and times out like the client"""
+
+    def __init__(self, name, delay=0.0, timeout=None):
+        self.name = name
+        self.delay = delay
+        self.timeout = timeout
+        self.max_tokens = []
+        self._lock = threading.Lock()
+
+    def invoke(self, messages, max_tokens=None):
+        with self._lock:
+            self.max_tokens.append(max_tokens)
+        if self.timeout and self.delay > self.timeout:
+            time.sleep(self.timeout)
+            raise APITimeoutError(request=httpx.Request("POST", "https://fake/chat/completions"))
+        time.sleep(self.delay)
+        return Response(f"```typescript\nimport {{ test }} from '@playwright/test';\n// {self.name}\n"
+                        "test('generated', async ({ page }) => {});\n```")
+
+async def test_model_routing():
+    """Test template statistics, route selection, per-route limits and recorded outcomes"""
+    print("Testing model routing by template complexity...")
+    print("=" * 50)
+
+    try:
+        from services.azure_openai_service import AzureOpenAIService
+        from services.model_router import ModelRouter, ModelRoute, template_stats, default_routes
+        from services.template_manager import TemplateManagerService
+        from core.metrics import metrics
+
+        # Statistics come from the test cases, steps and metadata of the shipped templates
+        template_manager = TemplateManagerService()
+        await template_manager.initialize()
+        templates = {
+            name: await template_manager.customize_template(template.content, CLUSTER_CONFIG)
+            for name, template in template_manager.templates.items()
+        }
+        durations = {name: template.metadata.estimated_duration for name, template in template_manager.templates.items()}
+        login_stats = template_stats(templates["login_flow"], durations["login_flow"])
+        assert (login_stats.test_cases, login_stats.steps, login_stats.estimated_duration) == (2, 8, 30), login_stats
+        with open(template_manager.templates["login_flow"].file_path) as f:
+            assert template_stats(f.read()).estimated_duration == 30
+        inferred = template_stats("test_a\nGiven: x\nWhen: y\nThen: z\n")
+        assert (inferred.test_cases, inferred.steps, inferred.estimated_duration) == (1, 3, 40), inferred
+        print(f"✓ login_flow has {login_stats.test_cases} test cases, {login_stats.steps} steps, "
+              f"~{login_stats.estimated_duration}s; duration is read or inferred without metadata")
+
+        # Small workflows take the small route, everything too big for the others the last one
+        router = ModelRouter()
+        assert [route.name for route in router.routes] == ["small", "medium", "large"]
+        for name, expected in EXPECTED_ROUTES.items():
+            assert router.select(templates[name], name, durations[name]).name == expected, name
+        huge = "\n".join(f"test_{i}\nWhen: step {i}" for i in range(200))
+        assert router.select(huge).name == "large"
+        print(f"✓ Shipped templates route by size: {EXPECTED_ROUTES}")
+
+        # Each route's deployment gets the spec request with the route's output limit
+        service = AzureOpenAIService()
+        service.access_token = "token"
+        service.token_expires_at = datetime.now() + timedelta(hours=1)
+        service.backoff_base = service.backoff_max = 0.01
+        service.model_router = ModelRouter([
+            ModelRoute("small", "mini", max_tokens=500, timeout=5, max_steps=12),
+            ModelRoute("large", service.model, max_tokens=4000, timeout=5)
+        ])
+        service.llm = default = DeploymentModel("default")
+        service._llms[("mini", 5)] = mini = DeploymentModel("mini")
+        service._llms[(service.model, 5)] = default
+
+        code = await service.generate_playwright_test(templates["login_flow"], CLUSTER_CONFIG, "login_flow")
+        assert "// mini" in code and mini.max_tokens == [500], mini.max_tokens
+        code = await service.generate_playwright_test(templates["inventory_workflow"], CLUSTER_CONFIG, "inventory_workflow")
+        assert "// default" in code and 500 < default.max_tokens[0] <= 4000, default.max_tokens
+        print(f"✓ login_flow went to 'mini' with {mini.max_tokens[0]} tokens, "
+              f"inventory_workflow to '{service.model}' with {default.max_tokens[0]}")
+
+        # The same prompt on different deployments is not coalesced
+        small, large = service.model_router.routes
+        responses = await asyncio.gather(
+            service.generate_completion("same prompt", max_tokens=100, route=small),
+            service.generate_completion("same prompt", max_tokens=100, route=large)
+        )
+        assert [r["model"] for r in responses] == ["mini", service.model]
+        assert [r["route"] for r in responses] == ["small", "large"]
+        print("✓ Completions report their deployment and route and coalesce per deployment")
+
+        # Route clients carry the timeout, so the HTTP request itself is abandoned, without client retries
+        client = service._create_llm("gpt-4.1-mini", 12.5)
+        assert client.request_timeout == 12.5 and client.max_retries == 0
+        assert service._create_llm(service.model).request_timeout is None
+
+        # Attempts slower than the route timeout fail, shrink the concurrency limit and count against the route
+        service.model_router = ModelRouter([ModelRoute("small", "slow", max_tokens=500, timeout=0.1)])
+        service._llms[("slow", 0.1)] = slow = DeploymentModel("slow", delay=0.5, timeout=0.1)
+        decreases = service.concurrency_limiter.decreases
+        started = time.monotonic()
+        try:
+            await service.generate_completion("slow prompt", max_tokens=100, route=service.model_router.routes[0])
+            raise AssertionError("Expected the route timeout")
+        except APITimeoutError:
+            pass
+        assert time.monotonic() - started < 0.5 * service.max_retries
+        assert service.get_statistics()["routes"]["small"]["failures"] == service.max_retries
+        assert service.concurrency_limiter.decreases - decreases == service.max_retries
+        assert service.concurrency_limiter.in_flight == 0
+        service.circuit_breaker.record_success()
+        print(f"✓ Route timeout ended {service.max_retries} slow attempts and halved the concurrency limit each time")
+
+        # Outcomes and latencies are kept per route and exported as metrics
+        slow.delay = 0.02
+        for _ in range(3):
+            await service.generate_completion(f"prompt {_}", max_tokens=100, route=service.model_router.routes[0])
+        statistics = service.get_statistics()["routes"]["small"]
+        assert statistics["requests"] == service.max_retries + 3 and statistics["successes"] == 3
+        assert statistics["success_rate"] == 3 / (service.max_retries + 3)
+        assert 0.02 <= statistics["latency_p50"] <= statistics["latency_p95"] < 0.5
+        assert statistics["deployment"] == "slow" and statistics["timeout"] == 0.1
+        rendered = metrics.render()
+        assert 'e2e_llm_route_requests_total{route="small",status="error"}' in rendered
+        assert 'e2e_llm_route_latency_seconds_count{route="small"}' in rendered
+        print(f"✓ Small route: {statistics['success_rate']:.0%} success, p50 {statistics['latency_p50'] * 1000:.0f} ms")
+
+        # Without routing the default model and the prompt's own limit are used
+        service.model_routing = False
+        default.max_tokens.clear()
+        await service.generate_playwright_test(templates["login_flow"], CLUSTER_CONFIG, "login_flow")
+        assert default.max_tokens and default.max_tokens[0] > 500
+        assert all(route.deployment == service.model for route in default_routes())
+        print("✓ Disabled routing keeps the default deployment; unset route deployments fall back to it")
+
+        print("\n🎉 SUCCESS: Model routing works correctly!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Model routing test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    success = asyncio.run(test_model_routing())
+    sys.exit(0 if success else 1)
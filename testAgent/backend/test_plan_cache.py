@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test script to verify execution plan caching in the workflow manager
+File: test_plan_cache.py
+"""
+
+import asyncio
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+async def test_plan_cache():
+    """Test that repeat plans hit the cache and clarification plans never do"""
+    print("Testing WorkflowManagerService plan cache...")
+    print("=" * 50)
+
+    try:
+        from services.template_manager import TemplateManagerService
+        from services.workflow_manager import WorkflowManagerService
+
+        template_manager = TemplateManagerService()
+        await template_manager.initialize()
+
+        workflow_manager = WorkflowManagerService()
+        await workflow_manager.set_template_manager(template_manager)
+        workflow_manager.cluster_inventory = None  # Use mock cluster resources
+
+        parameters = {"username": "admin", "password": "secret", "cluster_url": "https://10.0.0.1"}
+
+        first = await workflow_manager.resolve_workflow_chain(["inventory_workflow"], parameters, "session-1")
+        second = await workflow_manager.resolve_workflow_chain(["inventory_workflow"], dict(parameters, password="other"), "session-2")
+
+        assert workflow_manager.plan_cache_misses == 1 and workflow_manager.plan_cache_hits == 1
+        assert first.execution_chain == second.execution_chain
+        assert second.session_id == "session-2" and second.parameters["password"] == "other"
+        print(f"✓ Repeat plan served from cache: {second.execution_chain}")
+
+        # Irrelevant parameter keys share the entry, relevant ones don't
+        await workflow_manager.resolve_workflow_chain(["inventory_workflow"], dict(parameters, quoted_values=["x"]), "session-3")
+        assert workflow_manager.plan_cache_hits == 2
+        await workflow_manager.resolve_workflow_chain(["inventory_workflow"], dict(parameters, building_name="B1"), "session-4")
+        assert workflow_manager.plan_cache_misses == 2
+        print("✓ Cache key only includes template-relevant parameter keys")
+
+        # Mutating a cached plan must not leak into later sessions
+        second.execution_chain.append("mutated")
+        third = await workflow_manager.resolve_workflow_chain(["inventory_workflow"], parameters, "session-5")
+        assert "mutated" not in third.execution_chain
+        print("✓ Cached plans are isolated per session")
+
+        # A new graph version invalidates existing entries
+        await template_manager._build_dependency_graph()
+        await workflow_manager.resolve_workflow_chain(["inventory_workflow"], parameters, "session-6")
+        assert workflow_manager.plan_cache_misses == 3
+        print("✓ Graph version change invalidates cached plans")
+
+        # Clarification plans and cluster-dependent plans are never cached
+        workflow_manager.mock_cluster_resources["fabrics"] = [{"id": "f1", "name": "Fabric1"}]
+        for _ in range(2):
+            plan = await workflow_manager.resolve_workflow_chain(["fabric_settings_workflow"], parameters, "session-7")
+            assert plan.requires_clarification
+        assert workflow_manager.plan_cache_misses == 5
+        print("✓ Clarification plans are not cached")
+
+        workflow_manager.mock_cluster_resources["fabrics"] = []
+        for _ in range(2):
+            plan = await workflow_manager.resolve_workflow_chain(["fabric_settings_workflow"], parameters, "session-8")
+            assert not plan.requires_clarification
+        assert workflow_manager.plan_cache_misses == 7
+        print("✓ Plans decided by cluster state are not cached")
+
+        stats = await workflow_manager.get_manager_statistics()
+        print(f"  Cache stats: {stats['plan_cache']}")
+
+        print("\n🎉 SUCCESS: Plan cache works correctly!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Plan cache test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    success = asyncio.run(test_plan_cache())
+    sys.exit(0 if success else 1)
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Test script to verify token-budgeted prompt building and per-session token accounting
+File: test_prompt_builder.py
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+FAKES_BIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fakes", "bin")
+os.environ["PATH"] = FAKES_BIN + os.pathsep + os.environ["PATH"]
+
+CLUSTER_CONFIG = {"url": "https://10.0.0.1", "username": "admin", "password": "secret"}
+SPEC = """import { test, expect, Page } from '@playwright/test';
+
+test.describe('generated', () => {
+  test('works', async ({ page }) => {
+    await page.goto(process.env.CLUSTER_URL);
+    await expect(page).toHaveURL(/10.0.0.1/);
+  });
+});"""
+
+class SpecResponse:
+    def __init__(self):
+        self.content = "```typescript\n" + SPEC + "\n```"
+        self.response_metadata = {"token_usage": {"prompt_tokens": 1500, "completion_tokens": 400}}
+
+class SpecModel:
+    """Chat model that records prompts and answers with a fixed spec"""
+
+    def __init__(self):
+        self.requests = []
+
+    def invoke(self, messages, max_tokens=None):
+        self.requests.append((messages, max_tokens))
+        return SpecResponse()
+
+async def test_prompt_builder():
+    """Test prompt trimming, token limits and session token budgets"""
+    print("Testing token-budgeted prompt building...")
+    print("=" * 50)
+
+    try:
+        from services.prompt_builder import (
+            PlaywrightPromptBuilder, TokenBudgetExceeded, count_tokens, token_ledger, OPTIONAL_SECTIONS, SYSTEM_PROMPT
+        )
+        from services.template_manager import TemplateManagerService
+        from services.azure_openai_service import azure_openai_service
+        from services.playwright_generator import PlaywrightGeneratorService
+        from services.test_executor import TestExecutorService
+        from services.execution_pipeline import run_session_pipeline
+        from core.config import settings
+
+        template_manager = TemplateManagerService()
+        await template_manager.initialize()
+        prompt_template = await template_manager.get_playwright_prompt_template()
+        parameters = {"file_name": "devices.csv", "building_name": "Building 1", "fabric_name": "Fabric 1"}
+
+        async def template_of(workflow_name):
+            return await template_manager.customize_template(
+                await template_manager.load_tdd_template(workflow_name), parameters
+            )
+
+        fabric = await template_of("fabric_creation_workflow")
+        inventory = await template_of("inventory_workflow")
+        login = await template_of("login_flow")
+
+        # Braces in the template's code samples survive; placeholders are filled in
+        builder = PlaywrightPromptBuilder(prompt_template, max_input_tokens=100000)
+        built = builder.build("fabric_creation_workflow", fabric, CLUSTER_CONFIG)
+        assert "import { test, expect, Page } from '@playwright/test';" in built.prompt
+        assert "test_assign_device_groups" in built.prompt and "https://10.0.0.1" in built.prompt
+        assert "{tdd_template}" not in built.prompt and "{cluster_url}" not in built.prompt
+        print("✓ Prompt template code samples no longer break placeholder substitution")
+
+        # Guidance the workflow doesn't need is left out
+        assert "Browser Configuration" not in built.prompt
+        assert "**File Upload**" not in built.prompt and "**Dialogs**" in built.prompt
+        assert "**File Upload**" in builder.build("inventory_workflow", inventory, CLUSTER_CONFIG).prompt
+        untrimmed = count_tokens(SYSTEM_PROMPT + prompt_template + fabric)
+        assert built.prompt_tokens < untrimmed and not built.dropped_sections
+        print(f"✓ Fabric prompt trimmed from about {untrimmed} to {built.prompt_tokens} tokens")
+
+        # Optional sections are dropped in order until the prompt fits
+        limit = built.prompt_tokens - 150
+        tight = PlaywrightPromptBuilder(prompt_template, max_input_tokens=limit).build(
+            "fabric_creation_workflow", fabric, CLUSTER_CONFIG
+        )
+        assert tight.dropped_sections and tight.dropped_sections == list(OPTIONAL_SECTIONS[:len(tight.dropped_sections)])
+        assert tight.prompt_tokens <= limit and "test_assign_device_groups" in tight.prompt
+        print(f"✓ Over the limit, dropped {', '.join(tight.dropped_sections)} to fit {limit} tokens")
+
+        # Output allowance follows the number of TDD steps
+        login_built = builder.build("login_flow", login, CLUSTER_CONFIG)
+        assert login_built.max_output_tokens < built.max_output_tokens <= settings.GENERATION_MAX_OUTPUT_TOKENS
+        print(f"✓ Output allowance: login {login_built.max_output_tokens}, fabric {built.max_output_tokens} tokens")
+
+        # A tokenizer download that hangs holds up neither counting nor the event loop
+        import services.prompt_builder as prompt_builder
+        load_encoding, requested = prompt_builder._load_encoding, prompt_builder._encoding_requested
+        loads = []
+        prompt_builder._load_encoding = lambda: (loads.append(1), time.sleep(1))
+        try:
+            prompt_builder._encoding_requested = False
+            started = time.monotonic()
+            ticker = asyncio.create_task(asyncio.sleep(0.05))
+            await prompt_builder.load_tokenizer(timeout=0.2)
+            assert ticker.done() and time.monotonic() - started < 0.5 and loads == [1]
+            await prompt_builder.load_tokenizer(timeout=0.2)
+            assert loads == [1] and count_tokens("abcdefgh") > 0
+        finally:
+            prompt_builder._load_encoding, prompt_builder._encoding_requested = load_encoding, requested
+        print("✓ Tokenizer loads once off the event loop and startup stops waiting after the timeout")
+
+        # Requests are accounted to the session and rejected beyond its budget
+        model = SpecModel()
+        azure_openai_service.llm = model
+        # Routed requests would use their own per-route clients instead of the fake
+        azure_openai_service.model_routing = False
+        azure_openai_service.access_token = "token"
+        azure_openai_service.token_expires_at = datetime.now() + timedelta(hours=1)
+
+        with token_ledger("ledger-session", budget=7000) as ledger:
+            code = await azure_openai_service.generate_playwright_test(login, CLUSTER_CONFIG, "login_flow")
+            assert code == SPEC
+            messages, max_tokens = model.requests[-1]
+            assert max_tokens == login_built.max_output_tokens and "varsaraf" not in messages[0].content
+            assert ledger.prompt_tokens == 1500 and ledger.completion_tokens == 400 and ledger.requests == 1
+            try:
+                await azure_openai_service.generate_playwright_test(fabric, CLUSTER_CONFIG, "fabric_creation_workflow")
+                raise AssertionError("request over the budget was sent")
+            except TokenBudgetExceeded:
+                pass
+            assert len(model.requests) == 1 and ledger.to_dict()["rejected_requests"] == 1
+        print(f"✓ Session ledger recorded {ledger.used} tokens and rejected a request over its budget")
+
+        # The pipeline reports token usage and falls back to basic generation beyond the budget
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            os.environ["FAKE_PLAYWRIGHT_LOG"] = os.path.join(tmp_dir, "playwright.log")
+            test_executor = TestExecutorService(output_dir=os.path.join(tmp_dir, "outputs"))
+
+            async def report_status(status, error_message=None):
+                pass
+
+            original_budget = settings.SESSION_TOKEN_BUDGET
+            settings.SESSION_TOKEN_BUDGET = 8000
+            try:
+                model.requests.clear()
+                results = await run_session_pipeline(
+                    "budget-session", ["login_flow", "fabric_creation_workflow"], parameters, CLUSTER_CONFIG,
+                    template_manager, PlaywrightGeneratorService(generation_mode="template"), test_executor, report_status
+                )
+            finally:
+                settings.SESSION_TOKEN_BUDGET = original_budget
+            usage = results["token_usage"]
+            assert usage["requests"] == 1 and usage["total_tokens"] == 1900 and usage["rejected_requests"] == 1
+            assert usage["budget"] == 8000 and len(model.requests) == 1
+            assert results["test_results"]["fabric_creation_workflow"]["status"] == "passed"
+            await test_executor.artifact_manager.wait_for_pending()
+        print(f"✓ Pipeline reported token usage {usage} and generated the rest without the LLM")
+
+        print("\n🎉 SUCCESS: Token-budgeted prompt building works correctly!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Prompt builder test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    success = asyncio.run(test_prompt_builder())
+    sys.exit(0 if success else 1)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the session-level shared login and navigation fixtures
+File: test_shared_fixtures.py
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+FAKES_BIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fakes", "bin")
+os.environ["PATH"] = FAKES_BIN + os.pathsep + os.environ["PATH"]
+
+CLUSTER_CONFIG = {"url": "https://10.0.0.1", "username": "admin", "password": "secret"}
+WORKFLOWS = ["login_flow", "inventory_workflow", "network_hierarchy", "fabric_creation_workflow", "fabric_settings_workflow"]
+
+class Response:
+    def __init__(self, content):
+        self.content = content
+        self.response_metadata = {"token_usage": {"prompt_tokens": 100, "completion_tokens": 50}}
+
+class RecordingModel:
+    """Chat model that records generation prompts and their output limits"""
+
+    def __init__(self):
+        self.requests = []
+
+    def invoke(self, messages, max_tokens=None):
+        self.requests.append((messages[-1].content, max_tokens))
+        return Response("```typescript\nimport { test, expect } from '@playwright/test';\n"
+                        "import { openApp, ensureLoggedIn } from './common/fixtures';\n"
+                        "test('llm', async ({ browser }) => {\n  const page = await openApp(browser);\n"
+                        "  await ensureLoggedIn(page);\n  await expect(page).toHaveTitle(/Catalyst Center/);\n});\n```")
+
+def read_log(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+async def test_shared_fixtures():
+    """Test the fixtures module, importing specs, smaller prompts and the session files"""
+    print("Testing shared login and navigation fixtures...")
+    print("=" * 50)
+
+    try:
+        from services.tdd_compiler import TDDCompiler, HELPERS, FIXTURES_PATH, fixtures_module
+        from services.template_manager import TemplateManagerService
+        from services.playwright_generator import PlaywrightGeneratorService
+        from services.prompt_builder import PlaywrightPromptBuilder
+        from services.test_executor import TestExecutorService
+        from services.spec_compiler import SpecCompiler
+        from services.execution_pipeline import run_session_pipeline
+        from services.azure_openai_service import azure_openai_service
+
+        # One module exports every helper
+        module = fixtures_module(CLUSTER_CONFIG["url"])
+        assert all(f"export async function {name}(" in module or f"export function {name}(" in module for name in HELPERS)
+        assert "export const CLUSTER_URL" in module and module.count("{") == module.count("}")
+        print(f"✓ Fixtures module exports {len(HELPERS)} login and navigation helpers")
+
+        # Compiled specs import the helpers they call instead of declaring them
+        template_manager = TemplateManagerService()
+        await template_manager.initialize()
+        templates = {
+            name: await template_manager.customize_template(await template_manager.load_tdd_template(name), CLUSTER_CONFIG)
+            for name in WORKFLOWS
+        }
+        shared, inline = TDDCompiler(shared_fixtures=True), TDDCompiler(shared_fixtures=False)
+        shared_size = inline_size = 0
+        for name, template in templates.items():
+            code = shared.compile(name, template, CLUSTER_CONFIG).code
+            assert "from './common/fixtures';" in code and "function " not in code, name
+            shared_size += len(code)
+            inline_size += len(inline.compile(name, template, CLUSTER_CONFIG).code)
+        login = shared.compile("login_flow", templates["login_flow"], CLUSTER_CONFIG).code
+        assert "import { CLUSTER_URL, openApp, fillCredentials, submitLogin } from './common/fixtures';" in login, login[:300]
+        assert shared_size < inline_size * 0.8
+        print(f"✓ Compiled specs shrink from {inline_size} to {shared_size} characters")
+
+        # Prompts describe the fixtures instead of login, navigation and selector guidance
+        prompt_template = await template_manager.get_playwright_prompt_template()
+        builder = PlaywrightPromptBuilder(prompt_template)
+        for name, template in templates.items():
+            standalone = builder.build(name, template, CLUSTER_CONFIG)
+            with_fixtures = builder.build(name, template, CLUSTER_CONFIG, shared_fixtures=True)
+            assert with_fixtures.prompt_tokens < standalone.prompt_tokens, name
+            assert with_fixtures.max_output_tokens <= standalone.max_output_tokens, name
+            assert "./common/fixtures" in with_fixtures.prompt and "navigateTo(page, ...items)" in with_fixtures.prompt
+            assert "Password: secret" in standalone.prompt and "Password: secret" not in with_fixtures.prompt
+            assert "Selectors Strategy" not in with_fixtures.prompt and "Reuse authenticated state" not in with_fixtures.prompt
+        print(f"✓ Prompts with fixtures are smaller: {standalone.prompt_tokens} -> {with_fixtures.prompt_tokens} tokens "
+              f"for {name}, output allowance {standalone.max_output_tokens} -> {with_fixtures.max_output_tokens}")
+
+        # A session writes the module once next to its specs, for the type check and the runs
+        model = RecordingModel()
+        azure_openai_service.llm = model
+        # Routed requests would use their own per-route clients instead of the fake
+        azure_openai_service.model_routing = False
+        azure_openai_service.access_token = "token"
+        azure_openai_service.token_expires_at = datetime.now() + timedelta(hours=1)
+
+        async def report_status(status, error_message=None):
+            pass
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            os.environ["FAKE_PLAYWRIGHT_LOG"] = os.path.join(tmp_dir, "playwright.log")
+            test_executor = TestExecutorService(output_dir=os.path.join(tmp_dir, "outputs"))
+            generator = PlaywrightGeneratorService(
+                generation_mode="hybrid", spec_compiler=SpecCompiler(work_dir=os.path.join(tmp_dir, "compile")),
+                tdd_compiler=TDDCompiler(shared_fixtures=True)
+            )
+            # login_flow is fully covered by rules; inventory_workflow goes to the LLM
+            generator.rule_coverage_threshold = 0.99
+            results = await run_session_pipeline(
+                "fixtures-session", ["login_flow", "inventory_workflow"], {"file_name": "devices.csv"}, CLUSTER_CONFIG,
+                template_manager, generator, test_executor, report_status
+            )
+            assert results["success"], results.get("error_message")
+            session_dir = os.path.join(tmp_dir, "outputs", "fixtures-session")
+            with open(os.path.join(session_dir, FIXTURES_PATH)) as f:
+                assert f.read() == module
+            for name in ["login_flow", "inventory_workflow"]:
+                with open(os.path.join(session_dir, f"{name}.spec.ts")) as f:
+                    assert "./common/fixtures" in f.read()
+            assert [run["workflow"] for run in read_log(os.environ["FAKE_PLAYWRIGHT_LOG"])] == ["login_flow", "inventory_workflow"]
+            assert len(model.requests) == 1 and "## Shared Fixtures" in model.requests[0][0]
+            await test_executor.artifact_manager.wait_for_pending()
+        print("✓ Session wrote common/fixtures.ts once; rule-compiled and LLM specs both import it")
+
+        # Without shared fixtures nothing extra is written
+        assert PlaywrightGeneratorService(tdd_compiler=TDDCompiler(shared_fixtures=False)).support_files(CLUSTER_CONFIG) == {}
+        print("✓ Disabled fixtures keep specs self-contained")
+
+        print("\n🎉 SUCCESS: Shared fixtures work correctly!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Shared fixtures test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    success = asyncio.run(test_shared_fixtures())
+    sys.exit(0 if success else 1)
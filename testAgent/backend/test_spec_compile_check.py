@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Test script to verify generated specs are type-checked and repaired before they run
+File: test_spec_compile_check.py
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+FAKES_BIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fakes", "bin")
+os.environ["PATH"] = FAKES_BIN + os.pathsep + os.environ["PATH"]
+
+CLUSTER_CONFIG = {"url": "https://10.0.0.1", "username": "admin", "password": "secret"}
+GOOD_SPEC = """import { test, expect, Page } from '@playwright/test';
+
+test.describe('generated', () => {
+  test('works', async ({ page }) => {
+    await page.goto(process.env.CLUSTER_URL);
+    await expect(page).toHaveURL(/10.0.0.1/);
+  });
+});"""
+BROKEN_SPEC = GOOD_SPEC.replace("await page.goto(process.env.CLUSTER_URL);", "await BROKEN_TS.goto(process.env.CLUSTER_URL);")
+
+class Response:
+    def __init__(self, code):
+        self.content = "```typescript\n" + code + "\n```"
+        self.response_metadata = {"token_usage": {"prompt_tokens": 100, "completion_tokens": 50}}
+
+class SpecModel:
+    """Chat model whose inventory spec doesn't compile until it is asked to repair it"""
+
+    def __init__(self, repairs_work=True):
+        self.repairs_work = repairs_work
+        self.repair_prompts = []
+
+    def invoke(self, messages, max_tokens=None):
+        prompt = messages[-1].content
+        if "fails to compile" in prompt:
+            self.repair_prompts.append(prompt)
+            return Response(GOOD_SPEC if self.repairs_work else BROKEN_SPEC)
+        return Response(BROKEN_SPEC if "# Inventory Workflow" in prompt else GOOD_SPEC)
+
+def read_log(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+async def test_spec_compile_check():
+    """Test batched type checks, targeted repair, fallback and blocked runs"""
+    print("Testing pre-execution spec compile check...")
+    print("=" * 50)
+
+    try:
+        from services.spec_compiler import SpecCompiler
+        from services.template_manager import TemplateManagerService
+        from services.playwright_generator import PlaywrightGeneratorService
+        from services.test_executor import TestExecutorService
+        from services.execution_pipeline import run_session_pipeline
+        from services.azure_openai_service import azure_openai_service
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tsc_log = os.path.join(tmp_dir, "tsc.log")
+            playwright_log = os.path.join(tmp_dir, "playwright.log")
+            os.environ["FAKE_TSC_LOG"] = tsc_log
+            os.environ["FAKE_PLAYWRIGHT_LOG"] = playwright_log
+            work_dir = os.path.join(tmp_dir, "compile")
+
+            # All specs are checked in one compiler run; errors are attributed per spec
+            compiler = SpecCompiler(work_dir=work_dir)
+            errors = await compiler.check({"a": GOOD_SPEC, "b": BROKEN_SPEC, "c": GOOD_SPEC + "\n{"})
+            assert set(errors) == {"b", "c"}, errors
+            assert errors["b"][0].code == 2304 and errors["b"][0].line == 5
+            assert errors["c"][0].code == 1005
+            assert len(read_log(tsc_log)) == 1 and len(read_log(tsc_log)[0]["files"]) == 3
+            assert os.listdir(work_dir) == []
+            print(f"✓ One compiler run checked 3 specs: {errors['b'][0]}")
+
+            # Without a TypeScript compiler specs run unchecked
+            missing = SpecCompiler(command="npx-missing-tsc", work_dir=work_dir)
+            assert await missing.check({"b": BROKEN_SPEC}) == {} and missing.available is False
+            assert missing.retry_at is None
+            print("✓ A missing compiler skips the check instead of failing the session")
+
+            # A compiler that failed to run once is tried again after the retry delay
+            failing = SpecCompiler(command="false", work_dir=work_dir, retry_after=0.1)
+            assert await failing.check({"b": BROKEN_SPEC}) == {} and failing.available is False
+            failing.command = compiler.command
+            assert await failing.check({"b": BROKEN_SPEC}) == {}
+            await asyncio.sleep(0.15)
+            assert set(await failing.check({"b": BROKEN_SPEC})) == {"b"} and failing.available
+            print("✓ A failed compiler run disables checks only until the retry delay passed")
+
+            # The pipeline repairs only the broken spec, then runs the corrected code
+            template_manager = TemplateManagerService()
+            await template_manager.initialize()
+            model = SpecModel()
+            azure_openai_service.llm = model
+            # Routed requests would use their own per-route clients instead of the fake
+            azure_openai_service.model_routing = False
+            azure_openai_service.access_token = "token"
+            azure_openai_service.token_expires_at = datetime.now() + timedelta(hours=1)
+
+            async def report_status(status, error_message=None):
+                pass
+
+            os.remove(tsc_log)
+            test_executor = TestExecutorService(output_dir=os.path.join(tmp_dir, "outputs"))
+            generator = PlaywrightGeneratorService(generation_mode="template", spec_compiler=SpecCompiler(work_dir=work_dir))
+            results = await run_session_pipeline(
+                "repair-session", ["login_flow", "inventory_workflow"], {"file_name": "devices.csv"},
+                CLUSTER_CONFIG, template_manager, generator, test_executor, report_status
+            )
+            checks = read_log(tsc_log)
+            assert [sorted(c["files"]) for c in checks] == [
+                ["inventory_workflow.spec.ts", "login_flow.spec.ts"], ["inventory_workflow.spec.ts"]
+            ], checks
+            assert len(model.repair_prompts) == 1 and "TS2304" in model.repair_prompts[0]
+            assert [e["workflow"] for e in read_log(playwright_log)] == ["login_flow", "inventory_workflow"]
+            with open(os.path.join(tmp_dir, "outputs", "repair-session", "inventory_workflow.spec.ts")) as f:
+                assert "BROKEN_TS" not in f.read()
+            assert results["success"], results.get("error_message")
+            print("✓ Only the broken spec was regenerated with its errors and re-checked before running")
+
+            # A spec the LLM can't repair falls back to basic generation
+            model.repairs_work = False
+            model.repair_prompts.clear()
+            specs, compile_errors = await generator.check_and_repair(
+                {"inventory_workflow": BROKEN_SPEC},
+                {"inventory_workflow": "test_import\nGiven: The user opens the inventory page"},
+                CLUSTER_CONFIG
+            )
+            assert len(model.repair_prompts) == 1 and compile_errors == {}
+            assert "BROKEN_TS" not in specs["inventory_workflow"] and "test_import" in specs["inventory_workflow"]
+            print("✓ Specs that stay broken after repair are replaced by basic generation")
+
+            # Specs that still don't compile never reach the browser, and their dependents are skipped
+            os.remove(playwright_log)
+            results = await test_executor.execute_tests(
+                "blocked-session", {"a": BROKEN_SPEC, "b": GOOD_SPEC, "c": GOOD_SPEC}, CLUSTER_CONFIG,
+                dependencies={"b": {"a"}}, compile_errors={"a": ["line 5, column 11: TS2304 Cannot find name 'BROKEN_TS'."]}
+            )
+            statuses = {w: r["status"] for w, r in results["test_results"].items()}
+            assert statuses == {"a": "failed", "b": "skipped", "c": "passed"}, statuses
+            assert results["test_results"]["a"]["compile_errors"]
+            assert [e["workflow"] for e in read_log(playwright_log)] == ["c"]
+            print("✓ Uncompilable specs fail without a browser run and skip their dependents")
+
+            await test_executor.artifact_manager.wait_for_pending()
+
+        print("\n🎉 SUCCESS: Spec compile check works correctly!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Spec compile check test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    success = asyncio.run(test_spec_compile_check())
+    sys.exit(0 if success else 1)
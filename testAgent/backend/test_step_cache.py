@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test script to verify step-level generation with cached Playwright snippets
+File: test_step_cache.py
+"""
+
+import asyncio
+import json
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+class SnippetResponse:
+    def __init__(self, content):
+        self.content = content
+        self.response_metadata = {"token_usage": {"prompt_tokens": 100, "completion_tokens": 50}}
+
+class SnippetModel:
+    """Chat model answering step prompts with one statement per numbered step"""
+
+    def __init__(self):
+        self.requested_steps = []
+
+    def invoke(self, messages, max_tokens=None):
+        steps = re.findall(r"^(\d+)\. (.+)$", messages[-1].content, re.MULTILINE)
+        self.requested_steps.append([step for _, step in steps])
+        snippets = {number: f"await page.getByText({json.dumps(step[:20])}).click();" for number, step in steps}
+        return SnippetResponse("```json\n" + json.dumps(snippets) + "\n```")
+
+async def test_step_cache():
+    """Test step normalization, cache reuse across workflows and persistence"""
+    print("Testing step-level generation cache...")
+    print("=" * 50)
+
+    try:
+        from services.step_cache import StepSnippetCache, normalize_step, parameter_values, parameterize, fill_parameters
+        from services.playwright_generator import PlaywrightGeneratorService
+        from services.template_manager import TemplateManagerService
+        from services.azure_openai_service import azure_openai_service
+
+        assert normalize_step("When: The user clicks on  \"Save and Next\" button.") == \
+            normalize_step("When: the user clicks on 'Save and Next' button")
+        assert normalize_step("When: The user clicks on 'Next' button") != \
+            normalize_step("Then: The user clicks on 'Next' button")
+        print("✓ Steps are normalized for case, quotes, whitespace and punctuation")
+
+        cache = StepSnippetCache(max_size=2)
+        cache.put("When: a", "a();")
+        cache.put("When: b", "b();")
+        assert cache.get("When: a") == "a();"
+        cache.put("When: c", "c();")
+        assert cache.get("When: b") is None and len(cache) == 2
+        print("✓ Least recently used snippets are evicted")
+
+        template_manager = TemplateManagerService()
+        await template_manager.initialize()
+        model = SnippetModel()
+        azure_openai_service.llm = model
+        azure_openai_service.access_token = "token"
+        azure_openai_service.token_expires_at = datetime.now() + timedelta(hours=1)
+        cluster_config = {"url": "https://10.0.0.1", "username": "admin", "password": "secret"}
+        parameters = {"file_name": "devices.csv", "building_name": "Building 1", "fabric_name": "Fabric 1"}
+
+        async def steps_of(workflow_name):
+            template = await template_manager.customize_template(
+                await template_manager.load_tdd_template(workflow_name), parameters
+            )
+            generator = PlaywrightGeneratorService()
+            return template, [s for case in generator._extract_test_cases_from_tdd(template) for s in case["steps"]]
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_path = os.path.join(tmp_dir, "step_snippets.json")
+            generator = PlaywrightGeneratorService(generation_mode="steps", step_cache=StepSnippetCache(path=cache_path))
+
+            inventory, inventory_steps = await steps_of("inventory_workflow")
+            code = await generator.generate_playwright_test("inventory_workflow", inventory, cluster_config)
+            unique_inventory = {normalize_step(s) for s in inventory_steps}
+            assert len(model.requested_steps) == 1 and len(model.requested_steps[0]) == len(unique_inventory)
+            assert code.count("test('") == 3 and "await page.getByText(" in code
+            assert code.count("{") == code.count("}")
+            assert "secret" not in code
+            print(f"✓ First workflow sent {len(model.requested_steps[0])} distinct steps of {len(inventory_steps)}")
+
+            # Steps shared with the inventory workflow come from the cache
+            fabric, fabric_steps = await steps_of("fabric_creation_workflow")
+            await generator.generate_playwright_test("fabric_creation_workflow", fabric, cluster_config)
+            new_steps = {normalize_step(s) for s in fabric_steps} - unique_inventory
+            assert len(model.requested_steps) == 2
+            assert {normalize_step(s) for s in model.requested_steps[1]} == new_steps
+            print(f"✓ Second workflow sent only its {len(new_steps)} new steps of {len(fabric_steps)}")
+
+            # A repeat run and a new process need no LLM call
+            await generator.generate_playwright_test("inventory_workflow", inventory, cluster_config)
+            restarted = PlaywrightGeneratorService(generation_mode="steps", step_cache=StepSnippetCache(path=cache_path))
+            assert await restarted.generate_playwright_test("inventory_workflow", inventory, cluster_config) == code
+            assert len(model.requested_steps) == 2
+            stats = restarted.step_cache.get_statistics()
+            assert stats["misses"] == 0 and stats["hits"] == len(unique_inventory)
+            print(f"✓ Cached snippets are reused after a restart: {stats['entries']} entries")
+
+            # Credentials are cached as placeholders, so they stay off disk and other users share entries
+            login_template = await template_manager.load_tdd_template("login_flow")
+            credentials = {"url": "https://10.0.0.7", "username": "netops-7", "password": "Hunter2-pw"}
+            login = await template_manager.customize_template(
+                login_template, {"cluster_url": credentials["url"], **credentials}
+            )
+            await generator.generate_playwright_test("login_flow", login, credentials)
+            with open(cache_path, encoding="utf-8") as f:
+                persisted = f.read()
+            assert all(value not in persisted for value in credentials.values())
+            assert "{{password}}" in persisted and "{{username}}" in persisted
+            requests = len(model.requested_steps)
+
+            others = {"url": "https://10.0.0.8", "username": "ops-2", "password": "Other-pw"}
+            other_login = await template_manager.customize_template(
+                login_template, {"cluster_url": others["url"], **others}
+            )
+            await generator.generate_playwright_test("login_flow", other_login, others)
+            assert len(model.requested_steps) == requests
+            assert parameterize("fill('ops-2')", parameter_values(others)) == "fill('{{username}}')"
+            assert fill_parameters("fill('{{username}}')", parameter_values(others)) == "fill('ops-2')"
+            print("✓ Cached login steps hold no credentials and are reused with other credentials")
+
+        print("\n🎉 SUCCESS: Step-level generation cache works correctly!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Step cache test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    success = asyncio.run(test_step_cache())
+    sys.exit(0 if success else 1)
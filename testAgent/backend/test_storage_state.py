@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test script to verify authenticated storage state reuse across workflows
+File: test_storage_state.py
+"""
+
+import asyncio
+import json
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+FAKES_BIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fakes", "bin")
+
+async def test_storage_state_reuse():
+    """Test that login_flow runs once and downstream workflows get its storage state"""
+    print("Testing storage state reuse in TestExecutorService...")
+    print("=" * 50)
+
+    try:
+        from services.test_executor import TestExecutorService
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            log_path = os.path.join(tmp_dir, "runs.jsonl")
+            os.environ["PATH"] = FAKES_BIN + os.pathsep + os.environ["PATH"]
+            os.environ["FAKE_PLAYWRIGHT_LOG"] = log_path
+
+            test_executor = TestExecutorService(output_dir=os.path.join(tmp_dir, "outputs"))
+            cluster_config = {"url": "https://10.0.0.1", "username": "admin", "password": "secret"}
+            spec = "import { test } from '@playwright/test';"
+
+            results = await test_executor.execute_tests(
+                "session-1",
+                {"login_flow": spec, "inventory_workflow": spec, "fabric_creation": spec},
+                cluster_config
+            )
+            assert results["success"], results
+
+            with open(log_path) as f:
+                runs = [json.loads(line) for line in f]
+            assert runs[0]["storage_state"] is None and runs[0]["auth_storage_state"] is None
+            assert all(run["storage_state"] and run["auth_storage_state"] for run in runs[1:])
+            print("✓ login_flow saved state, downstream workflows started authenticated")
+
+            # Every run shares one config file; per-run paths come from the environment
+            assert len({run["config"] for run in runs}) == 1
+            assert len(list(test_executor.config_dir.glob("*.config.ts"))) == 1
+            assert all("session-1" in run["output_dir"] for run in runs)
+            print("✓ Playwright config written once and shared across workflows")
+
+            reused = [s["workflow"] for s in results["execution_summary"] if s["reused_auth_state"]]
+            assert reused == ["inventory_workflow", "fabric_creation"]
+
+            # Another session against the same cluster reuses the state without logging in
+            results = await test_executor.execute_tests("session-2", {"inventory_workflow": spec}, cluster_config)
+            assert results["execution_summary"][0]["reused_auth_state"]
+            print("✓ State reused by a later session for the same cluster and credentials")
+
+            # A later session's login_flow is not run again while the saved state is fresh
+            with open(log_path) as f:
+                run_count = len(f.readlines())
+            results = await test_executor.execute_tests(
+                "session-2b", {"login_flow": spec, "inventory_workflow": spec}, cluster_config
+            )
+            with open(log_path) as f:
+                runs = [json.loads(line) for line in f][run_count:]
+            assert len(runs) == 1 and runs[0]["storage_state"], runs
+            assert results["success"] and results["test_results"]["login_flow"]["status"] == "passed"
+            assert [s["reused_auth_state"] for s in results["execution_summary"]] == [True, True]
+            print("✓ Second session skipped the login run and started from the saved state")
+
+            # Different credentials never see another user's state
+            other_config = dict(cluster_config, username="operator")
+            assert test_executor.get_storage_state(other_config) is None
+            print("✓ State is scoped to the credential set")
+
+            # Expired state is dropped
+            test_executor.storage_state_ttl = 0
+            await asyncio.sleep(0.01)
+            assert test_executor.get_storage_state(cluster_config) is None
+            test_executor.storage_state_ttl = 1800
+            print("✓ Expired state is invalidated")
+
+            # A failed login removes any saved state
+            await test_executor.execute_tests("session-3", {"login_flow": spec}, cluster_config)
+            assert test_executor.get_storage_state(cluster_config) is not None
+            test_executor.invalidate_storage_state(cluster_config)
+            os.environ["FAKE_PLAYWRIGHT_FAIL"] = "login_flow"
+            await test_executor.execute_tests("session-4", {"login_flow": spec}, cluster_config)
+            del os.environ["FAKE_PLAYWRIGHT_FAIL"]
+            assert test_executor.get_storage_state(cluster_config) is None
+            print("✓ Failed login leaves no saved state")
+
+            # The failed run's report is compressed in the background
+            await test_executor.artifact_manager.wait_for_pending()
+
+        print("\n🎉 SUCCESS: Storage state reuse works correctly!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Storage state test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    success = asyncio.run(test_storage_state_reuse())
+    sys.exit(0 if success else 1)
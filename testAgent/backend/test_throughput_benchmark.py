@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the fake LLM server and the end-to-end throughput benchmark
+File: test_throughput_benchmark.py
+"""
+
+import asyncio
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+async def test_throughput_benchmark():
+    """Test the fake OpenAI server answers, its error injection and a short benchmark run"""
+    print("Testing throughput benchmark harness...")
+    print("=" * 50)
+
+    try:
+        import httpx
+        from fakes.openai_server import FakeOpenAIServer
+        from bench_throughput import parse_args, run_benchmark, percentile
+
+        assert percentile([], 99) == 0.0
+        assert percentile([3, 1, 2, 4], 50) == 2 and percentile(list(range(1, 101)), 95) == 95
+        print("✓ Nearest-rank percentiles")
+
+        # The fake server speaks the token and chat completion protocols
+        server = FakeOpenAIServer(rate_limit_rate=0.5, seed=1)
+        base_url = await server.start()
+        try:
+            async with httpx.AsyncClient(base_url=base_url) as client:
+                assert (await client.post("/oauth2/token")).status_code == 401
+                token = (await client.post("/oauth2/token", headers={"Authorization": "Basic abc"})).json()
+                assert token["access_token"] and token["expires_in"] == 3600
+
+                statuses = []
+                for _ in range(20):
+                    response = await client.post("/v1/chat/completions", json={"messages": [
+                        {"role": "user", "content": "Respond with only a JSON object mapping each step number.\n1. a\n2. b"}
+                    ]})
+                    statuses.append(response.status_code)
+                    if response.status_code == 429:
+                        assert response.headers["Retry-After"] == "1"
+                    else:
+                        assert response.json()["choices"][0]["message"]["content"].startswith('{"1": ')
+            assert set(statuses) == {200, 429}
+            assert server.get_statistics()["rate_limited"] == statuses.count(429)
+        finally:
+            await server.stop()
+        print(f"✓ Fake server rate limited {statuses.count(429)} of 20 completions")
+
+        # A short run drives sessions through the app and reports every pipeline stage
+        report = await run_benchmark(parse_args([
+            "--sessions", "4", "--concurrency", "2", "--llm-latency", "0.05", "--llm-jitter", "0", "--run-duration", "0.05"
+        ]))
+        assert report["statuses"] == {"completed": 4}, report["statuses"]
+        assert {"generation", "compile_check", "playwright_run"} <= set(report["stages"]), report["stages"]
+        assert report["session_latency"]["count"] == 4 and report["sessions_per_minute"] > 0
+        assert report["llm_requests"]["token"] == 1
+        print(f"✓ Benchmark completed 4 sessions at {report['sessions_per_minute']:.0f} sessions/minute")
+
+        print("\n🎉 SUCCESS: Throughput benchmark works correctly!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Throughput benchmark test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    success = asyncio.run(test_throughput_benchmark())
+    sys.exit(0 if success else 1)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Test script to verify session-correlated tracing spans and exporters
+File: test_tracing.py
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+FAKES_BIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fakes", "bin")
+
+class CollectorHandler(BaseHTTPRequestHandler):
+    """Minimal OTLP/HTTP collector that keeps received payloads"""
+    received = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        CollectorHandler.received.append((self.path, json.loads(body)))
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+async def test_tracing():
+    """Test that spans across services share the session's trace and export correctly"""
+    print("Testing tracing spans...")
+    print("=" * 50)
+
+    from core.tracing import tracer, Span, JsonFileSpanExporter, OTLPHttpSpanExporter
+    original_exporter = tracer.exporter
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            spans_file = os.path.join(tmp_dir, "spans.jsonl")
+            tracer.exporter = JsonFileSpanExporter(spans_file)
+            os.environ["PATH"] = FAKES_BIN + os.pathsep + os.environ["PATH"]
+
+            from services.instruction_parser import InstructionParserService
+            from services.template_manager import TemplateManagerService
+            from services.workflow_manager import WorkflowManagerService
+            from services.test_executor import TestExecutorService
+
+            template_manager = TemplateManagerService()
+            await template_manager.initialize()
+            workflow_manager = WorkflowManagerService()
+            await workflow_manager.set_template_manager(template_manager)
+            workflow_manager.cluster_inventory = None
+            test_executor = TestExecutorService(output_dir=os.path.join(tmp_dir, "outputs"))
+
+            async def run_session(session_id):
+                tracer.bind_session(session_id)
+                with tracer.span("session"):
+                    parsed = await InstructionParserService().parse_instruction("run inventory workflow")
+                    plan = await workflow_manager.resolve_workflow_chain(parsed.workflows, parsed.parameters, session_id)
+                    spec = "import { test } from '@playwright/test';"
+                    await test_executor.execute_tests(session_id, {w: spec for w in plan.execution_chain}, {})
+
+            # Concurrent sessions keep their own correlation context
+            await asyncio.gather(run_session("session-a"), run_session("session-b"))
+            assert tracer.force_flush()
+
+            with open(spans_file) as f:
+                spans = [json.loads(line) for line in f]
+            for session_id in ("session-a", "session-b"):
+                session_spans = [s for s in spans if s["session_id"] == session_id]
+                by_id = {s["span_id"]: s for s in session_spans}
+                names = {s["name"] for s in session_spans}
+                assert {"InstructionParserService.parse_instruction", "WorkflowManagerService.resolve_workflow_chain",
+                        "TestExecutorService.execute_tests", "TestExecutorService._execute_real_playwright_test"} <= names, names
+                assert len({s["trace_id"] for s in session_spans}) == 1
+                roots = [s for s in session_spans if s["parent_id"] is None]
+                assert [r["name"] for r in roots] == ["session"]
+                assert all(s["parent_id"] in by_id for s in session_spans if s["parent_id"])
+                run_span = next(s for s in session_spans if s["name"].endswith("_execute_real_playwright_test"))
+                assert by_id[run_span["parent_id"]]["name"] == "TestExecutorService.execute_tests"
+                assert run_span["attributes"]["workflow_name"]
+            print(f"✓ {len(spans)} spans from 2 concurrent sessions, one trace per session")
+
+            # Errors are recorded on the span
+            try:
+                with tracer.span("failing"):
+                    raise ValueError("boom")
+            except ValueError:
+                pass
+            tracer.force_flush()
+            with open(spans_file) as f:
+                failing = [json.loads(line) for line in f][-1]
+            assert failing["status"] == "error" and failing["error"] == "ValueError: boom"
+            print("✓ Exceptions mark spans as errors")
+
+            # The span file is opened on the first export and rotated at its size limit
+            rotated_file = os.path.join(tmp_dir, "rotated", "spans.jsonl")
+            rotating = JsonFileSpanExporter(rotated_file, max_bytes=4096, backup_count=2)
+            assert not os.path.exists(os.path.dirname(rotated_file))
+            span = Span(name="rotated", trace_id="0" * 32, span_id="0" * 16, parent_id=None,
+                        session_id="session-d", start_time_ns=0, end_time_ns=1)
+            for _ in range(20):
+                rotating.export([span] * 5)
+            rotating.shutdown()
+            assert os.path.getsize(rotated_file) <= 4096 and os.path.exists(rotated_file + ".2")
+            assert not os.path.exists(rotated_file + ".3")
+            print("✓ Span file is created lazily and rotated")
+
+            # OTLP/HTTP export
+            server = HTTPServer(("127.0.0.1", 0), CollectorHandler)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            endpoint = f"http://127.0.0.1:{server.server_port}/v1/traces"
+            tracer.exporter = OTLPHttpSpanExporter(endpoint)
+            with tracer.session("session-c"):
+                with tracer.span("otlp-root", workflow_name="login_flow"):
+                    with tracer.span("otlp-child"):
+                        pass
+            tracer.force_flush()
+            server.shutdown()
+            path, payload = CollectorHandler.received[-1]
+            otlp_spans = payload["resourceSpans"][0]["scopeSpans"][0]["spans"]
+            assert path == "/v1/traces" and [s["name"] for s in otlp_spans] == ["otlp-child", "otlp-root"]
+            assert otlp_spans[0]["parentSpanId"] == otlp_spans[1]["spanId"]
+            assert {"key": "session.id", "value": {"stringValue": "session-c"}} in otlp_spans[1]["attributes"]
+            print(f"✓ Spans exported to an OTLP/HTTP collector at {endpoint}")
+
+        print("\n🎉 SUCCESS: Tracing works correctly!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Tracing test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    finally:
+        tracer.exporter = original_exporter
+
+if __name__ == "__main__":
+    success = asyncio.run(test_tracing())
+    sys.exit(0 if success else 1)
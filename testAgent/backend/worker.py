@@ -0,0 +1,68 @@
+"""
+E2E Testing Agent Backend - Execution worker process
+File: backend/worker.py
+
+Runs sessions queued by the API when EXECUTION_MODE is "worker":
+
+    python worker.py --concurrency 2
+"""
+
+import argparse
+import asyncio
+import logging
+import signal
+
+from services.template_manager import TemplateManagerService
+from services.playwright_generator import PlaywrightGeneratorService
+from services.test_executor import TestExecutorService
+from services.broker import create_broker
+from services.execution_workers import ExecutionWorker
+from core.config import settings
+from core.logging_config import setup_logging
+from core.tracing import tracer
+
+logger = logging.getLogger("worker")
+
+async def run_worker(args: argparse.Namespace):
+    template_manager = TemplateManagerService()
+    playwright_generator = PlaywrightGeneratorService()
+    test_executor = TestExecutorService(output_dir=args.output_dir)
+
+    await template_manager.initialize()
+    try:
+        await playwright_generator.initialize()
+    except Exception as e:
+        # Generation falls back to the basic generator without Azure OpenAI
+        logger.warning(f"⚠️  Azure OpenAI initialization failed: {str(e)}")
+    await test_executor.initialize()
+
+    worker = ExecutionWorker(
+        create_broker(args.broker), template_manager, playwright_generator, test_executor,
+        concurrency=args.concurrency
+    )
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    try:
+        await worker.run(stop_event)
+    finally:
+        await test_executor.artifact_manager.wait_for_pending()
+        tracer.shutdown()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run queued E2E test sessions")
+    parser.add_argument("--broker", default=settings.EXECUTION_BROKER_URL, help="Broker URL")
+    parser.add_argument("--concurrency", type=int, default=settings.WORKER_CONCURRENCY,
+                        help="Sessions run at the same time")
+    parser.add_argument("--output-dir", default=settings.TEST_OUTPUT_DIR, help="Test output directory")
+    parser.add_argument("--log-file", default=None, help="Log file, defaults to LOG_FILE")
+    args = parser.parse_args()
+
+    setup_logging(log_file=args.log_file)
+    asyncio.run(run_worker(args))
+
+if __name__ == "__main__":
+    main()